@@ -0,0 +1,71 @@
+#measures the memory held by the AST of a scaled-up test_cases program, and what the same tree
+#would take with one __dict__ per node and lists for its operands (how the node classes were before they got
+#__slots__ and tuples)
+#usage: python benchmarks/bench_ast_memory.py [--size-kb N]
+import sys
+import tracemalloc
+
+from corpus import scaled_program
+from lexer.lexer import tokenize_program
+from parser.ast_nodes import ASTNode
+from parser.parser import Parser
+
+
+def node_fields(node):
+    #every slot of a node, base class slots included
+    return [name for cls in type(node).__mro__ for name in getattr(cls, "__slots__", ())]
+
+
+def to_dict_nodes(value, classes):
+    #copies a tree into plain-class instances that keep their attributes in a __dict__
+    if isinstance(value, (list, tuple)):
+        return [to_dict_nodes(item, classes) for item in value]
+    if not isinstance(value, ASTNode):
+        return value
+    cls = type(value)
+    if cls not in classes:
+        classes[cls] = type(cls.__name__, (), {})
+    copy = classes[cls]()
+    for name in node_fields(value):
+        setattr(copy, name, to_dict_nodes(getattr(value, name), classes))
+    return copy
+
+
+def count_nodes(value):
+    if isinstance(value, (list, tuple)):
+        return sum(count_nodes(item) for item in value)
+    if not isinstance(value, ASTNode):
+        return 0
+    return 1 + sum(count_nodes(getattr(value, name)) for name in node_fields(value))
+
+
+def measure(build):
+    #bytes still allocated once build returns, i.e. what the tree keeps alive
+    tracemalloc.start()
+    tree = build()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return size, tree
+
+
+def main(argv):
+    size_kb = 512
+    for arg in argv:
+        if arg.startswith("--size-kb="):
+            size_kb = int(arg.split("=", 1)[1])
+
+    source = scaled_program(size_kb * 1024)
+    tokens = tokenize_program(source)
+    print(f"Source: {len(source) / 1024:.0f} KB, {len(tokens):,} tokens")
+
+    slotted_bytes, ast = measure(lambda: Parser(tokens).parse())
+    dict_bytes, _ = measure(lambda: to_dict_nodes(ast, {}))
+    nodes = count_nodes(ast)
+
+    print(f"{'__dict__':<9} {dict_bytes / 1024 / 1024:8.2f} MB  {dict_bytes / nodes:6.1f} bytes/node")
+    print(f"{'__slots__':<9} {slotted_bytes / 1024 / 1024:8.2f} MB  {slotted_bytes / nodes:6.1f} bytes/node")
+    print(f"reduction: {(1 - slotted_bytes / dict_bytes) * 100:.0f}% ({nodes:,} nodes)")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
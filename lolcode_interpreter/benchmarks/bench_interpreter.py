@@ -0,0 +1,191 @@
+#times the execution engines on loop- and call-heavy programs: test_cases/09_loops.lol, whose loops run as
+#many times as the number it reads and print every step, an arithmetic loop that only prints its result,
+#the same loop with its body moved into a function, a loop around a recursive function and naive fibonacci
+#usage: python benchmarks/bench_interpreter.py [--iterations N] [--repeat N] [--engine NAME] [--report] [-O]
+#the engines run with memoization off, so every row times the engine itself; the "tree (memoized)" row after
+#them shows what interpret() does with its memo on
+#  --report  also print which functions and loops the tiered engine compiled, and what interpret() memoized
+#  -O        run the AST optimizer on the programs first
+import os
+import sys
+import time
+
+from corpus import test_cases_dir
+from lexer.lexer import tokenize_program
+from parser.parser import Parser
+from semantics import ENGINES, TieredInterpreter, Memo, interpret, optimize
+
+#engines that memoize pure functions unless they are given a Memo(0)
+MEMOIZING_ENGINES = ("tree", "tiered")
+
+#sums n mod 7 for n below the number it reads, minus one for every multiple of 3
+ARITHMETIC_LOOP = """HAI
+WAZZUP
+I HAS A limit
+I HAS A n ITZ 0
+I HAS A total ITZ 0
+BUHBYE
+GIMMEH limit
+IM IN YR lp UPPIN YR n TIL BOTH SAEM n AN MAEK limit A NUMBR
+  total R SUM OF total AN MOD OF n AN 7
+  BOTH SAEM MOD OF n AN 3 AN 0
+  O RLY?
+    YA RLY
+      total R DIFF OF total AN 1
+  OIC
+IM OUTTA YR lp
+VISIBLE total
+KTHXBYE
+"""
+
+#ARITHMETIC_LOOP with one HOW IZ I call per iteration
+CALL_LOOP = """HAI
+WAZZUP
+I HAS A limit
+I HAS A n ITZ 0
+I HAS A total ITZ 0
+BUHBYE
+HOW IZ I step YR total AN YR n
+  total R SUM OF total AN MOD OF n AN 7
+  BOTH SAEM MOD OF n AN 3 AN 0
+  O RLY?
+    YA RLY
+      FOUND YR DIFF OF total AN 1
+  OIC
+  FOUND YR total
+IF U SAY SO
+GIMMEH limit
+IM IN YR lp UPPIN YR n TIL BOTH SAEM n AN MAEK limit A NUMBR
+  total R I IZ step YR total AN YR n MKAY
+IM OUTTA YR lp
+VISIBLE total
+KTHXBYE
+"""
+
+#a recursive HOW IZ I called once per iteration, 20 calls deep, every call ending in FOUND YR
+RECURSIVE_CALLS = """HAI
+WAZZUP
+I HAS A limit
+I HAS A n ITZ 0
+I HAS A total ITZ 0
+BUHBYE
+HOW IZ I countdown YR k
+  BOTH SAEM k AN 0
+  O RLY?
+    YA RLY
+      FOUND YR 0
+  OIC
+  FOUND YR SUM OF 1 AN I IZ countdown YR DIFF OF k AN 1 MKAY
+IF U SAY SO
+GIMMEH limit
+IM IN YR lp UPPIN YR n TIL BOTH SAEM n AN MAEK QUOSHUNT OF limit AN 20 A NUMBR
+  total R SUM OF total AN I IZ countdown YR 19 MKAY
+IM OUTTA YR lp
+VISIBLE total
+KTHXBYE
+"""
+
+#the doubly recursive fibonacci, 21,891 calls per fib YR 20 unless they are memoized
+FIBONACCI = """HAI
+WAZZUP
+I HAS A limit
+I HAS A n ITZ 0
+I HAS A total ITZ 0
+BUHBYE
+HOW IZ I fib YR k
+  BOTH SAEM SMALLR OF k AN 1 AN k
+  O RLY?
+    YA RLY
+      FOUND YR k
+  OIC
+  FOUND YR SUM OF I IZ fib YR DIFF OF k AN 1 MKAY AN I IZ fib YR DIFF OF k AN 2 MKAY
+IF U SAY SO
+GIMMEH limit
+IM IN YR lp UPPIN YR n TIL BOTH SAEM n AN MAEK QUOSHUNT OF limit AN 20000 A NUMBR
+  total R SUM OF total AN I IZ fib YR 20 MKAY
+IM OUTTA YR lp
+VISIBLE total
+KTHXBYE
+"""
+
+
+def unmemoized(engine):
+    def run(ast, gui_print, gui_input):
+        return engine(ast, gui_print, gui_input, memo=Memo(0))
+    return run
+
+
+def time_engine(run, ast, iterations, repeat):
+    #best of repeat runs, returns (seconds, output lines)
+    best = None
+    output = None
+    for _ in range(repeat):
+        output = []
+        inputs = iter([str(iterations)])
+        start = time.perf_counter()
+        run(ast, output.append, lambda: next(inputs, None))
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, output
+
+
+def main(argv):
+    iterations = 200000
+    repeat = 3
+    engines = list(ENGINES)
+    report = "--report" in argv
+    optimized = "-O" in argv
+    for arg in argv:
+        if arg.startswith("--iterations="):
+            iterations = int(arg.split("=", 1)[1])
+        elif arg.startswith("--repeat="):
+            repeat = int(arg.split("=", 1)[1])
+        elif arg.startswith("--engine="):
+            engines = [arg.split("=", 1)[1]]
+
+    with open(os.path.join(test_cases_dir, "09_loops.lol"), "r", encoding="utf-8") as f:
+        loops_source = f.read()
+    #09_loops counts up to the input and back down again
+    programs = [
+        ("09_loops.lol", loops_source, 2 * iterations + 1),
+        ("arithmetic loop", ARITHMETIC_LOOP, iterations),
+        ("call loop", CALL_LOOP, iterations),
+        ("recursive calls", RECURSIVE_CALLS, iterations // 20),
+        ("naive fibonacci", FIBONACCI, iterations // 20000),
+    ]
+
+    for title, source, loop_iterations in programs:
+        ast = Parser(tokenize_program(source)).parse()
+        if optimized:
+            ast = optimize(ast)
+        print(f"{title} with input {iterations:,}: {loop_iterations:,} loop iterations")
+
+        baseline = None
+        expected = None
+        rows = [(name, unmemoized(ENGINES[name]) if name in MEMOIZING_ENGINES else ENGINES[name])
+                for name in engines]
+        if "tree" in engines:
+            rows.append(("tree (memoized)", interpret))
+        for name, run in rows:
+            elapsed, output = time_engine(run, ast, iterations, repeat)
+            if expected is None:
+                expected = output
+            elif output != expected:
+                print(f"{name}: output differs from {engines[0]}")
+            baseline = baseline or elapsed
+            print(f"  {name:16} {elapsed:8.3f}s  {loop_iterations / elapsed:12,.0f} iterations/s  "
+                  f"{baseline / elapsed:5.1f}x")
+
+        if report:
+            tiers = TieredInterpreter(ast)
+            inputs = iter([str(iterations)])
+            tiers.run(lambda text: None, lambda: next(inputs, None))
+            print("  " + tiers.report().replace("\n", "\n  "))
+            memo = Memo()
+            inputs = iter([str(iterations)])
+            interpret(ast, lambda text: None, lambda: next(inputs, None), memo=memo)
+            print("  " + memo.report().replace("\n", "\n  "))
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,76 @@
+#compares lexing throughput of the scanner backends on a scaled-up test_cases corpus
+#usage: python benchmarks/bench_lexer.py [--size-kb N] [--repeat N] [--workers N]
+#--workers N also times parallel lexing with 2, 4, ... up to N workers against the serial master backend
+import os
+import sys
+import time
+
+from corpus import scaled_source
+from lexer.lexer import tokenize_program, BACKENDS, DEFAULT_BACKEND
+
+
+def time_backend(source, backend, repeat, workers=None):
+    #best of repeat runs, returns (seconds, tokens)
+    best = None
+    tokens = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        tokens = tokenize_program(source, backend, workers)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, tokens
+
+
+def main(argv):
+    size_kb = 512
+    repeat = 3
+    workers = None
+    for arg in argv:
+        if arg.startswith("--size-kb="):
+            size_kb = int(arg.split("=", 1)[1])
+        elif arg.startswith("--repeat="):
+            repeat = int(arg.split("=", 1)[1])
+        elif arg.startswith("--workers="):
+            workers = int(arg.split("=", 1)[1])
+
+    source = scaled_source(size_kb * 1024)
+    print(f"Source: {len(source) / 1024:.0f} KB, {source.count(chr(10)) + 1} lines")
+
+    results = {}
+    for backend in BACKENDS:
+        elapsed, tokens = time_backend(source, backend, repeat)
+        results[backend] = (elapsed, tokens)
+        mb_per_sec = len(source) / elapsed / (1024 * 1024)
+        print(f"{backend:<8} {elapsed:8.3f}s  {len(tokens) / elapsed:12,.0f} tokens/s  {mb_per_sec:6.2f} MB/s")
+
+    reference = results[BACKENDS[0]][1]
+    for backend in BACKENDS[1:]:
+        if results[backend][1] != reference:
+            print(f"WARNING: {backend} produced a different token stream")
+
+    baseline = results["legacy"][0]
+    print(f"master speedup over legacy: {baseline / results['master'][0]:.1f}x")
+
+    if workers:
+        #the speedup only means something with as many cores as workers, the CPU count is printed with it
+        print(f"parallel {DEFAULT_BACKEND} on {os.cpu_count()} CPUs:")
+        serial = results[DEFAULT_BACKEND][0]
+        for count in worker_counts(workers):
+            elapsed, tokens = time_backend(source, DEFAULT_BACKEND, repeat, count)
+            if tokens != results[DEFAULT_BACKEND][1]:
+                print(f"WARNING: {count} workers produced a different token stream")
+            print(f"{count:>3} workers {elapsed:8.3f}s  {serial / elapsed:5.2f}x the serial speed")
+
+
+def worker_counts(workers):
+    #2, 4, 8, ... below workers, then workers itself
+    counts = []
+    count = 2
+    while count < workers:
+        counts.append(count)
+        count *= 2
+    return counts + [workers] if workers > 1 else counts
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,42 @@
+#times Parser on a scaled-up valid program built from the test_cases corpus
+#usage: python benchmarks/bench_parser.py [--size-kb N] [--repeat N]
+import sys
+import time
+
+from corpus import scaled_program
+from lexer.lexer import tokenize_program
+from parser.parser import Parser
+
+
+def time_parse(tokens, repeat):
+    #best of repeat runs, returns (seconds, ast)
+    best = None
+    ast = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        ast = Parser(tokens).parse()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, ast
+
+
+def main(argv):
+    size_kb = 512
+    repeat = 3
+    for arg in argv:
+        if arg.startswith("--size-kb="):
+            size_kb = int(arg.split("=", 1)[1])
+        elif arg.startswith("--repeat="):
+            repeat = int(arg.split("=", 1)[1])
+
+    source = scaled_program(size_kb * 1024)
+    tokens = tokenize_program(source)
+    print(f"Source: {len(source) / 1024:.0f} KB, {source.count(chr(10)) + 1} lines, {len(tokens):,} tokens")
+
+    elapsed, ast = time_parse(tokens, repeat)
+    print(f"parse    {elapsed:8.3f}s  {len(tokens) / elapsed:12,.0f} tokens/s  "
+          f"{elapsed / len(tokens) * 1e9:6.0f} ns/token  ({len(ast.statements):,} statements)")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
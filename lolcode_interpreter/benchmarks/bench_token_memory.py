@@ -0,0 +1,39 @@
+#compares the memory held by a token list and by a TokenBuffer for the same scaled-up source
+#usage: python benchmarks/bench_token_memory.py [--size-kb N]
+import sys
+import tracemalloc
+
+from corpus import scaled_source
+from lexer.lexer import tokenize_program, tokenize_program_compact
+
+
+def measure(tokenize, source):
+    #bytes still allocated once tokenize returns, i.e. what the token container keeps alive
+    tracemalloc.start()
+    tokens = tokenize(source)
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return size, tokens
+
+
+def main(argv):
+    size_kb = 512
+    for arg in argv:
+        if arg.startswith("--size-kb="):
+            size_kb = int(arg.split("=", 1)[1])
+
+    source = scaled_source(size_kb * 1024)
+    print(f"Source: {len(source) / 1024:.0f} KB, {source.count(chr(10)) + 1} lines")
+
+    list_bytes, tokens = measure(tokenize_program, source)
+    del tokens
+    buffer_bytes, buffer = measure(tokenize_program_compact, source)
+    count = len(buffer)
+
+    print(f"{'list':<8} {list_bytes / 1024 / 1024:8.2f} MB  {list_bytes / count:6.1f} bytes/token")
+    print(f"{'buffer':<8} {buffer_bytes / 1024 / 1024:8.2f} MB  {buffer_bytes / count:6.1f} bytes/token")
+    print(f"reduction: {list_bytes / buffer_bytes:.1f}x ({count:,} tokens, {len(buffer.lexemes):,} distinct lexemes)")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
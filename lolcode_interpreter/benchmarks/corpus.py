@@ -0,0 +1,63 @@
+#helpers for building large benchmark inputs out of the test_cases corpus
+import os
+import sys
+
+benchmarks_dir = os.path.dirname(os.path.abspath(__file__))
+interpreter_dir = os.path.dirname(benchmarks_dir)
+test_cases_dir = os.path.join(interpreter_dir, "test_cases")
+
+#makes lexer, parser and semantics importable when a benchmark is run as a script
+if interpreter_dir not in sys.path:
+    sys.path.insert(0, interpreter_dir)
+
+
+def load_test_cases():
+    #returns (file name, source) pairs for every .lol file in test_cases, sorted by name
+    cases = []
+    for name in sorted(os.listdir(test_cases_dir)):
+        if name.endswith(".lol"):
+            with open(os.path.join(test_cases_dir, name), "r", encoding="utf-8") as f:
+                cases.append((name, f.read()))
+    return cases
+
+
+def scaled_source(target_bytes):
+    #concatenates the whole corpus until the source is at least target_bytes long
+    #the result is only meant for lexing, it is not a valid program
+    corpus = "\n".join(source for _, source in load_test_cases()) + "\n"
+    copies = max(1, -(-target_bytes // len(corpus)))
+    return corpus * copies
+
+
+def split_program(source):
+    #returns (declaration lines, body lines) of a HAI ... KTHXBYE program
+    lines = [line.strip() for line in source.split("\n")]
+    start = next(i for i, line in enumerate(lines) if line.startswith("HAI"))
+    end = max(i for i, line in enumerate(lines) if line.startswith("KTHXBYE"))
+    inner = lines[start + 1:end]
+    if "WAZZUP" in inner and "BUHBYE" in inner:
+        wazzup, buhbye = inner.index("WAZZUP"), inner.index("BUHBYE")
+        return inner[wazzup + 1:buhbye], inner[buhbye + 1:]
+    return [], inner
+
+
+def scaled_program(target_bytes):
+    #a valid program of at least target_bytes: the declarations of every test case that parses,
+    #followed by their statement bodies repeated until the size is reached
+    from lexer.lexer import tokenize_program
+    from parser.parser import Parser, SyntaxError as LOLSyntaxError
+
+    declarations = []
+    bodies = []
+    for _, source in load_test_cases():
+        try:
+            Parser(tokenize_program(source)).parse()
+        except LOLSyntaxError:
+            continue
+        decls, body = split_program(source)
+        declarations.extend(decls)
+        bodies.extend(body)
+
+    body = "\n".join(bodies) + "\n"
+    copies = max(1, -(-target_bytes // len(body)))
+    return "HAI\nWAZZUP\n" + "\n".join(declarations) + "\nBUHBYE\n" + body * copies + "KTHXBYE\n"
@@ -1,6 +1,12 @@
 #lexer/__init__.py
 
-from .lexer import tokenize_program
+from .lexer import tokenize_program, tokenize_program_compact, iter_tokens, iter_file_tokens
 from .lol_tokens import TokenType
+from .token_buffer import TokenBuffer
+from .incremental import IncrementalLexer
+from .mmap_lexer import iter_mmap_tokens, tokenize_file_mmap
 
-__all__ = ["tokenize_program", "TokenType"]
+__all__ = [
+    "tokenize_program", "tokenize_program_compact", "iter_tokens", "iter_file_tokens",
+    "iter_mmap_tokens", "tokenize_file_mmap", "TokenType", "TokenBuffer", "IncrementalLexer",
+]
@@ -0,0 +1,106 @@
+try:
+    from .lexer import LexerState, lex_line, tokenize_program, DEFAULT_BACKEND
+    from .lol_tokens import TokenType
+except ImportError:
+    from lexer import LexerState, lex_line, tokenize_program, DEFAULT_BACKEND
+    from lol_tokens import TokenType
+
+#the lexer state a program starts in: (in_string, in_comment, last_type)
+INITIAL_STATE = (False, False, None)
+
+
+class LineEntry: #cached lexing result for one source line
+    def __init__(self, text, incoming, tokens, outgoing, failed):
+        self.text = text
+        self.incoming = incoming #state key the line was lexed with
+        self.tokens = tokens #(lexeme, token_type, col) triples, line numbers are added when the program is assembled
+        self.outgoing = outgoing #state key the next line starts with
+        self.failed = failed #lex_line raised on this line (stray TLDR, nested OBTW)
+
+
+def state_key(state):
+    #the parts of a LexerState that decide how the next line is lexed
+    return (state.in_string, state.in_comment, state.last_type)
+
+
+def state_from_key(key):
+    state = LexerState()
+    state.in_string, state.in_comment, state.last_type = key
+    return state
+
+
+class IncrementalLexer: #keeps per-line tokens between edits and only re-lexes what an edit can affect
+    #a line is re-lexed when its text changed or when the state it starts in changed,
+    #so after a one-line edit the work stops at the first following line whose incoming state is unchanged
+
+    def __init__(self, source_code="", backend=None):
+        self.backend = backend or DEFAULT_BACKEND
+        self.source_code = ""
+        self.entries = []
+        self.update(source_code)
+
+    def lex(self, text, incoming):
+        state = state_from_key(incoming)
+        try:
+            #line numbers only matter for error messages, which tokens() regenerates with the right numbers
+            line_tokens = lex_line(text, 0, state, self.backend)
+        except SyntaxError:
+            #lex_line leaves the state alone when it rejects a line
+            return LineEntry(text, incoming, (), incoming, True)
+        triples = tuple((lexeme, token_type, col) for lexeme, token_type, _, col in line_tokens)
+        return LineEntry(text, incoming, triples, state_key(state), False)
+
+    def update(self, source_code):
+        #brings the cache in line with the new source, returns how many lines were re-lexed
+        old_entries = self.entries
+        new_lines = source_code.split('\n')
+        old_count = len(old_entries)
+        new_count = len(new_lines)
+
+        #the edited region is whatever lies between the unchanged first and last lines
+        prefix = 0
+        limit = min(old_count, new_count)
+        while prefix < limit and old_entries[prefix].text == new_lines[prefix]:
+            prefix += 1
+        suffix = 0
+        while (suffix < limit - prefix
+               and old_entries[old_count - 1 - suffix].text == new_lines[new_count - 1 - suffix]):
+            suffix += 1
+
+        #untouched suffix entries are kept and only re-lexed if the state flowing into them changed
+        entries = old_entries[:prefix] + [None] * (new_count - prefix - suffix) + old_entries[old_count - suffix:]
+        incoming = entries[prefix - 1].outgoing if prefix else INITIAL_STATE
+        relexed = 0
+        for index in range(prefix, new_count):
+            entry = entries[index]
+            if entry is not None and entry.incoming == incoming:
+                break
+            entry = self.lex(new_lines[index], incoming)
+            entries[index] = entry
+            incoming = entry.outgoing
+            relexed += 1
+
+        self.entries = entries
+        self.source_code = source_code
+        return relexed
+
+    def line_tokens(self, line_num):
+        #tokens of one line (1-based), including its linebreak
+        entry = self.entries[line_num - 1]
+        return [(lexeme, token_type, line_num, col) for lexeme, token_type, col in entry.tokens]
+
+    def tokens(self):
+        #the token list tokenize_program would return for the current source
+        entries = self.entries
+        if not entries or entries[-1].outgoing[1] or any(entry.failed for entry in entries):
+            #errors (and their line numbers) come from a full lex so they read exactly the same
+            return tokenize_program(self.source_code, self.backend)
+
+        tokens = [(lexeme, token_type, line_num, col)
+                  for line_num, entry in enumerate(entries, 1)
+                  for lexeme, token_type, col in entry.tokens]
+
+        #remove the last linebreak if theres one
+        if tokens and tokens[-1][1] == TokenType.LINEBREAK:
+            tokens.pop()
+        return tokens
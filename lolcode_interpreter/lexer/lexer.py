@@ -1,28 +1,49 @@
+import os
 import re
 import sys
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
 
 try:
-    from .lol_tokens import TokenType, COMPILED_PATTERNS
+    from .lol_tokens import TokenType, COMPILED_PATTERNS, MASTER_PATTERN, MASTER_GROUP_TYPES, MASTER_DISPATCH
+    from .token_buffer import TokenBuffer
 except ImportError:
-    from lol_tokens import TokenType, COMPILED_PATTERNS
+    from lol_tokens import TokenType, COMPILED_PATTERNS, MASTER_PATTERN, MASTER_GROUP_TYPES, MASTER_DISPATCH
+    from token_buffer import TokenBuffer
+
+#scanner backends: "master" runs one combined regex per token (picked by the token's first character),
+#"legacy" tries every pattern in COMPILED_PATTERNS in turn
+BACKENDS = ("master", "legacy")
+DEFAULT_BACKEND = "master"
+
+#smallest chunk parallel lexing hands to a worker, so sources under two chunks (512 KB) are always lexed serially,
+#whatever the worker count; below that the process start-up and pickling cost more than the lexing
+MIN_PARALLEL_CHUNK = 256 * 1024
+
+BTW_PATTERN = re.compile(r'\bBTW\b', re.IGNORECASE)
+OBTW_PATTERN = re.compile(r'\bOBTW\b', re.IGNORECASE)
+TLDR_PATTERN = re.compile(r'\bTLDR\b', re.IGNORECASE)
+
+
+class LexerState: #what the lexer needs to remember between lines, threaded through the line loop
+    def __init__(self):
+        self.last_type = None #type of the last token emitted, used to classify identifiers
+        self.in_string = False #inside a YARN literal (an opening " with no closing one yet)
+        self.in_comment = False #inside an OBTW ... TLDR block
+        self.comment_start_line = None #line of the open OBTW, for error messages
+
 
 def remove_comments(line):
     #find btw keyword (case insensitive, word boundary)
-    btw_pattern = re.compile(r'\bBTW\b', re.IGNORECASE)
-    match = btw_pattern.search(line)
+    match = BTW_PATTERN.search(line)
     
     if match:
         #keep everything before the BTW
         return line[:match.start()].rstrip()
     return line
 
-def classify_identifier(prev_tokens):
-    
-    if not prev_tokens:
-        return TokenType.VARIDENT
-    
-    #check the last token
-    last_token = prev_tokens[-1][1]
+def classify_identifier(last_token):
+    #last_token is the type of the token right before the identifier (None at the start of the program)
     
     #function definition
     if last_token == TokenType.HOW_IZ_I:
@@ -44,29 +65,36 @@ def classify_identifier(prev_tokens):
     return TokenType.VARIDENT
 
 
-def tokenize_line(line, line_num, all_tokens_so_far=None):
-    #tokenize one line at a time
-    if all_tokens_so_far is None:
-        all_tokens_so_far = []
+def tokenize_line(line, line_num, state=None, backend=None):
+    #tokenize one line at a time, state carries what the previous lines left behind and is updated in place
+    #tokens are (lexeme, TokenType, line_num, col), col is the 1-based character column of the lexeme in line
+    if state is None:
+        state = LexerState()
+    if backend is None:
+        backend = DEFAULT_BACKEND
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown lexer backend '{backend}'. Expected one of: {', '.join(BACKENDS)}")
 
     tokens = []
-    line = line.strip()
+    stripped = line.strip()
     
-    if not line:
+    if not stripped:
         return tokens
-    
-    # checks if currently in a string
-    in_string = False
-    if all_tokens_so_far and all_tokens_so_far[-1][1] == TokenType.STRING_DELIM:
-        delim_count = sum(1 for t in all_tokens_so_far if t[1] == TokenType.STRING_DELIM)
-        if delim_count % 2 != 0: # if only one " is detected
-            in_string = True
+    #column of the first character of the stripped line
+    first_col = len(line) - len(line.lstrip()) + 1
+    line = stripped
     
     #remove inline comments first
     line = remove_comments(line)
     
     if not line:
         return tokens
+
+    if backend == "master":
+        return scan_line_master(line, line_num, first_col, state)
+
+    # checks if currently in a string
+    in_string = state.in_string
     
     pos = 0
     while pos < len(line):
@@ -85,10 +113,10 @@ def tokenize_line(line, line_num, all_tokens_so_far=None):
             
             lexeme = line[starting_position:pos]
             if lexeme: #if the lexeme is not empty, we append
-                tokens.append((lexeme, TokenType.YARN, line_num))
+                tokens.append((lexeme, TokenType.YARN, line_num, first_col + starting_position))
             
             if pos < len(line) and line[pos] == '"': #closing quote is found, add as string delim
-                tokens.append(('"', TokenType.STRING_DELIM, line_num))
+                tokens.append(('"', TokenType.STRING_DELIM, line_num, first_col + pos))
                 in_string = False
 
             pos += 1
@@ -106,10 +134,9 @@ def tokenize_line(line, line_num, all_tokens_so_far=None):
 
                 #if regular identifier then figure out what kind it is
                 if token_type == TokenType.VARIDENT:
-                    context_tokens = all_tokens_so_far + tokens
-                    token_type = classify_identifier(context_tokens)
+                    token_type = classify_identifier(tokens[-1][1] if tokens else state.last_type)
                 
-                tokens.append((lexeme, token_type, line_num))
+                tokens.append((lexeme, token_type, line_num, first_col + pos))
                 pos = match.end()
                 matched = True
                 break
@@ -120,67 +147,238 @@ def tokenize_line(line, line_num, all_tokens_so_far=None):
             while end_pos < len(line) and not line[end_pos].isspace():
                 end_pos += 1
             lexeme = line[pos:end_pos]
-            tokens.append((lexeme, TokenType.UNKNOWN, line_num))
+            tokens.append((lexeme, TokenType.UNKNOWN, line_num, first_col + pos))
             pos = end_pos
     
+    state.in_string = in_string
+    if tokens:
+        state.last_type = tokens[-1][1]
     return tokens
 
 
-def tokenize_program(source_code):
-    lines = source_code.split('\n')
+def scan_line_master(line, line_num, first_col, state):
+    #walks a comment-free, stripped line with the master patterns, one match call per token;
+    #first_col is the column the stripped line starts at in the source line
+    in_string = state.in_string
+    last_type = state.last_type
     tokens = []
-    line_num = 1
-    in_multiline_comment = False
-    multiline_comment_start_line = None  # OBTW TRACKER
-    
-    for line in lines:
-        stripped = line.strip()
-        
-        #check for multiline comment start
-        if re.match(r'\bOBTW\b', stripped, re.IGNORECASE):
-            if in_multiline_comment:
-                raise SyntaxError(f"Nested OBTW found on line {line_num}. Previous OBTW on line {multiline_comment_start_line} was not closed.")
-            in_multiline_comment = True
-            multiline_comment_start_line = line_num
-            line_num += 1
-            continue
-        
-        #check for multiline comment end
-        if re.match(r'\bTLDR\b', stripped, re.IGNORECASE):
-            if not in_multiline_comment:
-                raise SyntaxError(f"TLDR found on line {line_num} without matching OBTW.")
-            in_multiline_comment = False
-            multiline_comment_start_line = None
-            line_num += 1
+    append = tokens.append
+    dispatch = MASTER_DISPATCH
+    fallback = (MASTER_PATTERN, MASTER_GROUP_TYPES)
+    length = len(line)
+    pos = 0
+
+    while pos < length:
+        char = line[pos]
+        if char.isspace():
+            pos += 1
             continue
-        
-        #skip lines inside multiline comments
-        if in_multiline_comment:
-            line_num += 1
+
+        if in_string:
+            #same as the legacy scanner: spaces right after the quote were skipped above
+            closing = line.find('"', pos)
+            if closing < 0:
+                append((line[pos:], TokenType.YARN, line_num, first_col + pos))
+                break
+            if closing > pos:
+                append((line[pos:closing], TokenType.YARN, line_num, first_col + pos))
+            append(('"', TokenType.STRING_DELIM, line_num, first_col + closing))
+            last_type = TokenType.STRING_DELIM
+            in_string = False
+            pos = closing + 1
             continue
 
-        #tokenize this line
-        line_tokens = tokenize_line(line, line_num, tokens)
-        
-        #add tokens and a linebreak
-        if line_tokens:
-            tokens.extend(line_tokens)
-            #add linebreak after each line
-            tokens.append(('\\n', TokenType.LINEBREAK, line_num))
+        pattern, group_types = dispatch.get(char, fallback)
+        match = pattern.match(line, pos)
+        group = match.lastindex
+        token_type = group_types[group]
+
+        if token_type == TokenType.STRING_DELIM:
+            in_string = True
+        elif token_type == TokenType.VARIDENT:
+            token_type = classify_identifier(last_type)
+
+        append((match.group(group), token_type, line_num, first_col + pos))
+        last_type = token_type
+        pos = match.end()
+
+    state.in_string = in_string
+    if tokens:
+        state.last_type = tokens[-1][1]
+    return tokens
+
+
+def lex_line(line, line_num, state, backend=None):
+    #lexes one source line of a program: OBTW/TLDR blocks, the line's tokens and its trailing linebreak
+    stripped = line.strip()
+
+    #check for multiline comment start
+    if OBTW_PATTERN.match(stripped):
+        if state.in_comment:
+            raise SyntaxError(f"Nested OBTW found on line {line_num}. Previous OBTW on line {state.comment_start_line} was not closed.")
+        state.in_comment = True
+        state.comment_start_line = line_num
+        return []
+
+    #check for multiline comment end
+    if TLDR_PATTERN.match(stripped):
+        if not state.in_comment:
+            raise SyntaxError(f"TLDR found on line {line_num} without matching OBTW.")
+        state.in_comment = False
+        state.comment_start_line = None
+        return []
 
-        line_num += 1
+    #skip lines inside multiline comments
+    if state.in_comment:
+        return []
 
+    #tokenize this line, tokenize_line strips it again and counts columns from its leading whitespace
+    line_tokens = tokenize_line(line, line_num, state, backend)
+
+    #add a linebreak after each line that produced tokens, at the column after the line's last character
+    if line_tokens:
+        line_tokens.append(('\\n', TokenType.LINEBREAK, line_num, len(line.rstrip()) + 1))
+        state.last_type = TokenType.LINEBREAK
+        #strings never run on to the next line, the linebreak closes them
+        state.in_string = False
+
+    return line_tokens
+
+
+def check_end_of_source(state):
     # check if multiline comment was never closed
-    if in_multiline_comment:
-        raise SyntaxError(f"Unclosed multiline comment: OBTW on line {multiline_comment_start_line} has no matching TLDR.")
+    if state.in_comment:
+        raise SyntaxError(f"Unclosed multiline comment: OBTW on line {state.comment_start_line} has no matching TLDR.")
+
+
+def finish_program(tokens, state):
+    #end-of-source checks shared by every way of lexing a whole program
+    check_end_of_source(state)
 
     #remove the last linebreak if theres one
     if tokens and tokens[-1][1] == TokenType.LINEBREAK:
         tokens.pop()
-    
+
     return tokens
 
 
+def tokenize_program(source_code, backend=None, workers=None):
+    #workers > 1 lexes chunks of lines in separate processes and returns the same tokens in a TokenBuffer
+    #(see tokenize_program_parallel)
+    if workers is not None and workers > 1:
+        return tokenize_program_parallel(source_code, backend, workers)
+
+    tokens = []
+    state = LexerState()
+
+    for line_num, line in enumerate(source_code.split('\n'), 1):
+        tokens.extend(lex_line(line, line_num, state, backend))
+
+    return finish_program(tokens, state)
+
+
+def split_source(source_code, chunk_count):
+    #cuts the source at line boundaries into about chunk_count pieces, returns (text, first line number) pairs
+    chunks = []
+    size = len(source_code)
+    start = 0
+    line_num = 1
+    for i in range(1, chunk_count + 1):
+        end = size if i == chunk_count else source_code.find('\n', max(start, size * i // chunk_count))
+        if end < 0:
+            end = size
+        chunks.append((source_code[start:end], line_num))
+        line_num += source_code.count('\n', start, end) + 1
+        start = end + 1
+        if start > size:
+            break
+    return chunks
+
+
+def lex_chunk(chunk, first_line_num, backend):
+    #worker side of tokenize_program_parallel: lexes a run of lines assuming the chunk starts
+    #outside strings and OBTW blocks, which is how nearly every line starts
+    #returns (tokens, state at the end of the chunk, error message of the first SyntaxError or None),
+    #the tokens come back as a TokenBuffer because its arrays pickle far faster than a list of tuples
+    state = LexerState()
+    tokens = TokenBuffer()
+    try:
+        for line_num, line in enumerate(chunk.split('\n'), first_line_num):
+            tokens.extend(lex_line(line, line_num, state, backend))
+    except SyntaxError as e:
+        return None, state, str(e)
+    return tokens, state, None
+
+
+def tokenize_program_parallel(source_code, backend=None, workers=None):
+    #lexes chunks of lines in a process pool, then stitches them together in order
+    #every line starts with last_type LINEBREAK (or None at the top), which classify_identifier treats the same,
+    #and never inside a string because the linebreak closes it, so the only state that can cross a chunk
+    #boundary is an open OBTW block; a chunk that turns out to start inside one is re-lexed here with the real state
+    #the chunks' TokenBuffers are joined array by array, no token tuple is built here: the result is a TokenBuffer
+    #that Parser reads one token at a time
+    workers = workers or os.cpu_count() or 1
+    chunk_count = min(workers * 4, len(source_code) // MIN_PARALLEL_CHUNK)
+    if workers < 2 or chunk_count < 2:
+        return tokenize_program_compact(source_code, backend)
+
+    chunks = split_source(source_code, chunk_count)
+    texts = [text for text, _ in chunks]
+    first_lines = [first_line for _, first_line in chunks]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        results = list(pool.map(lex_chunk, texts, first_lines, repeat(backend)))
+
+    tokens = TokenBuffer()
+    state = LexerState()
+    for (text, first_line), (chunk_tokens, chunk_state, error) in zip(chunks, results):
+        if state.in_comment or state.in_string:
+            #the guess was wrong, lex this chunk again starting from the state the previous one left
+            for line_num, line in enumerate(text.split('\n'), first_line):
+                tokens.extend(lex_line(line, line_num, state, backend))
+            continue
+        if error:
+            raise SyntaxError(error)
+        tokens.extend_buffer(chunk_tokens)
+        state = chunk_state
+
+    return finish_program(tokens, state)
+
+
+def tokenize_program_compact(source_code, backend=None):
+    #same tokens as tokenize_program, stored in a TokenBuffer instead of a list of tuples
+    tokens = TokenBuffer()
+    state = LexerState()
+
+    for line_num, line in enumerate(source_code.split('\n'), 1):
+        tokens.extend(lex_line(line, line_num, state, backend))
+
+    return finish_program(tokens, state)
+
+
+def iter_tokens(lines, backend=None):
+    #generator version of tokenize_program: pulls lines from any iterable (e.g. an open file)
+    #and yields the same tokens one at a time, so the whole token list never has to exist
+    state = LexerState()
+    pending_linebreak = None #held back until we know another line follows, like the pop in finish_program
+
+    for line_num, line in enumerate(lines, 1):
+        line_tokens = lex_line(line, line_num, state, backend)
+        if not line_tokens:
+            continue
+        if pending_linebreak:
+            yield pending_linebreak
+        pending_linebreak = line_tokens.pop()
+        yield from line_tokens
+
+    check_end_of_source(state)
+
+
+def iter_file_tokens(filename, backend=None):
+    #streams the tokens of a .lol file while it is being read
+    with open(filename, 'r', encoding='utf-8') as f:
+        yield from iter_tokens(f, backend)
+
+
 def print_tokens_table(tokens, show_linebreaks=False):
     #print the tokens
     if not tokens:
@@ -206,7 +404,7 @@ def print_tokens_table(tokens, show_linebreaks=False):
     print("="*80)
     
     #print each token
-    for lexeme, token_type, line_num in display_tokens:
+    for lexeme, token_type, line_num, _ in display_tokens:
         print(f"{lexeme:<{max_lexeme}}  {token_type.value:<{max_type}}  {line_num}")
     
     print("="*80)
@@ -218,17 +416,24 @@ def print_tokens_table(tokens, show_linebreaks=False):
     print()
 
 
-def analyze_file(filename, show_linebreaks=False):
+def analyze_file(filename, show_linebreaks=False, backend=None, use_mmap=False, workers=None):
     #read and analyze the lolcode file
+    #use_mmap scans the file through a memory map instead of reading it into a string (backend is ignored)
     try:
-        with open(filename, 'r', encoding='utf-8') as f:
-            source_code = f.read()
+        if use_mmap:
+            try:
+                from .mmap_lexer import tokenize_file_mmap
+            except ImportError:
+                from mmap_lexer import tokenize_file_mmap
+        else:
+            with open(filename, 'r', encoding='utf-8') as f:
+                source_code = f.read()
         
         print(f"\n{'='*80}")
         print(f"Analyzing file: {filename}")
         print(f"{'='*80}")
         
-        tokens = tokenize_program(source_code)
+        tokens = tokenize_file_mmap(filename) if use_mmap else tokenize_program(source_code, backend, workers)
         print_tokens_table(tokens, show_linebreaks)
         
         return tokens
@@ -244,8 +449,16 @@ def analyze_file(filename, show_linebreaks=False):
 if __name__ == "__main__":
     filename = sys.argv[1]
     show_linebreaks = '--show-linebreaks' in sys.argv
+    use_mmap = '--mmap' in sys.argv
+    backend = None
+    workers = None
+    for arg in sys.argv[2:]:
+        if arg.startswith('--backend='):
+            backend = arg.split('=', 1)[1]
+        elif arg.startswith('--workers='):
+            workers = int(arg.split('=', 1)[1])
     
     if not filename.endswith('.lol'):
         print("Error reading file (only .lol files)")
     
-    analyze_file(filename, show_linebreaks)
\ No newline at end of file
+    analyze_file(filename, show_linebreaks, backend, use_mmap, workers)
\ No newline at end of file
@@ -1,4 +1,5 @@
 import re
+import string
 from enum import Enum
 
 class TokenType(Enum):
@@ -304,4 +305,68 @@ def compile_patterns():
     return [(re.compile(pattern), token_type) for pattern, token_type in TOKEN_PATTERNS]
 
 
-COMPILED_PATTERNS = compile_patterns()
\ No newline at end of file
+COMPILED_PATTERNS = compile_patterns()
+
+
+
+def pattern_first_chars(pattern):
+    #returns the set of characters a token pattern can start with, or None if it could start with anything
+    if pattern.startswith(r'\b'):
+        pattern = pattern[2:]
+    if pattern.startswith(r'\+'):
+        return {'+'}
+    if pattern.startswith(r'-?\d'):
+        return set('-0123456789')
+    if pattern.startswith('[a-zA-Z]'):
+        return set(string.ascii_letters)
+    if pattern.startswith('(') and ')' in pattern:
+        alternatives = pattern[1:pattern.index(')')].split('|')
+        if all(alt[:1].isalpha() for alt in alternatives):
+            return {alt[0] for alt in alternatives}
+        return None
+    if pattern[:1].isalpha() or pattern[:1] == '"':
+        return {pattern[0]}
+    return None
+
+
+def compile_master_pattern(token_patterns, as_bytes=False):
+    #joins token patterns into one alternation of named groups so a single match call finds the next token
+    #alternatives are tried left to right, so the TOKEN_PATTERNS order (longest/most specific first) is kept
+    #anything no pattern accepts falls through to UNKNOWN, up to the next whitespace
+    #as_bytes compiles the same alternation as a bytes pattern (ASCII \b, \d and \s) for the mmap lexer
+    alternatives = [f'(?P<{token_type.name}>{pattern})' for pattern, token_type in token_patterns]
+    alternatives.append(r'(?P<UNKNOWN>\S+)')
+    source = '|'.join(alternatives)
+    compiled = re.compile(source.encode('ascii') if as_bytes else source)
+
+    #maps the group index reported by match.lastindex back to its token type
+    group_types = [None] * (compiled.groups + 1)
+    for group_name, group_index in compiled.groupindex.items():
+        group_types[group_index] = TokenType[group_name]
+    return compiled, group_types
+
+
+def compile_master_dispatch(as_bytes=False):
+    #one master pattern per leading character, holding only the patterns that can start with it
+    #bytes dispatch tables are keyed by the character's byte value, which is what indexing bytes gives
+    first_chars = [(pattern_first_chars(pattern), pattern, token_type) for pattern, token_type in TOKEN_PATTERNS]
+    leading = set()
+    for chars, _, _ in first_chars:
+        if chars:
+            leading |= chars
+
+    dispatch = {}
+    for char in leading:
+        subset = [(pattern, token_type) for chars, pattern, token_type in first_chars
+                  if chars is None or char in chars]
+        dispatch[ord(char) if as_bytes else char] = compile_master_pattern(subset, as_bytes)
+    return dispatch
+
+
+#full pattern, used for characters that no dedicated pattern starts with
+MASTER_PATTERN, MASTER_GROUP_TYPES = compile_master_pattern(TOKEN_PATTERNS)
+MASTER_DISPATCH = compile_master_dispatch()
+
+#bytes versions of the above, for scanning a memory-mapped file without decoding it
+BYTES_MASTER_PATTERN, BYTES_MASTER_GROUP_TYPES = compile_master_pattern(TOKEN_PATTERNS, as_bytes=True)
+BYTES_MASTER_DISPATCH = compile_master_dispatch(as_bytes=True)
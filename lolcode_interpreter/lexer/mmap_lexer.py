@@ -0,0 +1,167 @@
+import mmap
+import re
+
+try:
+    from .lexer import LexerState, classify_identifier, check_end_of_source
+    from .lol_tokens import TokenType, BYTES_MASTER_PATTERN, BYTES_MASTER_GROUP_TYPES, BYTES_MASTER_DISPATCH
+    from .token_buffer import TokenBuffer
+except ImportError:
+    from lexer import LexerState, classify_identifier, check_end_of_source
+    from lol_tokens import TokenType, BYTES_MASTER_PATTERN, BYTES_MASTER_GROUP_TYPES, BYTES_MASTER_DISPATCH
+    from token_buffer import TokenBuffer
+
+#byte versions of the comment patterns in lexer.py
+BTW_BYTES = re.compile(rb'\bBTW\b', re.IGNORECASE)
+OBTW_BYTES = re.compile(rb'\bOBTW\b', re.IGNORECASE)
+TLDR_BYTES = re.compile(rb'\bTLDR\b', re.IGNORECASE)
+
+#what \s matches in a bytes pattern, so skipping spaces agrees with the UNKNOWN \S+ group
+WHITESPACE = frozenset(b' \t\n\r\f\v')
+
+
+def lex_bytes_line(data, start, end, line_num, state, lexemes):
+    #lex_line for the line data[start:end] of a bytes-like buffer, scanning in place instead of slicing it out
+    #lexemes caches the decoded text of every keyword/identifier lexeme, so each distinct one is decoded once
+    #columns count characters like the str lexer: a token at pos is in column pos + shift, shift drops by
+    #however many more bytes than characters the text before it took (only lexemes and comments can hold
+    #non-ASCII text, whitespace and keywords are ASCII)
+    shift = 1 - start
+    while start < end and data[start] in WHITESPACE:
+        start += 1
+    while end > start and data[end - 1] in WHITESPACE:
+        end -= 1
+    content_end = end
+
+    #check for multiline comment start
+    if OBTW_BYTES.match(data, start, end):
+        if state.in_comment:
+            raise SyntaxError(f"Nested OBTW found on line {line_num}. Previous OBTW on line {state.comment_start_line} was not closed.")
+        state.in_comment = True
+        state.comment_start_line = line_num
+        return []
+
+    #check for multiline comment end
+    if TLDR_BYTES.match(data, start, end):
+        if not state.in_comment:
+            raise SyntaxError(f"TLDR found on line {line_num} without matching OBTW.")
+        state.in_comment = False
+        state.comment_start_line = None
+        return []
+
+    #skip lines inside multiline comments
+    if state.in_comment or start == end:
+        return []
+
+    #remove inline comments
+    match = BTW_BYTES.search(data, start, end)
+    comment_extra = 0
+    if match:
+        end = match.start()
+        comment = data[end:content_end]
+        comment_extra = len(comment) - len(comment.decode('utf-8'))
+        while end > start and data[end - 1] in WHITESPACE:
+            end -= 1
+        if start == end:
+            return []
+
+    in_string = state.in_string
+    last_type = state.last_type
+    tokens = []
+    append = tokens.append
+    dispatch = BYTES_MASTER_DISPATCH
+    fallback = (BYTES_MASTER_PATTERN, BYTES_MASTER_GROUP_TYPES)
+    pos = start
+
+    while pos < end:
+        byte = data[pos]
+        if byte in WHITESPACE:
+            pos += 1
+            continue
+
+        if in_string:
+            #YARN contents are the only lexemes that may hold non-ASCII text
+            closing = data.find(b'"', pos, end)
+            if closing < 0:
+                lexeme = data[pos:end].decode('utf-8')
+                append((lexeme, TokenType.YARN, line_num, pos + shift))
+                shift -= end - pos - len(lexeme)
+                break
+            if closing > pos:
+                lexeme = data[pos:closing].decode('utf-8')
+                append((lexeme, TokenType.YARN, line_num, pos + shift))
+                shift -= closing - pos - len(lexeme)
+            append(('"', TokenType.STRING_DELIM, line_num, closing + shift))
+            last_type = TokenType.STRING_DELIM
+            in_string = False
+            pos = closing + 1
+            continue
+
+        pattern, group_types = dispatch.get(byte, fallback)
+        match = pattern.match(data, pos, end)
+        group = match.lastindex
+        token_type = group_types[group]
+
+        if token_type == TokenType.STRING_DELIM:
+            in_string = True
+        elif token_type == TokenType.VARIDENT:
+            token_type = classify_identifier(last_type)
+
+        raw = match.group(group)
+        lexeme = lexemes.get(raw)
+        if lexeme is None:
+            lexeme = lexemes[raw] = raw.decode('utf-8')
+        append((lexeme, token_type, line_num, pos + shift))
+        shift -= len(raw) - len(lexeme)
+        last_type = token_type
+        pos = match.end()
+
+    #add a linebreak after each line that produced tokens, it also closes any open string;
+    #like the str lexer it goes after the line's last character, a BTW comment included
+    if tokens:
+        append(('\\n', TokenType.LINEBREAK, line_num, content_end + shift - comment_extra))
+    state.last_type = TokenType.LINEBREAK if tokens else last_type
+    state.in_string = False if tokens else in_string
+    return tokens
+
+
+def iter_bytes_tokens(data):
+    #iter_tokens for a UTF-8 encoded bytes-like buffer (bytes, mmap): lines are found with find(b'\n')
+    #and scanned where they are, so neither the decoded source nor a list of lines is ever built
+    state = LexerState()
+    lexemes = {}
+    pending_linebreak = None #held back until we know another line follows, like the pop in finish_program
+    size = len(data)
+    pos = 0
+    line_num = 0
+
+    #same lines as source.split('\n'), including the empty one after a trailing newline
+    while pos <= size:
+        end = data.find(b'\n', pos)
+        if end < 0:
+            end = size
+        line_num += 1
+        line_tokens = lex_bytes_line(data, pos, end, line_num, state, lexemes)
+        pos = end + 1
+        if not line_tokens:
+            continue
+        if pending_linebreak:
+            yield pending_linebreak
+        pending_linebreak = line_tokens.pop()
+        yield from line_tokens
+
+    check_end_of_source(state)
+
+
+def iter_mmap_tokens(filename):
+    #streams the tokens of a .lol file through a read-only memory map, the OS pages the file in as it is scanned
+    with open(filename, 'rb') as f:
+        if f.seek(0, 2) == 0:
+            #mmap refuses empty files, an empty source has no tokens anyway
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            yield from iter_bytes_tokens(data)
+
+
+def tokenize_file_mmap(filename):
+    #the whole token stream of a file in a compact TokenBuffer
+    return TokenBuffer(iter_mmap_tokens(filename))
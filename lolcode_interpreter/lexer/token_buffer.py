@@ -0,0 +1,110 @@
+import sys
+from array import array
+
+try:
+    from .lol_tokens import TokenType
+except ImportError:
+    from lol_tokens import TokenType
+
+#token types are stored as their index in this tuple
+TOKEN_TYPES = tuple(TokenType)
+TYPE_CODES = {token_type: code for code, token_type in enumerate(TOKEN_TYPES)}
+
+
+class TokenBuffer: #compact token list: parallel arrays of codes instead of one tuple per token
+    #a token tuple costs well over 100 bytes, here a token is 14 bytes plus its share of the interned lexemes
+    #indexing and iterating still give (lexeme, TokenType, line_num, col) tuples, built on demand,
+    #so Parser and the GUI lexeme table can take a TokenBuffer wherever they took a token list
+
+    def __init__(self, tokens=None):
+        self.types = array('H') #TYPE_CODES of each token
+        self.lines = array('I') #line number of each token
+        self.cols = array('I') #column of each token
+        self.lexeme_ids = array('I') #index of each token's lexeme in self.lexemes
+        self.lexemes = [] #every distinct lexeme, stored once
+        self.lexeme_index = {} #lexeme -> its index in self.lexemes
+        if tokens is not None:
+            self.extend(tokens)
+
+    def intern(self, lexeme):
+        #returns the id of lexeme, adding it to the table the first time it is seen
+        lexeme_id = self.lexeme_index.get(lexeme)
+        if lexeme_id is None:
+            lexeme_id = len(self.lexemes)
+            self.lexemes.append(lexeme)
+            self.lexeme_index[lexeme] = lexeme_id
+        return lexeme_id
+
+    def append(self, token):
+        lexeme, token_type, line_num, col = token
+        self.types.append(TYPE_CODES[token_type])
+        self.lines.append(line_num)
+        self.cols.append(col)
+        self.lexeme_ids.append(self.intern(lexeme))
+
+    def extend(self, tokens):
+        for token in tokens:
+            self.append(token)
+
+    def extend_buffer(self, other):
+        #appends every token of another TokenBuffer without building its tuples: the arrays are copied whole
+        #and only other's distinct lexemes are interned here, its lexeme ids are remapped to ours
+        remap = [self.intern(lexeme) for lexeme in other.lexemes]
+        self.types.extend(other.types)
+        self.lines.extend(other.lines)
+        self.cols.extend(other.cols)
+        self.lexeme_ids.extend(array('I', map(remap.__getitem__, other.lexeme_ids)))
+
+    def pop(self, index=-1):
+        #the lexeme stays in the intern table, it is usually shared with other tokens anyway
+        token = self[index]
+        self.types.pop(index)
+        self.lines.pop(index)
+        self.cols.pop(index)
+        self.lexeme_ids.pop(index)
+        return token
+
+    def to_list(self):
+        #all tokens as a plain token list, built with map/zip instead of one __getitem__ call per token
+        lexemes = map(self.lexemes.__getitem__, self.lexeme_ids)
+        token_types = map(TOKEN_TYPES.__getitem__, self.types)
+        return list(zip(lexemes, token_types, self.lines, self.cols))
+
+    def token_type(self, index):
+        #type of one token without building the tuple
+        return TOKEN_TYPES[self.types[index]]
+
+    def __len__(self):
+        return len(self.types)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        return (self.lexemes[self.lexeme_ids[index]], TOKEN_TYPES[self.types[index]], self.lines[index], self.cols[index])
+
+    def __iter__(self):
+        lexemes = self.lexemes
+        for type_code, line_num, col, lexeme_id in zip(self.types, self.lines, self.cols, self.lexeme_ids):
+            yield (lexemes[lexeme_id], TOKEN_TYPES[type_code], line_num, col)
+
+    def __eq__(self, other):
+        if isinstance(other, (TokenBuffer, list, tuple)):
+            return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+        return NotImplemented
+
+    def __repr__(self):
+        return f"TokenBuffer({len(self)} tokens, {len(self.lexemes)} distinct lexemes)"
+
+    def __getstate__(self):
+        #pickled without lexeme_index, which is rebuilt from lexemes (parallel lexing sends buffers between processes)
+        return self.types, self.lines, self.cols, self.lexeme_ids, self.lexemes
+
+    def __setstate__(self, state):
+        self.types, self.lines, self.cols, self.lexeme_ids, self.lexemes = state
+        self.lexeme_index = {lexeme: lexeme_id for lexeme_id, lexeme in enumerate(self.lexemes)}
+
+    def nbytes(self):
+        #bytes held by the arrays, the intern table and its strings (not counting the list/dict overhead per entry)
+        arrays = sum(a.itemsize * len(a) for a in (self.types, self.lines, self.cols, self.lexeme_ids))
+        strings = sum(sys.getsizeof(lexeme) for lexeme in self.lexemes)
+        return arrays + strings + sys.getsizeof(self.lexemes) + sys.getsizeof(self.lexeme_index)
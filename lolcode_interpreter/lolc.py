@@ -0,0 +1,71 @@
+#lolc: translates a LOLCODE program to a Python module and compiles it, caching the code object as a .pyc
+#usage: python lolc.py <file.lol> [-O] [--output=FILE] [--run]
+#  -O             fold constants and drop unreachable O RLY?/WTF? branches before translating
+#  --output=FILE  also write the generated Python source to FILE ('-' prints it)
+#  --run          run the program: VISIBLE prints to stdout, GIMMEH reads a line from stdin
+#  --input=FILE   with --run, GIMMEH reads its lines from FILE instead, so the program runs unattended
+import sys
+
+from parser import SyntaxError as LOLSyntaxError
+from semantics.transpiler import compile_file, run_code, transpile, pyc_path, TranspileError, COMPILE_ERRORS
+from parser.cache import parse_file_cached
+from semantics.optimizer import optimize as optimize_program
+from semantics.inputs import StreamInput, FileInput
+
+
+def main(argv):
+    if not argv or not argv[0].endswith('.lol'):
+        print("Usage: python lolc.py <file.lol> [-O] [--output=FILE] [--run] [--input=FILE]")
+        return 1
+    filename = argv[0]
+    output = None
+    input_file = None
+    run = '--run' in argv
+    optimize = '-O' in argv
+    for arg in argv[1:]:
+        if arg.startswith('--output='):
+            output = arg.split('=', 1)[1]
+        elif arg.startswith('--input='):
+            input_file = arg.split('=', 1)[1]
+
+    try:
+        code = compile_file(filename, optimize=optimize)
+        if output is not None:
+            program = parse_file_cached(filename)
+            if optimize:
+                program = optimize_program(program)
+            source = transpile(program, filename)
+            if output == '-':
+                sys.stdout.write(source)
+            else:
+                with open(output, 'w', encoding='utf-8') as f:
+                    f.write(source)
+    except OSError as e:
+        print(f"Error reading file: {e}")
+        return 1
+    except LOLSyntaxError as e:
+        print(f"SYNTAX ERROR:\n{e}")
+        return 1
+    except (TranspileError,) + COMPILE_ERRORS as e:
+        print(f"Cannot compile {filename}: {e}")
+        return 1
+
+    if not run:
+        if output is None:
+            print(f"Compiled {filename} -> {pyc_path(filename, optimize)}")
+        return 0
+    if input_file is None:
+        run_code(code, lambda text: sys.stdout.write(text), StreamInput())
+        return 0
+    try:
+        gimmeh_input = FileInput(input_file)
+    except OSError as e:
+        print(f"Error reading input file: {e}")
+        return 1
+    with gimmeh_input:
+        run_code(code, lambda text: sys.stdout.write(text), gimmeh_input)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
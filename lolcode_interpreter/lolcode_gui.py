@@ -9,10 +9,11 @@ script_dir = os.path.dirname(os.path.abspath(__file__))
 sys.path.insert(0, script_dir)
 
 try:
-    from lexer import tokenize_program, TokenType
+    from lexer import IncrementalLexer, TokenType
     from lexer.lol_tokens import TOKEN_DESCRIPTIONS
-    from semantics import interpret, lol_to_str
-    from parser import Parser, SyntaxError as LOLSyntaxError
+    from semantics import interpret, optimize, lol_to_str, Memo, CallbackSink
+    from semantics.output import BLOCK
+    from parser import Parser, SyntaxError as LOLSyntaxError, load_cached, store_cached
 except ImportError as e:
     print("import error:", e)
     sys.exit(1)
@@ -43,8 +44,15 @@ class LOLCodeInterpreterGUI:
         
         # for terminal input
         self.input_queue = []
+        self.input_signal = tk.IntVar(master=root) # bumped whenever a line is queued, GIMMEH waits on it
         self.waiting_for_input = False
         self.execution_cancelled = False
+        self.root.bind("<Destroy>", self.handle_destroy, add="+")
+        
+        # parsed programs of saved files are only cached when this is switched on in the File menu
+        self.cache_parsed = tk.BooleanVar(master=root, value=False)
+        # programs only go through the AST optimizer when this is switched on in the File menu
+        self.optimize_programs = tk.BooleanVar(master=root, value=False)
         
         self.create_layout()
     
@@ -114,6 +122,9 @@ class LOLCodeInterpreterGUI:
         file_menu.add_command(label="Save", command=self.save_file)
         file_menu.add_command(label="Save As...", command=self.save_file_as)
         file_menu.add_separator()
+        file_menu.add_checkbutton(label="Cache Parsed Programs", variable=self.cache_parsed)
+        file_menu.add_checkbutton(label="Optimize Programs", variable=self.optimize_programs)
+        file_menu.add_separator()
         file_menu.add_command(label="Exit", command=self.root.quit)
         file_btn.config(menu=file_menu)
         
@@ -453,6 +464,17 @@ class LOLCodeInterpreterGUI:
             self.console.mark_set(tk.INSERT, self.input_start_mark)
             return "break"
 
+    def queue_input(self, user_input):
+        # wakes up the GIMMEH waiting in gui_input
+        self.input_queue.append(user_input)
+        self.input_signal.set(self.input_signal.get() + 1)
+
+    def handle_destroy(self, event):
+        # closing the window while a GIMMEH waits cancels the run
+        if event.widget is self.root:
+            self.execution_cancelled = True
+            self.input_signal.set(self.input_signal.get() + 1)
+
     def handle_console_return(self, event):
         if not self.waiting_for_input:
             return "break"
@@ -460,7 +482,7 @@ class LOLCodeInterpreterGUI:
         # get input from marked position to end
         if self.input_start_mark:
             user_input = self.console.get(self.input_start_mark, tk.INSERT)
-            self.input_queue.append(user_input)
+            self.queue_input(user_input)
             self.console.insert(tk.INSERT, "\n")
             self.console.see(tk.END)
             self.console.config(state=tk.DISABLED)
@@ -473,7 +495,7 @@ class LOLCodeInterpreterGUI:
         if self.waiting_for_input:
             user_input = self.input_entry.get()
             self.input_entry.delete(0, tk.END)
-            self.input_queue.append(user_input)
+            self.queue_input(user_input)
             self.update_console(f">>> {user_input}\n")
             self.waiting_for_input = False
             self.input_entry.config(state=tk.DISABLED)
@@ -505,7 +527,8 @@ class LOLCodeInterpreterGUI:
             'content': '',
             'widget': text_editor,
             'original': '',
-            'button': None
+            'button': None,
+            'lexer': IncrementalLexer() # keeps per-line tokens between runs
         }
         
         # create tab button
@@ -608,7 +631,8 @@ class LOLCodeInterpreterGUI:
         if not self.current_tab_id:
             return
         
-        source_code = self.open_files[self.current_tab_id]['widget'].get(1.0, tk.END)
+        file_info = self.open_files[self.current_tab_id]
+        source_code = file_info['widget'].get(1.0, tk.END)
         
         if not source_code.strip():
             messagebox.showwarning("Warning", "No code to execute!")
@@ -623,12 +647,24 @@ class LOLCodeInterpreterGUI:
         
         try:
             # lexical analysis
-            self.tokens = tokenize_program(source_code)
+            # only the lines changed since the last run are re-lexed
+            lexer = file_info['lexer']
+            lexer.update(source_code)
+            self.tokens = lexer.tokens()
             self.update_lexemes()
             
-            # syntax analysis
-            parser = Parser(self.tokens)
-            ast = parser.parse()
+            # syntax analysis, reusing the cached program of a saved file if the source is unchanged
+            # (only when caching is switched on in the File menu); optimized programs are cached apart
+            use_cache = bool(file_info['path']) and self.cache_parsed.get()
+            optimized = self.optimize_programs.get()
+            ast = load_cached(file_info['path'], source_code, optimized) if use_cache else None
+            if ast is None:
+                parser = Parser(self.tokens)
+                ast = parser.parse()
+                if optimized:
+                    ast = optimize(ast)
+                if use_cache:
+                    store_cached(file_info['path'], source_code, ast, optimized)
             
             # semantic analysis
             def gui_print(text):
@@ -640,22 +676,24 @@ class LOLCodeInterpreterGUI:
                 self.console.focus()
                 self.input_start_mark = self.console.index(tk.INSERT)
                 
-                # wait for input with timeout to allow interrupts
+                # sleeps in Tk's event loop until a line is queued or the window closes, without polling
                 while not self.input_queue and not self.execution_cancelled:
                     try:
-                        self.root.update()
-                    except:
-                        self.waiting_for_input = False
-                        self.console.config(state=tk.DISABLED)
+                        self.root.wait_variable(self.input_signal)
+                    except tk.TclError:
                         self.execution_cancelled = True
-                        raise KeyboardInterrupt("Execution cancelled")
                 
                 if self.execution_cancelled:
+                    self.waiting_for_input = False
                     raise KeyboardInterrupt("Execution cancelled")
                 
                 return self.input_queue.pop(0)
             
-            symbol_table = interpret(ast, gui_print, gui_input)
+            # the console is only redrawn while the program waits for input, so VISIBLE output is collected
+            # into blocks (flushed at every GIMMEH and at the end) instead of one insert per line
+            output = CallbackSink(gui_print, buffering=BLOCK)
+            memo = Memo() # keeps the values of pure functions, reported below
+            symbol_table = interpret(ast, output, gui_input, memo=memo)
             self.update_symbols(symbol_table)
             
             self.update_console(
@@ -663,6 +701,8 @@ class LOLCodeInterpreterGUI:
                 f"Total tokens: {len(self.tokens)}\n"
                 f"Variables declared: {len(symbol_table)}"
             )
+            if memo.hits or memo.misses:
+                self.update_console(memo.report())
         except LOLSyntaxError as e:
             self.update_console(f"SYNTAX ERROR:\n{str(e)}")
         except KeyboardInterrupt:
@@ -689,7 +729,7 @@ class LOLCodeInterpreterGUI:
         
         filtered = [t for t in self.tokens if t[1] != TokenType.LINEBREAK]
         
-        for i, (lexeme, token_type, _) in enumerate(filtered):
+        for i, (lexeme, token_type, _, _) in enumerate(filtered):
             desc = TOKEN_DESCRIPTIONS.get(token_type, token_type.value)
             tag = "evenrow" if i % 2 == 0 else "oddrow"
             self.lexemes_tree.insert("", tk.END, values=(lexeme, desc), tags=(tag,))
@@ -801,7 +841,8 @@ class LOLCodeInterpreterGUI:
                 'content': content,
                 'widget': text_editor,
                 'original': content,
-                'button': None
+                'button': None,
+                'lexer': IncrementalLexer() # keeps per-line tokens between runs
             }
             
             # create tab button
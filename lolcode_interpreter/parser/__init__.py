@@ -1,3 +1,5 @@
-from .parser import Parser, SyntaxError, parse_tokens
+from .parser import Parser, SyntaxError, parse_tokens, parse_file
+from .cache import parse_file_cached, parse_source_cached, load_cached, store_cached
 
-__all__ = ['Parser', 'SyntaxError', 'parse_tokens']
\ No newline at end of file
+__all__ = ['Parser', 'SyntaxError', 'parse_tokens', 'parse_file',
+           'parse_file_cached', 'parse_source_cached', 'load_cached', 'store_cached']
\ No newline at end of file
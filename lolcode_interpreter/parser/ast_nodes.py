@@ -2,137 +2,217 @@ from lexer.lol_tokens import TokenType
 
 
 class ASTNode: #base class for all AST nodes
-    pass
+    #nodes use __slots__ instead of a per-instance __dict__, a large program creates millions of them
+    #span is the (line, col) of the node's first token; it is kept as two slots rather than a tuple per node,
+    #line is the token's own int (shared by every token of the line) and col is nearly always a cached small int;
+    #statements, operands and arguments are tuples, which take less memory than lists and never change after parsing
+    __slots__ = ('line', 'col')
+
+    def __init__(self, span=None):
+        self.span = span
+
+    @property
+    def span(self):
+        return None if self.line is None else (self.line, self.col)
+
+    @span.setter
+    def span(self, span):
+        self.line, self.col = (None, None) if span is None else span
 
 
 class ProgramNode(ASTNode): #represents entire lolcode program
-    def __init__(self, version=None): #initializes program with optional version number
+    __slots__ = ('version', 'statements')
+
+    def __init__(self, version=None, span=None): #initializes program with optional version number
+        self.span = span
         self.version = version
-        self.statements = []
+        self.statements = ()
 
 
 class VariableDeclNode(ASTNode): #represents variable declaration
-    def __init__(self, var_name, initial_value=None): #stores variable name and optional initial value
+    __slots__ = ('var_name', 'initial_value')
+
+    def __init__(self, var_name, initial_value=None, span=None): #stores variable name and optional initial value
+        self.span = span
         self.var_name = var_name
         self.initial_value = initial_value
 
 
 class AssignmentNode(ASTNode): #represents variable assignment
-    def __init__(self, var_name, expression): #stores target variable and value expression
+    __slots__ = ('var_name', 'expression')
+
+    def __init__(self, var_name, expression, span=None): #stores target variable and value expression
+        self.span = span
         self.var_name = var_name
         self.expression = expression
 
 
 class VisibleNode(ASTNode): #represents output statement
-    def __init__(self, expressions): #stores list of expressions to output
-        self.expressions = expressions
+    __slots__ = ('expressions',)
+
+    def __init__(self, expressions, span=None): #stores expressions to output, as a tuple (smaller than a list)
+        self.span = span
+        self.expressions = tuple(expressions)
 
 
 class GimmehNode(ASTNode): #represents input statement
-    def __init__(self, var_name): #stores variable name to receive input
+    __slots__ = ('var_name',)
+
+    def __init__(self, var_name, span=None): #stores variable name to receive input
+        self.span = span
         self.var_name = var_name
 
 
 class LiteralNode(ASTNode): #represents literal values
-    def __init__(self, value, literal_type): #stores literal value and its type
+    __slots__ = ('value', 'literal_type')
+
+    def __init__(self, value, literal_type, span=None): #stores literal value and its type
+        self.span = span
         self.value = value
         self.literal_type = literal_type
 
 
 class VariableNode(ASTNode): #represents variable reference
-    def __init__(self, var_name): #stores variable name being referenced
+    __slots__ = ('var_name',)
+
+    def __init__(self, var_name, span=None): #stores variable name being referenced
+        self.span = span
         self.var_name = var_name
 
 
 class BinaryOpNode(ASTNode): #represents binary arithmetic or boolean operation
-    def __init__(self, operator, left, right): #initializes node with operator and two operands
+    __slots__ = ('operator', 'left', 'right')
+
+    def __init__(self, operator, left, right, span=None): #initializes node with operator and two operands
+        self.span = span
         self.operator = operator
         self.left = left
         self.right = right
 
 
 class UnaryOpNode(ASTNode): #represents unary operation
-    def __init__(self, operator, operand): #stores operator and single operand
+    __slots__ = ('operator', 'operand')
+
+    def __init__(self, operator, operand, span=None): #stores operator and single operand
+        self.span = span
         self.operator = operator
         self.operand = operand
 
 
 class InfiniteArityOpNode(ASTNode): #represents operations with unlimited operands
-    def __init__(self, operator, operands): #stores operator and list of operands
+    __slots__ = ('operator', 'operands')
+
+    def __init__(self, operator, operands, span=None): #stores operator and tuple of operands
+        self.span = span
         self.operator = operator
-        self.operands = operands
+        self.operands = tuple(operands)
 
 
 class ComparisonNode(ASTNode): #represents comparison operation
-    def __init__(self, operator, left, right): #stores comparison operator and operands
+    __slots__ = ('operator', 'left', 'right')
+
+    def __init__(self, operator, left, right, span=None): #stores comparison operator and operands
+        self.span = span
         self.operator = operator
         self.left = left
         self.right = right
 
 
 class TypecastNode(ASTNode): #represents type casting operation
-    def __init__(self, expression, target_type): #stores expression to cast and target type
+    __slots__ = ('expression', 'target_type')
+
+    def __init__(self, expression, target_type, span=None): #stores expression to cast and target type
+        self.span = span
         self.expression = expression
         self.target_type = target_type
 
 class TypecastStatementNode(ASTNode):
-    def __init__(self, var_name, target_type):
+    __slots__ = ('var_name', 'target_type')
+
+    def __init__(self, var_name, target_type, span=None):
+        self.span = span
         self.var_name = var_name
         self.target_type = target_type   
 
 class ConditionalNode(ASTNode): #represents if-else conditional structure
-    def __init__(self): #initializes conditional with empty blocks
-        self.if_block = []
-        self.elif_blocks = []
-        self.else_block = []
+    __slots__ = ('if_block', 'elif_blocks', 'else_block')
+
+    def __init__(self, span=None): #initializes conditional with empty blocks
+        self.span = span
+        self.if_block = ()
+        self.elif_blocks = ()
+        self.else_block = ()
 
 
 class ElifClauseNode(ASTNode): #represents else-if clause
-    def __init__(self, condition): #stores condition expression and statements
+    __slots__ = ('condition', 'statements')
+
+    def __init__(self, condition, span=None): #stores condition expression and statements
+        self.span = span
         self.condition = condition
-        self.statements = []
+        self.statements = ()
 
 
 class SwitchNode(ASTNode): #represents switch-case structure
-    def __init__(self): #initializes switch with empty cases
-        self.cases = []
-        self.default_case = []
+    __slots__ = ('cases', 'default_case')
+
+    def __init__(self, span=None): #initializes switch with empty cases
+        self.span = span
+        self.cases = ()
+        self.default_case = ()
 
 
 class CaseNode(ASTNode): #represents single case in switch
-    def __init__(self, literal_value): #stores case value and statements
+    __slots__ = ('literal_value', 'statements')
+
+    def __init__(self, literal_value, span=None): #stores case value and statements
+        self.span = span
         self.literal_value = literal_value
-        self.statements = []
+        self.statements = ()
 
 
 class LoopNode(ASTNode): #represents loop structure
-    def __init__(self, label, operation, var_name): #initializes loop with label, operation type, and loop variable
+    __slots__ = ('label', 'operation', 'var_name', 'condition', 'condition_type', 'statements')
+
+    def __init__(self, label, operation, var_name, span=None): #initializes loop with label, operation type, and loop variable
+        self.span = span
         self.label = label
         self.operation = operation
         self.var_name = var_name
         self.condition = None
         self.condition_type = None
-        self.statements = []
+        self.statements = ()
 
 
 class FunctionDefNode(ASTNode): #represents function definition
-    def __init__(self, func_name, parameters): #stores function name, parameters, and body
+    __slots__ = ('func_name', 'parameters', 'statements')
+
+    def __init__(self, func_name, parameters, span=None): #stores function name, parameters, and body
+        self.span = span
         self.func_name = func_name
-        self.parameters = parameters
-        self.statements = []
+        self.parameters = tuple(parameters)
+        self.statements = ()
 
 
 class FunctionCallNode(ASTNode): #represents function call
-    def __init__(self, func_name, arguments): #stores function name and argument list
+    __slots__ = ('func_name', 'arguments')
+
+    def __init__(self, func_name, arguments, span=None): #stores function name and tuple of arguments
+        self.span = span
         self.func_name = func_name
-        self.arguments = arguments
+        self.arguments = tuple(arguments)
 
 
 class ReturnNode(ASTNode): #represents return statement
-    def __init__(self, expression): #stores return value expression
+    __slots__ = ('expression',)
+
+    def __init__(self, expression, span=None): #stores return value expression
+        self.span = span
         self.expression = expression
 
 
 class BreakNode(ASTNode): #represents break statement
-    def __init__(self): #initializes break node
-        pass
\ No newline at end of file
+    __slots__ = ()
+
+    def __init__(self, span=None): #initializes break node
+        self.span = span
\ No newline at end of file
@@ -0,0 +1,203 @@
+#on-disk cache of parsed programs, like __pycache__ for .pyc files
+#entries live in a per-user cache directory, never next to the .lol files, and an entry is only used when both
+#the source and the interpreter it was built by are exactly the ones in use now
+#an entry holds the tree as plain tuples and lists written with marshal, which cannot run code when it is read;
+#it is rebuilt into ast_nodes classes from a fixed table, so a planted file can at worst be a cache miss
+import gc
+import hashlib
+import marshal
+import os
+import struct
+
+from lexer.lol_tokens import TokenType
+from lexer.lexer import tokenize_program
+from parser.parser import Parser
+from parser import ast_nodes
+
+CACHE_SUFFIX = ".lolc"
+MAGIC = b"LOLC"
+FORMAT_VERSION = 2 #bump when the layout of a cache file changes
+HEADER = struct.Struct(">4sH32s") #magic, format version, sha256 of interpreter version + source
+
+#packages whose code decides what a cached program looks like
+FINGERPRINTED_PACKAGES = ("lexer", "parser")
+
+#every node class, an entry stores a node as [index in this tuple, line, col, field values...]
+NODE_CLASSES = tuple(sorted((cls for cls in vars(ast_nodes).values()
+                             if isinstance(cls, type) and issubclass(cls, ast_nodes.ASTNode)
+                             and cls is not ast_nodes.ASTNode), key=lambda cls: cls.__name__))
+
+#the values a node field may hold besides nodes, tuples and TokenTypes (stored as the bytes of their name)
+LEAF_TYPES = (str, int, float, bool, type(None))
+LEAF_TYPE_SET = frozenset(LEAF_TYPES)
+TOKEN_TYPES = {token_type.name.encode("ascii"): token_type for token_type in TokenType}
+
+
+def slot_names(cls):
+    #the slots of a node class, the ASTNode ones (line, col) first
+    return [name for base in reversed(cls.__mro__) for name in getattr(base, "__slots__", ())]
+
+
+#per node class: its slot names, and the slot setters used to rebuild a node without calling __init__
+NODE_SLOTS = {cls: slot_names(cls) for cls in NODE_CLASSES}
+NODE_TAGS = {cls: tag for tag, cls in enumerate(NODE_CLASSES)}
+NODE_SETTERS = [(cls, [getattr(cls, name).__set__ for name in NODE_SLOTS[cls]]) for cls in NODE_CLASSES]
+
+
+def cache_dir():
+    #the per-user directory entries go to: $LOLCODE_CACHE_DIR if it is set, otherwise lolcode/ in the
+    #platform's user cache directory (%LOCALAPPDATA% on Windows, $XDG_CACHE_HOME or ~/.cache elsewhere)
+    directory = os.environ.get("LOLCODE_CACHE_DIR")
+    if directory:
+        return directory
+    if os.name == "nt":
+        base = os.environ.get("LOCALAPPDATA") or os.path.join(os.path.expanduser("~"), "AppData", "Local")
+    else:
+        base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "lolcode")
+
+
+def entry_name(filename):
+    #<name>-<hash of the absolute path>, so files of the same name in different folders get their own entries
+    path = os.path.abspath(filename)
+    return f"{os.path.basename(path)}-{hashlib.sha256(path.encode('utf-8')).hexdigest()[:16]}"
+
+
+def interpreter_version(packages=FINGERPRINTED_PACKAGES):
+    #hash of the sources of packages (the lexer and parser by default), so editing any of them
+    #invalidates every cache entry
+    digest = hashlib.sha256()
+    interpreter_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    for package in packages:
+        package_dir = os.path.join(interpreter_dir, package)
+        for name in sorted(os.listdir(package_dir)):
+            if name.endswith(".py"):
+                digest.update(name.encode("utf-8"))
+                with open(os.path.join(package_dir, name), "rb") as f:
+                    digest.update(f.read())
+    return digest.hexdigest()
+
+
+INTERPRETER_VERSION = interpreter_version()
+
+
+def cache_key(source_code, optimized=False):
+    #an optimized tree (semantics.optimize) has its own key, it is never handed out for the plain one
+    digest = hashlib.sha256(INTERPRETER_VERSION.encode("ascii"))
+    digest.update(b"optimized\n" if optimized else b"parsed\n")
+    digest.update(source_code.encode("utf-8"))
+    return digest.digest()
+
+
+def cache_path(filename, optimized=False):
+    #<cache dir>/<entry name>.lolc, optimized trees go to <entry name>.opt-1.lolc like python -O
+    suffix = ".opt-1" + CACHE_SUFFIX if optimized else CACHE_SUFFIX
+    return os.path.join(cache_dir(), entry_name(filename) + suffix)
+
+
+def encode(value):
+    #a node as a list of its tag and field values, tuples element by element; raises TypeError for a value
+    #the format has no room for (the entry is then not written)
+    kind = type(value)
+    if kind in LEAF_TYPE_SET:
+        return value
+    if kind is tuple:
+        return tuple([encode(item) for item in value])
+    if kind is TokenType:
+        return value.name.encode("ascii")
+    tag = NODE_TAGS.get(kind)
+    if tag is None:
+        raise TypeError(f"cannot cache a {kind.__name__}")
+    return [tag] + [encode(getattr(value, name)) for name in NODE_SLOTS[kind]]
+
+
+def decode(value):
+    #the inverse of encode; anything encode cannot have written raises ValueError, KeyError or IndexError
+    kind = type(value)
+    if kind in LEAF_TYPE_SET:
+        return value
+    if kind is list:
+        cls, setters = NODE_SETTERS[value[0]]
+        if len(value) != len(setters) + 1:
+            raise ValueError("wrong number of fields")
+        node = cls.__new__(cls)
+        for setter, field in zip(setters, value[1:]):
+            setter(node, field if type(field) in LEAF_TYPE_SET else decode(field))
+        return node
+    if kind is tuple:
+        return tuple([decode(item) for item in value])
+    if kind is bytes:
+        return TOKEN_TYPES[value]
+    raise ValueError(f"unexpected {kind.__name__} in a cache entry")
+
+
+def load_cached(filename, source_code, optimized=False):
+    #returns the cached program for this exact source, or None if there is no usable entry;
+    #optimized asks for the entry store_cached wrote with optimized=True
+    try:
+        with open(cache_path(filename, optimized), "rb") as f:
+            data = f.read()
+    except OSError:
+        return None
+
+    if len(data) < HEADER.size:
+        return None
+    magic, version, key = HEADER.unpack_from(data)
+    if magic != MAGIC or version != FORMAT_VERSION or key != cache_key(source_code, optimized):
+        return None
+
+    #decoding allocates one object per node and the tree has no cycles, so the cyclic garbage
+    #collector would only rescan it over and over while it is being built
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        program = decode(marshal.loads(data[HEADER.size:]))
+    except (EOFError, ValueError, TypeError, KeyError, IndexError, RecursionError):
+        #a truncated, broken or planted entry is just a miss, it gets rewritten
+        return None
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+    return program if type(program) is ast_nodes.ProgramNode else None
+
+
+def store_cached(filename, source_code, program, optimized=False):
+    #writes the entry atomically; like __pycache__, failing to write (read-only dir, tree too deep
+    #to encode) only means the next run parses again
+    #pass optimized=True for a tree semantics.optimize rewrote, it is kept apart from the parsed one
+    path = cache_path(filename, optimized)
+    try:
+        payload = marshal.dumps(encode(program))
+    except (TypeError, ValueError, RecursionError):
+        return False
+
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        os.makedirs(os.path.dirname(path), mode=0o700, exist_ok=True)
+        with open(temp_path, "wb") as f:
+            f.write(HEADER.pack(MAGIC, FORMAT_VERSION, cache_key(source_code, optimized)))
+            f.write(payload)
+        os.replace(temp_path, path)
+    except OSError:
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+        return False
+    return True
+
+
+def parse_source_cached(source_code, filename, backend=None):
+    #parses source_code that belongs to filename, going through the cache of that file
+    program = load_cached(filename, source_code)
+    if program is None:
+        program = Parser(tokenize_program(source_code, backend)).parse()
+        store_cached(filename, source_code, program)
+    return program
+
+
+def parse_file_cached(filename, backend=None):
+    #parse_file with a cache: reads the .lol file and only lexes and parses it if its entry is stale
+    with open(filename, "r", encoding="utf-8") as f:
+        source_code = f.read()
+    return parse_source_cached(source_code, filename, backend)
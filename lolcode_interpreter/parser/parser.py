@@ -1,33 +1,99 @@
+from collections import deque
+
 from lexer.lol_tokens import TokenType
+from lexer.lexer import iter_file_tokens
 from parser.ast_nodes import *
 
 
 class SyntaxError(Exception): #custom error handling with line number tracking
     pass
 
+
+#token types that are a complete literal expression on their own
+LITERAL_TYPES = frozenset((TokenType.NUMBR, TokenType.NUMBAR, TokenType.YARN,
+                           TokenType.TROOF, TokenType.NOOB))
+
+#token types that can begin an expression
+EXPRESSION_START_TYPES = frozenset((
+    #literal values
+    TokenType.NUMBR, TokenType.NUMBAR, TokenType.YARN,
+    TokenType.TROOF, TokenType.NOOB,
+    #variable references
+    TokenType.VARIDENT,
+    #math operators
+    TokenType.SUM_OF, TokenType.DIFF_OF, TokenType.PRODUKT_OF,
+    TokenType.QUOSHUNT_OF, TokenType.MOD_OF,
+    TokenType.BIGGR_OF, TokenType.SMALLR_OF,
+    #boolean operators
+    TokenType.BOTH_OF, TokenType.EITHER_OF, TokenType.WON_OF,
+    TokenType.NOT, TokenType.ALL_OF, TokenType.ANY_OF,
+    #comparison operators
+    TokenType.BOTH_SAEM, TokenType.DIFFRINT,
+    #string concatenation
+    TokenType.SMOOSH,
+    #type casting
+    TokenType.MAEK,
+    #function calls
+    TokenType.I_IZ,
+    #string delimiters
+    TokenType.STRING_DELIM,
+))
+
+#two-operand operators: node class built and the error message when AN is missing between the operands
+BINARY_OPERATORS = {
+    #math operations
+    TokenType.SUM_OF: (BinaryOpNode, "Binary operator requires AN between operands"),
+    TokenType.DIFF_OF: (BinaryOpNode, "Binary operator requires AN between operands"),
+    TokenType.PRODUKT_OF: (BinaryOpNode, "Binary operator requires AN between operands"),
+    TokenType.QUOSHUNT_OF: (BinaryOpNode, "Binary operator requires AN between operands"),
+    TokenType.MOD_OF: (BinaryOpNode, "Binary operator requires AN between operands"),
+    TokenType.BIGGR_OF: (BinaryOpNode, "Binary operator requires AN between operands"),
+    TokenType.SMALLR_OF: (BinaryOpNode, "Binary operator requires AN between operands"),
+    #binary boolean operations
+    TokenType.BOTH_OF: (BinaryOpNode, "Binary operator requires AN between operands"),
+    TokenType.EITHER_OF: (BinaryOpNode, "Binary operator requires AN between operands"),
+    TokenType.WON_OF: (BinaryOpNode, "Binary operator requires AN between operands"),
+    #comparison operations
+    TokenType.BOTH_SAEM: (ComparisonNode, "Comparison operator requires AN between operands"),
+    TokenType.DIFFRINT: (ComparisonNode, "Comparison operator requires AN between operands"),
+}
+
 class Parser: #uses recursive descent
     
-    def __init__(self, tokens): #initializes parser with the token list in lol_tokens
-        #filters out linebreaks for easier parsing
-        self.tokens = tokens
+    def __init__(self, tokens): #initializes parser with a token list or any token iterable (e.g. lexer.iter_tokens)
+        #tokens are pulled one at a time, only the ones peeked at are buffered
+        self.token_stream = iter(tokens)
+        self.lookahead = deque() #tokens read from the stream but not reached yet
         self.pos = 0
-        self.current_token = self.tokens[0] if self.tokens else None
+        self.current_token = next(self.token_stream, None)
+    
+    def span(self):
+        #(line, col) span of the current token for the node that starts at it
+        if self.current_token is None:
+            return None
+        return self.current_token[2:4]
     
     def peek(self, offset=0):
         #preview future tokens without advancing position for grammar decisions based on upcoming tokens
         #i.e., check if next token is 'else' after 'if', or look for operators after identifiers
-        idx = self.pos + offset
-        if idx < len(self.tokens):
-            return self.tokens[idx]
-        return None
+        if offset == 0:
+            return self.current_token
+        while len(self.lookahead) < offset:
+            token = next(self.token_stream, None)
+            if token is None:
+                return None
+            self.lookahead.append(token)
+        return self.lookahead[offset - 1]
     
     def advance(self):
         #goes to the next token
-        if self.pos < len(self.tokens) - 1:
-            self.pos += 1
-            self.current_token = self.tokens[self.pos]
+        if self.current_token is None:
+            return None
+        self.pos += 1
+        if self.lookahead:
+            self.current_token = self.lookahead.popleft()
         else:
-            self.current_token = None
+            self.current_token = next(self.token_stream, None)
         return self.current_token
     
     def expect(self, token_type, error_msg=None):
@@ -56,7 +122,7 @@ class Parser: #uses recursive descent
 
     def parse(self):
         #main parsing entry point, validates entire program structure from tokens
-        if not self.tokens:
+        if self.current_token is None and self.pos == 0:
             raise SyntaxError("Empty program. LOLCode programs must start with HAI.")
         
         program_node = self.parse_program() #constructs ast for entire program
@@ -73,9 +139,10 @@ class Parser: #uses recursive descent
 
     def parse_program(self):
         #parses required program structure: HAI [version] [body] KTHXBYE
+        span = self.span()
         self.expect(TokenType.HAI, "Program must start with HAI")
         
-        program_node = ProgramNode() #creates root ast node
+        program_node = ProgramNode(span=span) #creates root ast node
         
         #optional version number after HAI (may be omitted)
         if self.match(TokenType.NUMBAR):
@@ -85,7 +152,7 @@ class Parser: #uses recursive descent
         
         #parses the main body content
         statements = self.parse_main_body() #gets list of statement nodes
-        program_node.statements = statements #stores statements in program node
+        program_node.statements = tuple(statements) #stores statements in program node
         
         #program must end with KTHXBYE
         self.expect(TokenType.KTHXBYE, "Program must end with KTHXBYE")
@@ -138,6 +205,7 @@ class Parser: #uses recursive descent
 
     def parse_variable_declaration(self):
         #parses variable declarations: I HAS A <variable> [ITZ <initial value>]
+        span = self.span()
         self.expect(TokenType.I_HAS_A)
         
         #requires a variable identifier after I HAS A
@@ -157,82 +225,49 @@ class Parser: #uses recursive descent
             self.advance()  #moves past ITZ
             initial_value = self.parse_expression() #gets initial value expression node
         
-        return VariableDeclNode(var_name, initial_value) #returns declaration node
+        return VariableDeclNode(var_name, initial_value, span) #returns declaration node
 
     def parse_statement(self):
         #parses one statement: output, input, assignment, conditionals, loops, functions, etc.
-        #has separate functions for each type
+        #has separate functions for each type, picked from STATEMENT_PARSERS by the first token
         if not self.current_token:
             return None
         
-        token_type = self.current_token[1]
-        line_num = self.current_token[2]
-
-        if token_type == TokenType.LINEBREAK:
-            self.advance()
-            return None
-        
-        # FOR OIC PLSSS WORKK
-        if token_type == TokenType.OIC:
-            line_num = self.current_token[2]
-            raise SyntaxError(
-                f"Unexpected OIC on line {line_num}. "
-                f"OIC must close an O RLY? or WTF? block."
-            )
-        
-        #VISIBLE - output statement
-        if token_type == TokenType.VISIBLE:
-            return self.parse_visible_statement() #returns visible node
-        
-        #GIMMEH - input statement  
-        elif token_type == TokenType.GIMMEH:
-            return self.parse_gimmeh_statement() #returns gimmeh node
-        
-        #Assignment: <variable> R <expression>
-        elif token_type == TokenType.VARIDENT:
-            return self.parse_assignment_or_expression() #returns assignment or variable node
-        
-        #O RLY? - if/else conditional
-        elif token_type == TokenType.O_RLY:
-            return self.parse_conditional() #returns conditional node
-        
-        #WTF? - switch/case statement
-        elif token_type == TokenType.WTF:
-            return self.parse_switch() #returns switch node
-        
-        #IM IN YR - loop construct
-        elif token_type == TokenType.IM_IN_YR:
-            return self.parse_loop() #returns loop node
-        
-        #HOW IZ I - function definition
-        elif token_type == TokenType.HOW_IZ_I:
-            return self.parse_function_definition() #returns function definition node
-        
-        #I IZ - function call
-        elif token_type == TokenType.I_IZ:
-            return self.parse_function_call() #returns function call node
-        
-        #FOUND YR - return from function
-        elif token_type == TokenType.FOUND_YR:
-            return self.parse_return_statement() #returns return node
-        
-        #GTFO - break out of loop or switch
-        elif token_type == TokenType.GTFO:
-            self.advance()  #moves past GTFO token
-            return BreakNode() #returns break node
+        parse_method = self.STATEMENT_PARSERS.get(self.current_token[1])
+        if parse_method is not None:
+            return parse_method(self)
         
         #expression that evaluates to IT variable
-        elif self.is_expression_start():
+        if self.current_token[1] in EXPRESSION_START_TYPES:
             return self.parse_expression() #returns expression node
         
-        else:
-            raise SyntaxError(
-                f"Unexpected statement starting with '{self.current_token[0]}' "
-                f"on line {line_num}"
-            )
+        raise SyntaxError(
+            f"Unexpected statement starting with '{self.current_token[0]}' "
+            f"on line {self.current_token[2]}"
+        )
+
+    def skip_linebreak(self):
+        #empty statement, just moves past the line break
+        self.advance()
+        return None
+
+    def reject_oic(self):
+        # FOR OIC PLSSS WORKK
+        line_num = self.current_token[2]
+        raise SyntaxError(
+            f"Unexpected OIC on line {line_num}. "
+            f"OIC must close an O RLY? or WTF? block."
+        )
+
+    def parse_break_statement(self):
+        #GTFO - break out of loop or switch
+        span = self.span()
+        self.advance()  #moves past GTFO token
+        return BreakNode(span) #returns break node
 
     def parse_visible_statement(self):
         #parses VISIBLE statement: output one or more expressions separated by spaces or +
+        span = self.span()
         self.expect(TokenType.VISIBLE)
     
         #requires at least one expression
@@ -264,16 +299,18 @@ class Parser: #uses recursive descent
         if self.current_token and self.current_token[1] == TokenType.LINEBREAK:
             self.advance()
     
-        return VisibleNode(expressions) #returns visible node with expressions
+        return VisibleNode(expressions, span) #returns visible node with expressions
 
     def parse_gimmeh_statement(self):
         #parses GIMMEH statement: read input into a variable
+        span = self.span()
         self.expect(TokenType.GIMMEH)
         var_token = self.expect(TokenType.VARIDENT, "GIMMEH requires a variable identifier")
-        return GimmehNode(var_token[0]) #returns gimmeh node with variable name
+        return GimmehNode(var_token[0], span) #returns gimmeh node with variable name
 
     def parse_assignment_or_expression(self):
         #parses either variable assignment (<var> R <expr>) or variable reference as expression
+        span = self.span()
         var_token = self.current_token
         var_name = var_token[0] #stores variable name
         self.advance()  #moves past variable name
@@ -282,23 +319,33 @@ class Parser: #uses recursive descent
             #this is an assignment: variable R expression
             self.advance()  #moves past R token
             expr = self.parse_expression() #gets expression node
-            return AssignmentNode(var_name, expr) #returns assignment node
+            return AssignmentNode(var_name, expr, span) #returns assignment node
         elif self.match(TokenType.IS_NOW_A):
             self.advance()
             if not self.match(TokenType.TYPE_NUMBR, TokenType.TYPE_NUMBAR, TokenType.TYPE_YARN, TokenType.TYPE_TROOF, TokenType.TYPE_NOOB):
                 raise SyntaxError("Expected type keyword after IS NOW A")
             target_type = self.current_token[0]
             self.advance()
-            return TypecastStatementNode(var_name, target_type)
+            return TypecastStatementNode(var_name, target_type, span)
         else:
             #if no R token, this is just a variable reference (valid as standalone expression)
-            return VariableNode(var_name) #returns variable reference node
+            return VariableNode(var_name, span) #returns variable reference node
+
+    def parse_block(self, *end_types):
+        #parses statements until one of end_types (or the end of the tokens), returns them as a tuple
+        statements = []
+        while self.current_token and not self.match(*end_types):
+            stmt = self.parse_statement() #gets statement node
+            if stmt:
+                statements.append(stmt)
+        return tuple(statements)
 
     def parse_conditional(self):
         #parses if/else conditional: O RLY? → YA RLY [MEBBE] [NO WAI] → OIC
+        span = self.span()
         self.expect(TokenType.O_RLY)
         
-        conditional_node = ConditionalNode() #creates conditional node
+        conditional_node = ConditionalNode(span) #creates conditional node
 
         if self.match(TokenType.LINEBREAK):
                 self.advance()
@@ -307,35 +354,29 @@ class Parser: #uses recursive descent
         self.expect(TokenType.YA_RLY, "O RLY? must be followed by YA RLY")
         
         #parses statements until MEBBE (else if), NO WAI (else), or OIC (end)
-        while self.current_token and not self.match(TokenType.MEBBE, TokenType.NO_WAI, TokenType.OIC):
-            stmt = self.parse_statement() #gets statement node
-            if stmt:
-                conditional_node.if_block.append(stmt) #adds to if block
+        conditional_node.if_block = self.parse_block(TokenType.MEBBE, TokenType.NO_WAI, TokenType.OIC)
         
         #parse any else-if (MEBBE) blocks
+        elif_blocks = []
         while self.match(TokenType.MEBBE):
+            elif_span = self.span()
             self.advance()  #moves MEBBE
             condition = self.parse_expression()  #parse the condition
             
-            elif_clause = ElifClauseNode(condition) #creates elif clause node
+            elif_clause = ElifClauseNode(condition, elif_span) #creates elif clause node
             
             #parses else-if block statements until next MEBBE, NO WAI, or OIC
-            while self.current_token and not self.match(TokenType.MEBBE, TokenType.NO_WAI, TokenType.OIC):
-                stmt = self.parse_statement() #gets statement node
-                if stmt:
-                    elif_clause.statements.append(stmt) #adds to elif block
+            elif_clause.statements = self.parse_block(TokenType.MEBBE, TokenType.NO_WAI, TokenType.OIC)
             
-            conditional_node.elif_blocks.append(elif_clause) #adds elif clause to conditional
+            elif_blocks.append(elif_clause) #adds elif clause to conditional
+        conditional_node.elif_blocks = tuple(elif_blocks)
         
         #parses else (NO WAI) block if present
         if self.match(TokenType.NO_WAI):
             self.advance()  #moves past NO WAI
             
             #parses else block statements until OIC
-            while self.current_token and not self.match(TokenType.OIC):
-                stmt = self.parse_statement() #gets statement node
-                if stmt:
-                    conditional_node.else_block.append(stmt) #adds to else block
+            conditional_node.else_block = self.parse_block(TokenType.OIC)
         
         #end of conditional
         self.expect(TokenType.OIC, "Conditional must end with OIC")
@@ -344,9 +385,10 @@ class Parser: #uses recursive descent
 
     def parse_switch(self):
         #parses switch statement: WTF? → OMG cases [OMGWTF default] → OIC
+        span = self.span()
         self.expect(TokenType.WTF)
         
-        switch_node = SwitchNode() #creates switch node
+        switch_node = SwitchNode(span) #creates switch node
 
         if self.match(TokenType.LINEBREAK):
                 self.advance()
@@ -357,7 +399,9 @@ class Parser: #uses recursive descent
             raise SyntaxError(f"WTF? must be followed by at least one OMG case on line {line_num}")
         
         #parse all cases
+        cases = []
         while self.match(TokenType.OMG):
+            case_span = self.span()
             self.advance()  #moves past OMG
             
             #case value must be a literal (number, string, boolean, or null)
@@ -368,25 +412,20 @@ class Parser: #uses recursive descent
             literal_value = self.current_token[0] #stores case value
             self.advance()  #moves past the literal value
             
-            case_node = CaseNode(literal_value) #creates case node
+            case_node = CaseNode(literal_value, case_span) #creates case node
             
             #parses case body statements until next OMG, OMGWTF, or OIC
-            while self.current_token and not self.match(TokenType.OMG, TokenType.OMGWTF, TokenType.OIC):
-                stmt = self.parse_statement() #gets statement node
-                if stmt:
-                    case_node.statements.append(stmt) #adds to case block
+            case_node.statements = self.parse_block(TokenType.OMG, TokenType.OMGWTF, TokenType.OIC)
             
-            switch_node.cases.append(case_node) #adds case to switch
+            cases.append(case_node) #adds case to switch
+        switch_node.cases = tuple(cases)
         
         #parses default case (OMGWTF) if present
         if self.match(TokenType.OMGWTF):
             self.advance()  #moves past OMGWTF
             
             #parses default case statements until OIC
-            while self.current_token and not self.match(TokenType.OIC):
-                stmt = self.parse_statement() #gets statement node
-                if stmt:
-                    switch_node.default_case.append(stmt) #adds to default case
+            switch_node.default_case = self.parse_block(TokenType.OIC)
         
         #end of switch statement
         self.expect(TokenType.OIC, "Switch statement must end with OIC")
@@ -395,6 +434,7 @@ class Parser: #uses recursive descent
 
     def parse_loop(self):
         #parses loop: IM IN YR label → UPPIN/NERFIN → YR variable → [TIL/WILE condition] → body → IM OUTTA YR label
+        span = self.span()
         self.expect(TokenType.IM_IN_YR)
         
         #gets loop label name
@@ -420,7 +460,7 @@ class Parser: #uses recursive descent
         var_token = self.expect(TokenType.VARIDENT, "Expected variable identifier after YR")
         var_name = var_token[0] #stores variable name
         
-        loop_node = LoopNode(label_name, operation, var_name) #creates loop node
+        loop_node = LoopNode(label_name, operation, var_name, span) #creates loop node
         
         #optional loop condition (TIL = until, WILE = while)
         if self.match(TokenType.TIL, TokenType.WILE):
@@ -431,10 +471,7 @@ class Parser: #uses recursive descent
             loop_node.condition_type = condition_type #stores til or wile
         
         #parses loop body statements until IM OUTTA YR
-        while self.current_token and not self.match(TokenType.IM_OUTTA_YR):
-            stmt = self.parse_statement() #gets statement node
-            if stmt:
-                loop_node.statements.append(stmt) #adds to loop body
+        loop_node.statements = self.parse_block(TokenType.IM_OUTTA_YR)
         
         #verifies loop ends with matching label
         self.expect(TokenType.IM_OUTTA_YR, "Loop must end with IM OUTTA YR")
@@ -454,6 +491,7 @@ class Parser: #uses recursive descent
 
     def parse_function_definition(self):
         #parses function definition: HOW IZ I function_name [YR parameters] → statements → IF U SAY SO
+        span = self.span()
         self.expect(TokenType.HOW_IZ_I)
         
         #gets function name
@@ -470,13 +508,10 @@ class Parser: #uses recursive descent
         if self.match(TokenType.YR):
             parameters = self.parse_parameter_list() #gets list of parameter names
         
-        func_node = FunctionDefNode(func_name, parameters) #creates function definition node
+        func_node = FunctionDefNode(func_name, parameters, span) #creates function definition node
         
         #parses function body statements until IF U SAY SO
-        while self.current_token and not self.match(TokenType.IF_U_SAY_SO):
-            stmt = self.parse_statement() #gets statement node
-            if stmt:
-                func_node.statements.append(stmt) #adds to function body
+        func_node.statements = self.parse_block(TokenType.IF_U_SAY_SO)
         
         #ends function definition
         self.expect(TokenType.IF_U_SAY_SO, "Function must end with IF U SAY SO")
@@ -500,15 +535,8 @@ class Parser: #uses recursive descent
 
     def parse_function_call(self):
         #parses function call: I IZ function_name [YR arguments] MKAY
-        self.expect(TokenType.I_IZ)
-        
-        #gets function name to call
-        if not self.match(TokenType.FUNCIDENT):
-            line_num = self.current_token[2] if self.current_token else "EOF"
-            raise SyntaxError(f"Expected function identifier after 'I IZ' on line {line_num}")
-        
-        func_name = self.current_token[0] #stores function name
-        self.advance()  #moves past function name
+        span = self.span()
+        func_name = self.parse_call_head() #gets function name
         
         arguments = [] #collects argument expressions
         
@@ -519,7 +547,20 @@ class Parser: #uses recursive descent
         #ends function call
         self.expect(TokenType.MKAY, "Function call must end with MKAY")
         
-        return FunctionCallNode(func_name, arguments) #returns function call node
+        return FunctionCallNode(func_name, arguments, span) #returns function call node
+
+    def parse_call_head(self):
+        #parses the I IZ function_name part of a function call, returns the function name
+        self.expect(TokenType.I_IZ)
+        
+        #gets function name to call
+        if not self.match(TokenType.FUNCIDENT):
+            line_num = self.current_token[2] if self.current_token else "EOF"
+            raise SyntaxError(f"Expected function identifier after 'I IZ' on line {line_num}")
+        
+        func_name = self.current_token[0] #stores function name
+        self.advance()  #moves past function name
+        return func_name
 
     def parse_argument_list(self):
         #parses function arguments: YR expression [AN YR expression ...]
@@ -538,164 +579,187 @@ class Parser: #uses recursive descent
 
     def parse_return_statement(self):
         #parses return statement: FOUND YR expression
+        span = self.span()
         self.expect(TokenType.FOUND_YR)
         expr = self.parse_expression()  #parses the return value expression
-        return ReturnNode(expr) #returns return node with expression
+        return ReturnNode(expr, span) #returns return node with expression
 
     def is_expression_start(self):
         #checks if current token can begin an expression (literals, variables, operators, etc.)
-        if not self.current_token:
-            return False
-        
-        return self.match(
-            #literal values
-            TokenType.NUMBR, TokenType.NUMBAR, TokenType.YARN,
-            TokenType.TROOF, TokenType.NOOB,
-            #variable references
-            TokenType.VARIDENT,
-            #math operators
-            TokenType.SUM_OF, TokenType.DIFF_OF, TokenType.PRODUKT_OF,
-            TokenType.QUOSHUNT_OF, TokenType.MOD_OF,
-            TokenType.BIGGR_OF, TokenType.SMALLR_OF,
-            #boolean operators
-            TokenType.BOTH_OF, TokenType.EITHER_OF, TokenType.WON_OF,
-            TokenType.NOT, TokenType.ALL_OF, TokenType.ANY_OF,
-            #comparison operators
-            TokenType.BOTH_SAEM, TokenType.DIFFRINT,
-            #string concatenation
-            TokenType.SMOOSH,
-            #type casting
-            TokenType.MAEK,
-            #function calls
-            TokenType.I_IZ,
-            #string delimiters
-            TokenType.STRING_DELIM
-        )
+        return self.current_token is not None and self.current_token[1] in EXPRESSION_START_TYPES
 
     def parse_expression(self):
         #parses expressions: literals, variables, operations, function calls, etc.
-        if not self.current_token:
-            raise SyntaxError("Unexpected end of file in expression")
-        
-        token_type = self.current_token[1]
-        
-        #simple literals: numbers, strings, booleans, null
-        if token_type in (TokenType.NUMBR, TokenType.NUMBAR, TokenType.YARN,
-                        TokenType.TROOF, TokenType.NOOB):
-            value = self.current_token[0] #stores literal value
-            self.advance()
-            return LiteralNode(value, token_type) #returns literal node
-        
-        #string with quotes: "content"
-        if token_type == TokenType.STRING_DELIM:
-            self.advance()  #moves past opening quote
-            string_parts = [] #collects string content
-            #parses string content (YARN tokens between quotes)
-            while self.current_token and self.current_token[1] != TokenType.STRING_DELIM:
-                if self.current_token[1] == TokenType.YARN:
-                    string_parts.append(self.current_token[0]) #adds content
-                    self.advance()
-                else:
-                    break
-            #ensures closing quote exists
-            if not self.match(TokenType.STRING_DELIM):
-                line_num = self.current_token[2] if self.current_token else "EOF"
-                raise SyntaxError(f"Unterminated string literal on line {line_num}")
-            self.advance()  #move past closing quote
-            string_value = ' '.join(string_parts) #combines string content
-            return LiteralNode(string_value, TokenType.YARN) #returns string literal node
-        
-        #variable reference
-        if token_type == TokenType.VARIDENT:
-            var_name = self.current_token[0] #stores variable name
-            self.advance()
-            return VariableNode(var_name) #returns variable node
-        
-        #math operations: SUM OF expr AN expr
-        if token_type in (TokenType.SUM_OF, TokenType.DIFF_OF, TokenType.PRODUKT_OF,
-                        TokenType.QUOSHUNT_OF, TokenType.MOD_OF,
-                        TokenType.BIGGR_OF, TokenType.SMALLR_OF):
-            operator = self.current_token[0] #stores operator
-            self.advance()  #moves past operator
-            left = self.parse_expression()  #parses first operand
-            self.expect(TokenType.AN, "Binary operator requires AN between operands")
-            right = self.parse_expression()  #parses second operand
-            return BinaryOpNode(operator, left, right) #returns binary operation node
-        
-        #binary boolean operations: BOTH OF expr AN expr
-        if token_type in (TokenType.BOTH_OF, TokenType.EITHER_OF, TokenType.WON_OF):
-            operator = self.current_token[0] #stores operator
-            self.advance()  #moves past operator
-            left = self.parse_expression()  #parses first operand
-            self.expect(TokenType.AN, "Binary operator requires AN between operands")
-            right = self.parse_expression()  #parses second operand
-            return BinaryOpNode(operator, left, right) #returns binary operation node
-        
-        #NOT operation: NOT expr
-        if token_type == TokenType.NOT:
-            operator = self.current_token[0] #stores operator
-            self.advance()  #moves past NOT
-            operand = self.parse_expression()  #parses operand
-            return UnaryOpNode(operator, operand) #returns unary operation node
-        
-        #multi-argument operations: ALL OF expr AN expr AN expr ... MKAY
-        if token_type in (TokenType.ALL_OF, TokenType.ANY_OF, TokenType.SMOOSH):
-            operator = self.current_token[0] #stores operator
-            self.advance()  #moves past operator
+        #operators are prefix, so instead of recursing per operand every operator whose operands are
+        #still being read sits on an explicit stack of frames; nesting depth is only limited by memory
+        #a frame is [kind, operator, operands, extra, span] where extra is the node class, the MKAY error
+        #message or the function name depending on the kind
+        stack = []
+        
+        while True:
+            if not self.current_token:
+                raise SyntaxError("Unexpected end of file in expression")
             
-            operands = [] #collects operands
+            token_type = self.current_token[1]
+            span = self.span()
             
-            #parses at least one operand
-            operands.append(self.parse_expression()) #adds first operand
-            
-            #parses additional operands separated by AN
-            while self.match(TokenType.AN):
-                self.advance()  #moves past AN
-                operands.append(self.parse_expression()) #adds operand
+            #simple literals: numbers, strings, booleans, null
+            if token_type in LITERAL_TYPES:
+                node = LiteralNode(self.current_token[0], token_type, span) #returns literal node
+                self.advance()
             
-            #ends multi-argument operation with MKAY
-            self.expect(TokenType.MKAY, f"{token_type.value} must end with MKAY")
-            return InfiniteArityOpNode(operator, operands) #returns infinite arity operation node
-        
-        #comparison operations: BOTH SAEM expr AN expr
-        if token_type in (TokenType.BOTH_SAEM, TokenType.DIFFRINT):
-            operator = self.current_token[0] #stores operator
-            self.advance()  #moves past operator
-            left = self.parse_expression()  #parses first operand
-            self.expect(TokenType.AN, "Comparison operator requires AN between operands")
-            right = self.parse_expression()  #parses second operand
-            return ComparisonNode(operator, left, right) #returns comparison node
-        
-        #type casting: MAEK expression [A] type_keyword
-        if token_type == TokenType.MAEK:
-            self.advance()  #moves past MAEK
-            expr = self.parse_expression()  #parses expression to cast
+            #string with quotes: "content"
+            elif token_type == TokenType.STRING_DELIM:
+                node = self.parse_string_literal()
             
-            #optional A keyword before type
-            if self.match(TokenType.A):
+            #variable reference
+            elif token_type == TokenType.VARIDENT:
+                node = VariableNode(self.current_token[0], span) #returns variable node
                 self.advance()
             
-            #requires type keyword (NUMBR, NUMBAR, YARN, TROOF, NOOB)
-            if not self.match(TokenType.TYPE_NUMBR, TokenType.TYPE_NUMBAR,
-                            TokenType.TYPE_YARN, TokenType.TYPE_TROOF, TokenType.TYPE_NOOB):
-                line_num = self.current_token[2] if self.current_token else "EOF"
-                raise SyntaxError(f"Expected type keyword after MAEK on line {line_num}")
+            #binary operations: SUM OF expr AN expr, BOTH OF expr AN expr, BOTH SAEM expr AN expr
+            elif token_type in BINARY_OPERATORS:
+                node_class, an_message = BINARY_OPERATORS[token_type]
+                stack.append(["binary", self.current_token[0], [], (node_class, an_message), span])
+                self.advance()  #moves past operator, the first operand comes next
+                continue
+            
+            #NOT operation: NOT expr
+            elif token_type == TokenType.NOT:
+                stack.append(["unary", self.current_token[0], None, None, span])
+                self.advance()  #moves past NOT
+                continue
+            
+            #multi-argument operations: ALL OF expr AN expr AN expr ... MKAY
+            elif token_type in (TokenType.ALL_OF, TokenType.ANY_OF, TokenType.SMOOSH):
+                stack.append(["variadic", self.current_token[0], [], f"{token_type.value} must end with MKAY", span])
+                self.advance()  #moves past operator
+                continue
+            
+            #type casting: MAEK expression [A] type_keyword
+            elif token_type == TokenType.MAEK:
+                stack.append(["maek", None, None, None, span])
+                self.advance()  #moves past MAEK
+                continue
             
-            target_type = self.current_token[0] #stores target type
-            self.advance()  #moves past type keyword
-            return TypecastNode(expr, target_type) #returns typecast node
+            #function call within expression: I IZ function_name [YR expr [AN YR expr ...]] MKAY
+            elif token_type == TokenType.I_IZ:
+                func_name = self.parse_call_head()
+                if self.match(TokenType.YR):
+                    stack.append(["call", None, [], func_name, span])
+                    self.advance()  #moves past YR, the first argument comes next
+                    continue
+                self.expect(TokenType.MKAY, "Function call must end with MKAY")
+                node = FunctionCallNode(func_name, [], span)
+            
+            #invalid expression start, prints error message
+            else:
+                line_num = self.current_token[2]
+                raise SyntaxError(
+                    f"Invalid expression starting with '{self.current_token[0]}' on line {line_num}"
+                )
+            
+            #node is a finished operand: hand it to the innermost open operator, closing every
+            #operator it completes, until one still needs another operand or the stack is empty
+            while stack:
+                frame = stack[-1]
+                kind = frame[0]
+                
+                if kind == "binary":
+                    operands = frame[2]
+                    operands.append(node)
+                    if len(operands) == 1:
+                        self.expect(TokenType.AN, frame[3][1])
+                        break
+                    node = frame[3][0](frame[1], operands[0], operands[1], frame[4]) #binary op or comparison node
+                
+                elif kind == "unary":
+                    node = UnaryOpNode(frame[1], node, frame[4]) #returns unary operation node
+                
+                elif kind == "variadic":
+                    frame[2].append(node)
+                    #parses additional operands separated by AN
+                    if self.match(TokenType.AN):
+                        self.advance()  #moves past AN
+                        break
+                    #ends multi-argument operation with MKAY
+                    self.expect(TokenType.MKAY, frame[3])
+                    node = InfiniteArityOpNode(frame[1], frame[2], frame[4]) #returns infinite arity operation node
+                
+                elif kind == "maek":
+                    node = self.finish_typecast(node, frame[4])
+                
+                else: #function call arguments
+                    frame[2].append(node)
+                    #parses additional arguments separated by AN YR
+                    if self.match(TokenType.AN):
+                        self.advance()  #moves past AN
+                        self.expect(TokenType.YR, "Expected YR after AN in argument list")
+                        break
+                    self.expect(TokenType.MKAY, "Function call must end with MKAY")
+                    node = FunctionCallNode(frame[3], frame[2], frame[4]) #returns function call node
+                
+                stack.pop()
+            else:
+                return node
+
+    def parse_string_literal(self):
+        #string with quotes: "content"
+        span = self.span()
+        self.advance()  #moves past opening quote
+        string_parts = [] #collects string content
+        #parses string content (YARN tokens between quotes)
+        while self.current_token and self.current_token[1] != TokenType.STRING_DELIM:
+            if self.current_token[1] == TokenType.YARN:
+                string_parts.append(self.current_token[0]) #adds content
+                self.advance()
+            else:
+                break
+        #ensures closing quote exists
+        if not self.match(TokenType.STRING_DELIM):
+            line_num = self.current_token[2] if self.current_token else "EOF"
+            raise SyntaxError(f"Unterminated string literal on line {line_num}")
+        self.advance()  #move past closing quote
+        string_value = ' '.join(string_parts) #combines string content
+        return LiteralNode(string_value, TokenType.YARN, span) #returns string literal node
+
+    def finish_typecast(self, expr, span=None):
+        #parses the rest of MAEK expression [A] type_keyword once the expression is parsed
+        #optional A keyword before type
+        if self.match(TokenType.A):
+            self.advance()
         
-        #function call within expression
-        if token_type == TokenType.I_IZ:
-            return self.parse_function_call() #returns function call node
+        #requires type keyword (NUMBR, NUMBAR, YARN, TROOF, NOOB)
+        if not self.match(TokenType.TYPE_NUMBR, TokenType.TYPE_NUMBAR,
+                        TokenType.TYPE_YARN, TokenType.TYPE_TROOF, TokenType.TYPE_NOOB):
+            line_num = self.current_token[2] if self.current_token else "EOF"
+            raise SyntaxError(f"Expected type keyword after MAEK on line {line_num}")
         
-        #invalid expression start, prints error message
-        line_num = self.current_token[2]
-        raise SyntaxError(
-            f"Invalid expression starting with '{self.current_token[0]}' on line {line_num}"
-        )
+        target_type = self.current_token[0] #stores target type
+        self.advance()  #moves past type keyword
+        return TypecastNode(expr, target_type, span) #returns typecast node
+
+#statement parsers keyed by the statement's first token type, built once when the module loads
+#so parse_statement picks one with a single dict lookup instead of an if/elif chain
+Parser.STATEMENT_PARSERS = {
+    TokenType.LINEBREAK: Parser.skip_linebreak,
+    TokenType.OIC: Parser.reject_oic,
+    TokenType.VISIBLE: Parser.parse_visible_statement, #VISIBLE - output statement
+    TokenType.GIMMEH: Parser.parse_gimmeh_statement, #GIMMEH - input statement
+    TokenType.VARIDENT: Parser.parse_assignment_or_expression, #Assignment: <variable> R <expression>
+    TokenType.O_RLY: Parser.parse_conditional, #O RLY? - if/else conditional
+    TokenType.WTF: Parser.parse_switch, #WTF? - switch/case statement
+    TokenType.IM_IN_YR: Parser.parse_loop, #IM IN YR - loop construct
+    TokenType.HOW_IZ_I: Parser.parse_function_definition, #HOW IZ I - function definition
+    TokenType.I_IZ: Parser.parse_function_call, #I IZ - function call
+    TokenType.FOUND_YR: Parser.parse_return_statement, #FOUND YR - return from function
+    TokenType.GTFO: Parser.parse_break_statement, #GTFO - break out of loop or switch
+}
 
 def parse_tokens(tokens): #function to simplify use in gui code
     parser = Parser(tokens)
     ast = parser.parse() #gets ast instead of just true
-    return ast #returns ast for potential use
\ No newline at end of file
+    return ast #returns ast for potential use
+
+def parse_file(filename, backend=None): #parses a .lol file while it is being lexed, without building the token list
+    return parse_tokens(iter_file_tokens(filename, backend))
\ No newline at end of file
@@ -1,4 +1,26 @@
 from .symbolizer import bool_convert, lol_to_num, lol_to_str, format_result, InterpreterRuntimeError, BreakNode, ReturnNode
 from .interpreter import interpret
+from .optimizer import optimize
+from .memoize import Memo
+from .output import OutputSink, CallbackSink, StreamSink, FileSink, CaptureSink
+from .inputs import InputProvider, ListInput, StreamInput, FileInput, QueueInput
+from .resolver import resolve
+from .closure_compiler import ClosureProgram, compile_program, interpret_compiled
+from .bytecode import compile_bytecode
+from .vm import interpret_vm, interpret_stack
+from .transpiler import transpile, compile_python, interpret_transpiled, TranspileError
+from .tiered import TieredInterpreter, interpret_tiered
 
-__all__ = ['bool_convert', 'interpret', 'lol_to_str', 'format_result', 'InterpreterRuntimeError', 'BreakNode', 'ReturnNode']
\ No newline at end of file
+#execution engines by name, all take (program node, gui_print, gui_input) and return the symbol table;
+#gui_print may be an output sink, every engine flushes it at each GIMMEH and when it returns;
+#optimize=True runs the AST optimizer (optimizer.py) on the program first
+ENGINES = {
+    'tree': interpret,
+    'closures': interpret_compiled,
+    'vm': interpret_vm,
+    'stack': interpret_stack,
+    'python': interpret_transpiled,
+    'tiered': interpret_tiered,
+}
+
+__all__ = ['bool_convert', 'interpret', 'optimize', 'Memo', 'OutputSink', 'CallbackSink', 'StreamSink', 'FileSink', 'CaptureSink', 'InputProvider', 'ListInput', 'StreamInput', 'FileInput', 'QueueInput', 'resolve', 'ClosureProgram', 'compile_program', 'interpret_compiled', 'compile_bytecode', 'interpret_vm', 'interpret_stack', 'transpile', 'compile_python', 'interpret_transpiled', 'TranspileError', 'TieredInterpreter', 'interpret_tiered', 'ENGINES', 'lol_to_str', 'format_result', 'InterpreterRuntimeError', 'BreakNode', 'ReturnNode']
\ No newline at end of file
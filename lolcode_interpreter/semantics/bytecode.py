@@ -0,0 +1,480 @@
+#compiles a ProgramNode to a linear instruction stream for the stack VM in vm.py
+#every instruction is two ints in an array('i'), the opcode and its argument, so a program is a few flat
+#buffers plus constant and name tables instead of a tree of nodes
+#variables are slots in a flat frame list, numbered per scope by resolver.py
+from array import array
+
+from parser.ast_nodes import *
+from semantics.symbolizer import lol_to_str, LITERAL_VALUES, TYPECASTS
+from semantics.resolver import resolve
+
+#opcodes, the argument each one takes is in the comment
+LOAD_CONST = 0 #constant index
+LOAD_NAME = 1 #slot, pushes the variable's value or NOOB if it is not declared
+STORE_NAME = 2 #slot
+POP_TOP = 3
+DUP_TOP = 4
+JUMP = 5 #target offset
+POP_JUMP_IF_FALSE = 6 #target offset, tests the TROOF value of the popped value
+POP_JUMP_IF_TRUE = 7 #target offset
+IS_DECLARED = 8 #slot, pushes whether the variable exists
+CHECK_DECLARED = 9 #slot, raises InterpreterRuntimeError if it does not
+ADD = 10
+SUB = 11
+MUL = 12
+DIV = 13
+MOD = 14
+MAX = 15
+MIN = 16
+BOTH = 17
+EITHER = 18
+WON = 19
+SAME = 20 #BOTH SAEM, compares the YARN forms of the operands
+DIFF = 21 #DIFFRINT
+NOT = 22
+STR_EQ = 23 #pushes whether two strings are equal, used by WTF? cases
+TO_STR = 24
+SMOOSH = 25 #operand count
+ALL_OF = 26 #operand count
+ANY_OF = 27 #operand count
+CAST = 28 #index in CAST_TARGETS
+VISIBLE = 29 #expression count
+GIMMEH = 30 #pushes a line of input
+INCR = 31 #slot, UPPIN of a loop variable
+DECR = 32 #slot, NERFIN
+TOUCH = 33 #slot, a loop without UPPIN/NERFIN still reads its variable
+CALL = 34 #function index
+RETURN = 35
+RAISE_BREAK = 36 #GTFO outside any loop, switch or function
+RAISE_RETURN = 37 #FOUND YR outside any function
+EVAL_NODE = 38 #constant index of a node, evaluated by the tree walker
+EXEC_NODE = 39 #constant index of a node, executed by the tree walker
+HALT = 40
+LOAD_FAST = 41 #slot of a variable that is certainly declared by then, pushes its value
+DECLARE_NAME = 42 #slot, STORE_NAME that also records the order the main program declares its variables in
+TAIL_CALL = 43 #function index, FOUND YR I IZ ...: CALL that replaces the current frame instead of pushing one
+
+OPCODE_NAMES = {value: name for name, value in globals().items() if name.isupper() and isinstance(value, int)}
+
+#opcodes whose argument is a jump target
+JUMP_OPCODES = frozenset((JUMP, POP_JUMP_IF_FALSE, POP_JUMP_IF_TRUE))
+
+#BinaryOpNode operator -> opcode
+BINARY_OPCODES = {
+    "SUM OF": ADD,
+    "DIFF OF": SUB,
+    "PRODUKT OF": MUL,
+    "QUOSHUNT OF": DIV,
+    "MOD OF": MOD,
+    "BIGGR OF": MAX,
+    "SMALLR OF": MIN,
+    "BOTH OF": BOTH,
+    "EITHER OF": EITHER,
+    "WON OF": WON,
+}
+
+INFINITE_ARITY_OPCODES = {
+    "SMOOSH": SMOOSH,
+    "ALL OF": ALL_OF,
+    "ANY OF": ANY_OF,
+}
+
+#CAST arguments index this tuple
+CAST_TARGETS = tuple(TYPECASTS)
+
+#marks a function body on the stack of enclosing GTFO targets
+FUNCTION_BODY = None
+
+
+class CodeObject: #the instructions of the main program or of one function
+    def __init__(self, name, scope):
+        self.name = name
+        self.parameters = tuple(scope.names[slot] for slot in scope.parameter_slots)
+        self.parameter_slots = scope.parameter_slots
+        self.code = array('i') #opcode, argument, opcode, argument, ...
+        self.constants = []
+        self.names = list(scope.names) #slot -> variable name, IT is slot 0
+        self.constant_index = {}
+        self.name_index = dict(scope.slots)
+        self.delegated = None #FunctionDefNode run by the tree walker when the body could not be compiled
+
+    def emit(self, opcode, argument=0):
+        #appends an instruction, returns its offset
+        offset = len(self.code)
+        self.code.append(opcode)
+        self.code.append(argument)
+        return offset
+
+    def patch(self, offset, target):
+        #points the jump at offset to target
+        self.code[offset + 1] = target
+
+    def add_constant(self, value):
+        #1, 1.0 and WIN (True) compare equal, so constants are shared by type and value
+        try:
+            key = (type(value), value)
+            index = self.constant_index.get(key)
+        except TypeError:
+            key, index = None, None
+        if index is None:
+            index = len(self.constants)
+            self.constants.append(value)
+            if key is not None:
+                self.constant_index[key] = index
+        return index
+
+    def add_name(self, var_name):
+        #the slot of a variable, the resolver has already numbered every variable of the scope
+        index = self.name_index.get(var_name)
+        if index is None:
+            index = self.name_index[var_name] = len(self.names)
+            self.names.append(var_name)
+        return index
+
+    def __len__(self):
+        return len(self.code) // 2
+
+
+class BytecodeProgram: #a compiled program: the main code object and one per function
+    def __init__(self, program):
+        self.program = program
+        self.resolution = resolve(program)
+        self.main = CodeObject("<main>", self.resolution.main)
+        self.functions = []
+        #same function table interpret() builds, for the nodes the VM hands back to the tree walker
+        self.function_nodes = {}
+
+
+class BytecodeCompiler:
+    def __init__(self, program):
+        self.result = BytecodeProgram(program)
+        self.function_indexes = {}
+        self.code = None
+        self.scope = None #resolver scope of the code being compiled
+        #innermost last: a list of pending GTFO jumps for a loop or switch, FUNCTION_BODY for a function
+        self.break_targets = []
+
+    def compile(self):
+        result = self.result
+        program = result.program
+        for statement in program.statements:
+            if isinstance(statement, FunctionDefNode):
+                result.function_nodes[statement.func_name] = statement
+
+        #every function gets its index before any body is compiled, so bodies can call each other
+        for name, definition in result.function_nodes.items():
+            self.function_indexes[name] = len(result.functions)
+            result.functions.append(CodeObject(name, result.resolution.functions[name]))
+
+        for code, (name, definition) in zip(result.functions, result.function_nodes.items()):
+            self.code = code
+            self.scope = result.resolution.functions[name]
+            self.break_targets = [FUNCTION_BODY]
+            if not self.compile_top_level(definition.statements):
+                #a body nested deeper than Python's recursion limit allows runs in the tree walker instead
+                del code.code[:]
+                code.delegated = definition
+            code.emit(LOAD_CONST, code.add_constant("NOOB"))
+            code.emit(RETURN)
+
+        self.code = result.main
+        self.scope = result.resolution.main
+        self.break_targets = []
+        for statement in program.statements:
+            if not isinstance(statement, FunctionDefNode):
+                self.compile_top_level([statement])
+        self.code.emit(HALT)
+        return result
+
+    def compile_top_level(self, statements):
+        #compiles statements, undoing a statement that is too deeply nested to compile; at the top level of
+        #the program it is handed to the tree walker, which fails the same way when it gets there
+        code = self.code
+        for statement in statements:
+            start = len(code.code)
+            depth = len(self.break_targets)
+            try:
+                self.compile_statement(statement)
+            except RecursionError:
+                del code.code[start:]
+                del self.break_targets[depth:]
+                if self.break_targets:
+                    return False
+                code.emit(EXEC_NODE, code.add_constant(statement))
+        return True
+
+    def compile_block(self, statements):
+        for statement in statements:
+            self.compile_statement(statement)
+
+    def declare_variable(self, node):
+        #I HAS A and GIMMEH store the value on the stack; the symbol table the main program returns
+        #lists its variables in the order they were first declared, as interpret()'s dict does
+        declares = self.code is self.result.main and not self.scope.is_declared(node)
+        self.code.emit(DECLARE_NAME if declares else STORE_NAME, self.code.add_name(node.var_name))
+
+    #statements
+
+    def compile_statement(self, node):
+        for node_type in type(node).__mro__:
+            compile_node = STATEMENT_COMPILERS.get(node_type)
+            if compile_node is not None:
+                return compile_node(self, node)
+        #anything that is not a statement is an expression whose value goes to IT
+        self.compile_expression(node)
+        self.code.emit(STORE_NAME, self.code.add_name("IT"))
+
+    def compile_variable_decl(self, node):
+        code = self.code
+        if node.initial_value:
+            self.compile_expression(node.initial_value)
+        else:
+            code.emit(LOAD_CONST, code.add_constant("NOOB"))
+        self.declare_variable(node)
+
+    def compile_assignment(self, node):
+        #assignments to undeclared variables are skipped without evaluating the expression
+        code = self.code
+        name = code.add_name(node.var_name)
+        if self.scope.is_declared(node):
+            self.compile_expression(node.expression)
+            code.emit(STORE_NAME, name)
+            return
+        code.emit(IS_DECLARED, name)
+        skip = code.emit(POP_JUMP_IF_FALSE)
+        self.compile_expression(node.expression)
+        code.emit(STORE_NAME, name)
+        code.patch(skip, len(code.code))
+
+    def compile_visible(self, node):
+        for expression in node.expressions:
+            self.compile_expression(expression)
+        self.code.emit(VISIBLE, len(node.expressions))
+
+    def compile_gimmeh(self, node):
+        self.code.emit(GIMMEH)
+        self.declare_variable(node)
+
+    def compile_conditional(self, node):
+        code = self.code
+        end_jumps = []
+        code.emit(LOAD_FAST, code.add_name("IT"))
+        next_clause = code.emit(POP_JUMP_IF_FALSE)
+        self.compile_block(node.if_block)
+        end_jumps.append(code.emit(JUMP))
+
+        for clause in node.elif_blocks:
+            code.patch(next_clause, len(code.code))
+            self.compile_expression(clause.condition)
+            next_clause = code.emit(POP_JUMP_IF_FALSE)
+            self.compile_block(clause.statements)
+            end_jumps.append(code.emit(JUMP))
+
+        code.patch(next_clause, len(code.code))
+        self.compile_block(node.else_block)
+        for offset in end_jumps:
+            code.patch(offset, len(code.code))
+
+    def compile_switch(self, node):
+        #the YARN form of IT stays on the stack while the cases are tested; each case entry pops it
+        #and jumps to its body, and the bodies follow each other so a case without GTFO falls through
+        code = self.code
+        code.emit(LOAD_FAST, code.add_name("IT"))
+        code.emit(TO_STR)
+        case_jumps = []
+        for case in node.cases:
+            code.emit(DUP_TOP)
+            code.emit(LOAD_CONST, code.add_constant(lol_to_str(case.literal_value)))
+            code.emit(STR_EQ)
+            case_jumps.append(code.emit(POP_JUMP_IF_TRUE))
+
+        breaks = []
+        self.break_targets.append(breaks)
+        code.emit(POP_TOP)
+        self.compile_block(node.default_case)
+        breaks.append(code.emit(JUMP))
+
+        entries = []
+        for offset in case_jumps:
+            code.patch(offset, len(code.code))
+            code.emit(POP_TOP)
+            entries.append(code.emit(JUMP))
+        for offset, case in zip(entries, node.cases):
+            code.patch(offset, len(code.code))
+            self.compile_block(case.statements)
+
+        self.break_targets.pop()
+        for offset in breaks:
+            code.patch(offset, len(code.code))
+
+    def compile_loop(self, node):
+        code = self.code
+        name = code.add_name(node.var_name)
+        breaks = []
+        start = len(code.code)
+        if node.condition:
+            self.compile_expression(node.condition)
+            if node.condition_type == "WILE":
+                breaks.append(code.emit(POP_JUMP_IF_FALSE))
+            elif node.condition_type == "TIL":
+                breaks.append(code.emit(POP_JUMP_IF_TRUE))
+            else:
+                code.emit(POP_TOP)
+
+        self.break_targets.append(breaks)
+        self.compile_block(node.statements)
+        self.break_targets.pop()
+
+        if node.operation == "UPPIN":
+            code.emit(INCR, name)
+        elif node.operation == "NERFIN":
+            code.emit(DECR, name)
+        else:
+            code.emit(TOUCH, name)
+        code.emit(JUMP, start)
+        for offset in breaks:
+            code.patch(offset, len(code.code))
+
+    def compile_typecast_statement(self, node):
+        code = self.code
+        if node.target_type not in TYPECASTS:
+            code.emit(EXEC_NODE, code.add_constant(node))
+            return
+        name = code.add_name(node.var_name)
+        if not self.scope.is_declared(node):
+            code.emit(CHECK_DECLARED, name)
+        code.emit(LOAD_FAST, name)
+        code.emit(CAST, CAST_TARGETS.index(node.target_type))
+        code.emit(STORE_NAME, name)
+
+    def compile_break(self, node):
+        code = self.code
+        if not self.break_targets:
+            code.emit(RAISE_BREAK)
+        elif self.break_targets[-1] is FUNCTION_BODY:
+            #GTFO directly in a function body returns NOOB
+            code.emit(LOAD_CONST, code.add_constant("NOOB"))
+            code.emit(RETURN)
+        else:
+            self.break_targets[-1].append(code.emit(JUMP))
+
+    def compile_return(self, node):
+        in_function = self.break_targets and self.break_targets[0] is FUNCTION_BODY
+        expression = node.expression
+        if in_function and type(expression) is FunctionCallNode:
+            index = self.function_indexes.get(expression.func_name)
+            if index is not None and len(expression.arguments) == len(self.result.functions[index].parameters):
+                #a tail call: the called function returns straight to this function's caller
+                for argument in expression.arguments:
+                    self.compile_expression(argument)
+                self.code.emit(TAIL_CALL, index)
+                return
+        self.compile_expression(expression)
+        if in_function:
+            self.code.emit(RETURN)
+        else:
+            self.code.emit(RAISE_RETURN)
+
+    #expressions
+
+    def compile_expression(self, node):
+        for node_type in type(node).__mro__:
+            compile_node = EXPRESSION_COMPILERS.get(node_type)
+            if compile_node is not None:
+                return compile_node(self, node)
+        self.delegate(node)
+
+    def delegate(self, node):
+        #nodes the compiler has no instructions for are evaluated by the tree walker
+        self.code.emit(EVAL_NODE, self.code.add_constant(node))
+
+    def compile_literal(self, node):
+        convert = LITERAL_VALUES.get(node.literal_type)
+        if convert is None:
+            return self.delegate(node)
+        try:
+            value = convert(node.value)
+        except (ValueError, TypeError):
+            return self.delegate(node)
+        self.code.emit(LOAD_CONST, self.code.add_constant(value))
+
+    def compile_variable(self, node):
+        #a read the resolver proved comes after the declaration needs no check
+        opcode = LOAD_FAST if self.scope.is_declared(node) else LOAD_NAME
+        self.code.emit(opcode, self.code.add_name(node.var_name))
+
+    def compile_binary_op(self, node):
+        opcode = BINARY_OPCODES.get(node.operator)
+        if opcode is None:
+            return self.delegate(node)
+        self.compile_expression(node.left)
+        self.compile_expression(node.right)
+        self.code.emit(opcode)
+
+    def compile_comparison(self, node):
+        if node.operator == "BOTH SAEM":
+            opcode = SAME
+        elif node.operator == "DIFFRINT":
+            opcode = DIFF
+        else:
+            return self.delegate(node)
+        self.compile_expression(node.left)
+        self.compile_expression(node.right)
+        self.code.emit(opcode)
+
+    def compile_unary_op(self, node):
+        self.compile_expression(node.operand)
+        self.code.emit(NOT)
+
+    def compile_infinite_arity_op(self, node):
+        opcode = INFINITE_ARITY_OPCODES.get(node.operator)
+        if opcode is None:
+            return self.delegate(node)
+        for operand in node.operands:
+            self.compile_expression(operand)
+        self.code.emit(opcode, len(node.operands))
+
+    def compile_function_call(self, node):
+        index = self.function_indexes.get(node.func_name)
+        if index is None or len(node.arguments) != len(self.result.functions[index].parameters):
+            #unknown functions and calls with the wrong number of arguments are NOOB, the arguments are not evaluated
+            self.code.emit(LOAD_CONST, self.code.add_constant("NOOB"))
+            return
+        for argument in node.arguments:
+            self.compile_expression(argument)
+        self.code.emit(CALL, index)
+
+    def compile_typecast(self, node):
+        if node.target_type not in TYPECASTS:
+            return self.delegate(node)
+        self.compile_expression(node.expression)
+        self.code.emit(CAST, CAST_TARGETS.index(node.target_type))
+
+
+STATEMENT_COMPILERS = {
+    VariableDeclNode: BytecodeCompiler.compile_variable_decl,
+    AssignmentNode: BytecodeCompiler.compile_assignment,
+    VisibleNode: BytecodeCompiler.compile_visible,
+    GimmehNode: BytecodeCompiler.compile_gimmeh,
+    ConditionalNode: BytecodeCompiler.compile_conditional,
+    SwitchNode: BytecodeCompiler.compile_switch,
+    LoopNode: BytecodeCompiler.compile_loop,
+    TypecastStatementNode: BytecodeCompiler.compile_typecast_statement,
+    BreakNode: BytecodeCompiler.compile_break,
+    ReturnNode: BytecodeCompiler.compile_return,
+}
+
+EXPRESSION_COMPILERS = {
+    LiteralNode: BytecodeCompiler.compile_literal,
+    VariableNode: BytecodeCompiler.compile_variable,
+    BinaryOpNode: BytecodeCompiler.compile_binary_op,
+    ComparisonNode: BytecodeCompiler.compile_comparison,
+    UnaryOpNode: BytecodeCompiler.compile_unary_op,
+    InfiniteArityOpNode: BytecodeCompiler.compile_infinite_arity_op,
+    FunctionCallNode: BytecodeCompiler.compile_function_call,
+    TypecastNode: BytecodeCompiler.compile_typecast,
+}
+
+
+def compile_bytecode(program):
+    return BytecodeCompiler(program).compile()
@@ -0,0 +1,512 @@
+#compiles a ProgramNode once into a tree of Python closures, one per node, so the isinstance chains of
+#interpreter.py run once per node at compile time instead of every time the node is executed
+#every closure takes the symbol table it runs in and does exactly what execute_statement/evaluate_expression
+#would do for its node, so output, symbol table and errors are the same as interpret()
+#statement closures return what execute_statement returns: None, BREAK for a GTFO or a Return for a FOUND YR
+from parser.ast_nodes import *
+from semantics import bool_convert, lol_to_num, lol_to_str, format_result, InterpreterRuntimeError
+from semantics.symbolizer import to_str, same_str, input_value, LITERAL_VALUES, TYPECASTS
+from semantics.interpreter import execute_statement, evaluate_expression, raise_status, BREAK, Return
+from semantics.interpreter import BINARY_OPERATIONS, BOOLEAN_OPERATORS
+from semantics.optimizer import optimize as optimize_program
+from semantics.output import flushing_output
+
+
+class Runtime: #what a compiled program talks to while it runs, set by ClosureProgram.run
+    __slots__ = ('gui_print', 'gui_input')
+
+    def __init__(self):
+        self.gui_print = None
+        self.gui_input = None
+
+
+class CompiledFunction: #a HOW IZ I function whose body has been compiled
+    __slots__ = ('parameters', 'statements')
+
+    def __init__(self, parameters):
+        self.parameters = parameters
+        self.statements = [] #filled in after every function exists, so bodies can call any of them
+
+
+class CompiledTailCall: #FOUND YR I IZ f ... in compiled code, the tail call of interpreter.py for closures
+    __slots__ = ('function', 'local_symbols')
+
+    def __init__(self, function, local_symbols):
+        self.function = function
+        self.local_symbols = local_symbols
+
+    @property
+    def value(self):
+        return run_compiled_function(self.function, self.local_symbols)
+
+
+def run_compiled_function(function, local_symbols):
+    #runs a compiled function whose local symbol table is ready, tail calls run in this loop
+    while True:
+        for statement in function.statements:
+            status = statement(local_symbols)
+            if status is not None:
+                break
+        else:
+            return "NOOB"
+        if type(status) is CompiledTailCall:
+            function = status.function
+            local_symbols = status.local_symbols
+            continue
+        return "NOOB" if status is BREAK else status.value
+
+
+class ClosureCompiler: #turns statement and expression nodes into closures
+    def __init__(self, function_table, runtime):
+        #function_table is the name -> FunctionDefNode table interpret() builds, nodes the compiler
+        #has no closure for are handed to the tree walker together with it
+        self.function_table = function_table
+        self.runtime = runtime
+        self.functions = {name: CompiledFunction(definition.parameters)
+                          for name, definition in function_table.items()}
+
+    #fallbacks to the tree walker, for nodes the compiler has no closure for (unknown operators,
+    #node types that are not statements) and for statements nested too deep to compile
+
+    def delegate_statement(self, node):
+        runtime = self.runtime
+        function_table = self.function_table
+
+        def run(symbols):
+            return execute_statement(node, symbols, function_table, runtime.gui_print, runtime.gui_input)
+        return run
+
+    def delegate_expression(self, node):
+        runtime = self.runtime
+        function_table = self.function_table
+
+        def run(symbols):
+            return evaluate_expression(node, symbols, function_table, runtime.gui_print, runtime.gui_input)
+        return run
+
+    def compile_top_level(self, statements):
+        compiled = []
+        for statement in statements:
+            try:
+                compiled.append(self.compile_statement(statement))
+            except RecursionError:
+                #the tree walker gets as far as Python's recursion limit lets it before failing
+                compiled.append(self.delegate_statement(statement))
+        return compiled
+
+    def compile_block(self, statements):
+        return [self.compile_statement(statement) for statement in statements]
+
+    #statements
+
+    def compile_statement(self, node):
+        compile_node = self.STATEMENT_COMPILERS.get(type(node))
+        if compile_node is None:
+            if isinstance(node, STATEMENT_NODE_TYPES):
+                return self.delegate_statement(node)
+            return self.compile_expression_statement(node)
+        return compile_node(self, node)
+
+    def compile_expression_statement(self, node):
+        expression = self.compile_expression(node)
+
+        def run(symbols):
+            symbols["IT"] = expression(symbols)
+        return run
+
+    def compile_variable_decl(self, node):
+        var_name = node.var_name
+        if not node.initial_value:
+            def run(symbols):
+                symbols[var_name] = "NOOB"
+            return run
+
+        initial_value = self.compile_expression(node.initial_value)
+
+        def run(symbols):
+            symbols[var_name] = initial_value(symbols)
+        return run
+
+    def compile_assignment(self, node):
+        var_name = node.var_name
+        expression = self.compile_expression(node.expression)
+
+        def run(symbols):
+            if var_name in symbols: #assignments to undeclared variables are ignored
+                symbols[var_name] = expression(symbols)
+        return run
+
+    def compile_visible(self, node):
+        expressions = [self.compile_expression(expression) for expression in node.expressions]
+        runtime = self.runtime
+
+        if len(expressions) == 1:
+            expression = expressions[0]
+
+            def run(symbols):
+                value = expression(symbols)
+                runtime.gui_print(to_str(value) + "\n")
+                symbols["IT"] = value
+            return run
+
+        def run(symbols):
+            outputs = []
+            last_value = "NOOB"
+            for expression in expressions:
+                last_value = expression(symbols)
+                outputs.append(to_str(last_value))
+            runtime.gui_print("".join(outputs) + "\n")
+            symbols["IT"] = last_value
+        return run
+
+    def compile_gimmeh(self, node):
+        var_name = node.var_name
+        runtime = self.runtime
+
+        def run(symbols):
+            symbols[var_name] = input_value(runtime.gui_input())
+        return run
+
+    def compile_conditional(self, node):
+        if_block = self.compile_block(node.if_block)
+        elif_blocks = [(self.compile_condition(clause.condition), self.compile_block(clause.statements))
+                       for clause in node.elif_blocks]
+        else_block = self.compile_block(node.else_block)
+
+        def run(symbols):
+            if bool_convert(symbols.get("IT", "NOOB")):
+                for statement in if_block:
+                    status = statement(symbols)
+                    if status is not None:
+                        return status
+                return None
+            for condition, statements in elif_blocks:
+                if condition(symbols):
+                    for statement in statements:
+                        status = statement(symbols)
+                        if status is not None:
+                            return status
+                    return None
+            for statement in else_block:
+                status = statement(symbols)
+                if status is not None:
+                    return status
+            return None
+        return run
+
+    def compile_switch(self, node):
+        #case literals are constants, their YARN form is worked out once
+        cases = [(lol_to_str(case.literal_value), self.compile_block(case.statements)) for case in node.cases]
+        default_case = self.compile_block(node.default_case)
+
+        def run(symbols):
+            switch_value = lol_to_str(symbols.get("IT", "NOOB"))
+            fall_through = False
+            for literal, statements in cases:
+                if fall_through or literal == switch_value:
+                    fall_through = True
+                    for statement in statements:
+                        status = statement(symbols)
+                        if status is not None:
+                            return None if status is BREAK else status
+            if not fall_through:
+                for statement in default_case:
+                    status = statement(symbols)
+                    if status is not None:
+                        return None if status is BREAK else status
+            return None
+        return run
+
+    def compile_loop(self, node):
+        var_name = node.var_name
+        statements = self.compile_block(node.statements)
+        step = {"UPPIN": 1, "NERFIN": -1}.get(node.operation, 0)
+
+        #the loop stops when the condition's TROOF value equals stop_value: FAIL for WILE, WIN for TIL
+        condition = None
+        stop_value = None
+        if node.condition:
+            stop_value = {"WILE": False, "TIL": True}.get(node.condition_type)
+            if stop_value is None:
+                #the condition is still evaluated every time round, it just never ends the loop
+                condition = self.compile_expression(node.condition)
+            else:
+                condition = self.compile_condition(node.condition)
+
+        def run(symbols):
+            while True:
+                if condition is not None:
+                    conditional_value = condition(symbols)
+                    if stop_value is not None and conditional_value == stop_value:
+                        return None
+                for statement in statements:
+                    status = statement(symbols)
+                    if status is not None:
+                        return None if status is BREAK else status
+                current_value = symbols[var_name]
+                if type(current_value) is not int:
+                    current_value = lol_to_num(current_value)
+                if step:
+                    symbols[var_name] = current_value + step
+        return run
+
+    def compile_typecast_statement(self, node):
+        var_name = node.var_name
+        convert = TYPECASTS.get(node.target_type)
+        if convert is None:
+            return self.delegate_statement(node)
+
+        def run(symbols):
+            if var_name not in symbols:
+                raise InterpreterRuntimeError(f"Variable {var_name} not declared")
+            symbols[var_name] = convert(symbols[var_name])
+        return run
+
+    def compile_break(self, node):
+        def run(symbols):
+            return BREAK
+        return run
+
+    def compile_return(self, node):
+        if type(node.expression) is FunctionCallNode:
+            tail_call = self.compile_tail_call(node.expression)
+            if tail_call is not None:
+                return tail_call
+        expression = self.compile_expression(node.expression)
+
+        def run(symbols):
+            return Return(expression(symbols))
+        return run
+
+    STATEMENT_COMPILERS = {
+        VariableDeclNode: compile_variable_decl,
+        AssignmentNode: compile_assignment,
+        VisibleNode: compile_visible,
+        GimmehNode: compile_gimmeh,
+        ConditionalNode: compile_conditional,
+        SwitchNode: compile_switch,
+        LoopNode: compile_loop,
+        TypecastStatementNode: compile_typecast_statement,
+        BreakNode: compile_break,
+        ReturnNode: compile_return,
+    }
+
+    #expressions
+
+    def compile_expression(self, node):
+        compile_node = self.EXPRESSION_COMPILERS.get(type(node))
+        if compile_node is None:
+            return self.delegate_expression(node)
+        return compile_node(self, node)
+
+    def compile_literal(self, node):
+        convert = LITERAL_VALUES.get(node.literal_type)
+        if convert is None:
+            return self.delegate_expression(node)
+        try:
+            value = convert(node.value)
+        except (ValueError, TypeError):
+            #a literal the lexer would never produce, it fails when it is evaluated, not before the program runs
+            return self.delegate_expression(node)
+
+        def run(symbols):
+            return value
+        return run
+
+    def compile_variable(self, node):
+        var_name = node.var_name
+
+        def run(symbols):
+            return symbols.get(var_name, "NOOB")
+        return run
+
+    def compile_binary_op(self, node):
+        operator_function = BINARY_OPERATIONS.get(node.operator)
+        if operator_function is None:
+            return self.delegate_expression(node)
+        left = self.compile_expression(node.left)
+        right = self.compile_expression(node.right)
+
+        if node.operator in BOOLEAN_OPERATORS:
+            def run(symbols):
+                return format_result(operator_function(left(symbols), right(symbols)))
+            return run
+
+        def run(symbols):
+            left_op = left(symbols)
+            right_op = right(symbols)
+            #NUMBR and NUMBAR values are already numbers, lol_to_num would hand them back unchanged
+            if type(left_op) is not int and type(left_op) is not float:
+                left_op = lol_to_num(left_op)
+            if type(right_op) is not int and type(right_op) is not float:
+                right_op = lol_to_num(right_op)
+            result = operator_function(left_op, right_op)
+            if type(result) is bool:
+                return "WIN" if result else "FAIL"
+            return result
+        return run
+
+    def compile_comparison(self, node):
+        if node.operator == "BOTH SAEM":
+            equal_result, unequal_result = "WIN", "FAIL"
+        elif node.operator == "DIFFRINT":
+            equal_result, unequal_result = "FAIL", "WIN"
+        else:
+            return self.delegate_expression(node)
+        left = self.compile_expression(node.left)
+        right = self.compile_expression(node.right)
+
+        def run(symbols):
+            if same_str(left(symbols), right(symbols)):
+                return equal_result
+            return unequal_result
+        return run
+
+    #conditions: expressions whose value is only used as a TROOF, compiled to closures returning
+    #bool_convert of the value so comparisons can skip building "WIN"/"FAIL" just to test it
+
+    def compile_condition(self, node):
+        if type(node) is ComparisonNode and node.operator in ("BOTH SAEM", "DIFFRINT"):
+            left = self.compile_expression(node.left)
+            right = self.compile_expression(node.right)
+            if node.operator == "BOTH SAEM":
+                def run(symbols):
+                    return same_str(left(symbols), right(symbols))
+            else:
+                def run(symbols):
+                    return not same_str(left(symbols), right(symbols))
+            return run
+
+        if type(node) is UnaryOpNode:
+            operand = self.compile_condition(node.operand)
+
+            def run(symbols):
+                return not operand(symbols)
+            return run
+
+        expression = self.compile_expression(node)
+
+        def run(symbols):
+            return bool_convert(expression(symbols))
+        return run
+
+    def compile_unary_op(self, node):
+        operand = self.compile_expression(node.operand)
+
+        def run(symbols):
+            return "FAIL" if bool_convert(operand(symbols)) else "WIN"
+        return run
+
+    def compile_infinite_arity_op(self, node):
+        operands = [self.compile_expression(operand) for operand in node.operands]
+
+        #every operand is evaluated before any of them is looked at, as in the tree walker
+        if node.operator == "SMOOSH":
+            def run(symbols):
+                return "".join([lol_to_str(value) for value in [operand(symbols) for operand in operands]])
+        elif node.operator == "ALL OF":
+            def run(symbols):
+                values = [operand(symbols) for operand in operands]
+                return format_result(all(bool_convert(value) for value in values))
+        elif node.operator == "ANY OF":
+            def run(symbols):
+                values = [operand(symbols) for operand in operands]
+                return format_result(any(bool_convert(value) for value in values))
+        else:
+            return self.delegate_expression(node)
+        return run
+
+    def compile_function_call(self, node):
+        function = self.functions.get(node.func_name)
+        if function is None or len(node.arguments) != len(function.parameters):
+            #unknown functions and calls with the wrong number of arguments evaluate to NOOB without evaluating anything
+            def run(symbols):
+                return "NOOB"
+            return run
+
+        arguments = list(zip(function.parameters, [self.compile_expression(argument) for argument in node.arguments]))
+
+        def run(symbols):
+            local_symbols = {"IT": symbols.get("IT", "NOOB")}
+            for parameter, argument in arguments:
+                local_symbols[parameter] = argument(symbols)
+            return run_compiled_function(function, local_symbols)
+        return run
+
+    def compile_tail_call(self, node):
+        #FOUND YR I IZ f ...: the statement binds the arguments and the function call running it runs f,
+        #None if the call is not to a function that can be called like that
+        function = self.functions.get(node.func_name)
+        if function is None or len(node.arguments) != len(function.parameters):
+            return None
+        arguments = list(zip(function.parameters, [self.compile_expression(argument) for argument in node.arguments]))
+
+        def run(symbols):
+            local_symbols = {"IT": symbols.get("IT", "NOOB")}
+            for parameter, argument in arguments:
+                local_symbols[parameter] = argument(symbols)
+            return CompiledTailCall(function, local_symbols)
+        return run
+
+    def compile_typecast(self, node):
+        convert = TYPECASTS.get(node.target_type)
+        if convert is None:
+            return self.delegate_expression(node)
+        expression = self.compile_expression(node.expression)
+
+        def run(symbols):
+            return convert(expression(symbols))
+        return run
+
+    EXPRESSION_COMPILERS = {
+        LiteralNode: compile_literal,
+        VariableNode: compile_variable,
+        BinaryOpNode: compile_binary_op,
+        ComparisonNode: compile_comparison,
+        UnaryOpNode: compile_unary_op,
+        InfiniteArityOpNode: compile_infinite_arity_op,
+        FunctionCallNode: compile_function_call,
+        TypecastNode: compile_typecast,
+    }
+
+
+#node types execute_statement has a branch for, anything else is evaluated as an expression
+STATEMENT_NODE_TYPES = tuple(ClosureCompiler.STATEMENT_COMPILERS)
+
+
+class ClosureProgram(ClosureCompiler): #a ProgramNode compiled to closures, can be run any number of times
+    def __init__(self, program):
+        function_table = {}
+        for statement in program.statements:
+            if isinstance(statement, FunctionDefNode):
+                function_table[statement.func_name] = statement
+        super().__init__(function_table, Runtime())
+        self.program = program
+
+        for name, definition in function_table.items():
+            self.functions[name].statements = self.compile_top_level(definition.statements)
+        self.statements = self.compile_top_level(
+            [statement for statement in program.statements if not isinstance(statement, FunctionDefNode)])
+
+    def run(self, gui_print, gui_input):
+        #executes the program, returns its symbol table like interpret()
+        self.runtime.gui_print = gui_print
+        self.runtime.gui_input = gui_input
+        symbol_table = {'IT': 'NOOB'}
+        for statement in self.statements:
+            status = statement(symbol_table)
+            if status is not None:
+                raise_status(status)
+        return symbol_table
+
+
+def compile_program(program):
+    return ClosureProgram(program)
+
+
+@flushing_output
+def interpret_compiled(node, gui_print, gui_input, optimize=False):
+    #drop-in replacement for interpret() that compiles the program to closures first
+    if optimize:
+        node = optimize_program(node)
+    return ClosureProgram(node).run(gui_print, gui_input)
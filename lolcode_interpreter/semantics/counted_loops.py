@@ -0,0 +1,147 @@
+#loop specializer for the tree walker: recognizes counted IM IN YR loops, the ones that step a counter until it
+#reaches a bound that does not change while the loop runs, so interpret() can count them natively
+#  IM IN YR loop UPPIN YR i TIL BOTH SAEM i AN n      (or NERFIN, or WILE DIFFRINT i AN n)
+#the body may read the counter but must never write it; anything else runs as a normal loop
+from parser.ast_nodes import *
+
+#what a run's loop cache returns for a loop it has not analyzed yet
+NOT_ANALYZED = object()
+
+
+class CountedLoop: #what the tree walker needs to run a loop as a counted loop
+    __slots__ = ('bound', 'step', 'reads_counter')
+
+    def __init__(self, bound, step, reads_counter):
+        self.bound = bound #expression the counter is compared with, evaluated once
+        self.step = step #1 for UPPIN, -1 for NERFIN
+        self.reads_counter = reads_counter #the body reads the counter, it has to be stored every iteration
+
+
+def counted_loop(node, function_table):
+    #the CountedLoop for a LoopNode, None if the loop does not have the counted shape;
+    #a loop runs many times per analysis, so the result is kept in the run's function table (its .counted_loops)
+    #and goes away with the run instead of pinning the program's AST
+    loops = getattr(function_table, "counted_loops", None)
+    counted = NOT_ANALYZED if loops is None else loops.get(node, NOT_ANALYZED)
+    if counted is NOT_ANALYZED:
+        try:
+            counted = analyze_loop(node)
+        except RecursionError:
+            #too deeply nested to analyze, it runs as a normal loop
+            counted = None
+        if loops is not None:
+            loops[node] = counted
+    return counted
+
+
+def analyze_loop(node):
+    var_name = node.var_name
+    if node.operation not in ("UPPIN", "NERFIN") or var_name == "IT":
+        #IT is written by every expression statement in the body
+        return None
+
+    #the loop runs until the counter and the bound have the same string form
+    condition = node.condition
+    if not isinstance(condition, ComparisonNode):
+        return None
+    if (node.condition_type, condition.operator) not in (("TIL", "BOTH SAEM"), ("WILE", "DIFFRINT")):
+        return None
+    if is_variable(condition.left, var_name):
+        bound = condition.right
+    elif is_variable(condition.right, var_name):
+        bound = condition.left
+    else:
+        return None
+
+    bound_names = set()
+    if not collect_pure_names(bound, bound_names) or var_name in bound_names or "IT" in bound_names:
+        return None
+
+    written, read = set(), set()
+    if not collect_block(node.statements, written, read):
+        return None
+    if var_name in written or not bound_names.isdisjoint(written):
+        return None
+    return CountedLoop(bound, 1 if node.operation == "UPPIN" else -1, var_name in read)
+
+
+def is_variable(node, var_name):
+    return isinstance(node, VariableNode) and node.var_name == var_name
+
+
+def collect_pure_names(node, names):
+    #adds the variables node reads to names, false if evaluating it could do anything but compute a value
+    #(a function call can print or read input, so a bound with one in it is evaluated every iteration)
+    if isinstance(node, LiteralNode):
+        return True
+    if isinstance(node, VariableNode):
+        names.add(node.var_name)
+        return True
+    if isinstance(node, (BinaryOpNode, ComparisonNode)):
+        return collect_pure_names(node.left, names) and collect_pure_names(node.right, names)
+    if isinstance(node, UnaryOpNode):
+        return collect_pure_names(node.operand, names)
+    if isinstance(node, InfiniteArityOpNode):
+        return all(collect_pure_names(operand, names) for operand in node.operands)
+    if isinstance(node, TypecastNode):
+        return collect_pure_names(node.expression, names)
+    return False
+
+
+def collect_block(statements, written, read):
+    #adds the variables the statements write and read, false if they contain a node this pass does not know
+    return all(collect_statement(statement, written, read) for statement in statements)
+
+
+def collect_statement(node, written, read):
+    if isinstance(node, VariableDeclNode):
+        written.add(node.var_name)
+        return node.initial_value is None or collect_expression(node.initial_value, read)
+    if isinstance(node, AssignmentNode):
+        written.add(node.var_name)
+        return collect_expression(node.expression, read)
+    if isinstance(node, (GimmehNode, TypecastStatementNode)):
+        written.add(node.var_name)
+        return True
+    if isinstance(node, VisibleNode):
+        return all(collect_expression(expression, read) for expression in node.expressions)
+    if isinstance(node, ConditionalNode):
+        return (collect_block(node.if_block, written, read)
+                and all(collect_expression(clause.condition, read) and collect_block(clause.statements, written, read)
+                        for clause in node.elif_blocks)
+                and collect_block(node.else_block, written, read))
+    if isinstance(node, SwitchNode):
+        return (all(collect_block(case.statements, written, read) for case in node.cases)
+                and collect_block(node.default_case, written, read))
+    if isinstance(node, LoopNode):
+        #an inner loop updates its own counter
+        written.add(node.var_name)
+        read.add(node.var_name)
+        return ((node.condition is None or collect_expression(node.condition, read))
+                and collect_block(node.statements, written, read))
+    if isinstance(node, ReturnNode):
+        return collect_expression(node.expression, read)
+    if isinstance(node, (BreakNode, FunctionDefNode)):
+        #a HOW IZ I inside a block is never called
+        return True
+    return collect_expression(node, read)
+
+
+def collect_expression(node, read):
+    #a function's body has its own symbol table, only the arguments of a call are read here
+    if isinstance(node, LiteralNode):
+        return True
+    if isinstance(node, VariableNode):
+        read.add(node.var_name)
+        return True
+    if isinstance(node, (BinaryOpNode, ComparisonNode)):
+        return collect_expression(node.left, read) and collect_expression(node.right, read)
+    if isinstance(node, UnaryOpNode):
+        return collect_expression(node.operand, read)
+    if isinstance(node, InfiniteArityOpNode):
+        return all(collect_expression(operand, read) for operand in node.operands)
+    if isinstance(node, FunctionCallNode):
+        return all(collect_expression(argument, read) for argument in node.arguments)
+    if isinstance(node, TypecastNode):
+        return collect_expression(node.expression, read)
+    return False
@@ -0,0 +1,87 @@
+#differential check of the execution engines: runs every program on every engine in ENGINES, with and without
+#the optimizer, and compares what VISIBLE printed, the symbol table returned (or the error raised) against the
+#plain tree walker; GIMMEH is answered from a fixed list, so every engine reads the same input
+#usage: python -m semantics.differential [file.lol ...] [--answers=3,4,0]
+#with no files it checks test_cases/*.lol, and it exits with status 1 if any engine disagrees
+import glob
+import os
+import sys
+
+from parser import parse_file, SyntaxError as LOLSyntaxError
+from semantics import ENGINES, CaptureSink, ListInput
+
+#what GIMMEH reads unless --answers is given; once they run out GIMMEH gets NOOB, which is compared too
+DEFAULT_ANSWERS = ("3", "4", "5", "1", "0")
+
+#the run everything else is compared with
+REFERENCE = ("tree", False)
+
+TEST_CASES_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "test_cases")
+
+
+def snapshot(symbol_table):
+    #the symbol table as comparable plain data: a YARN compares as a str whatever str subclass holds it,
+    #anything else by type and repr, so 1 and 1.0 (or 0.0 and -0.0) are told apart
+    return {name: ("str", str(value)) if isinstance(value, str) else (type(value).__name__, repr(value))
+            for name, value in symbol_table.items()}
+
+
+def run_engine(filename, engine, optimize, answers):
+    #(output, snapshot of the symbol table or None, "ErrorType: message" or None) of one run,
+    #on a freshly parsed program since the optimizer rewrites the tree in place
+    output = CaptureSink()
+    try:
+        symbol_table = ENGINES[engine](parse_file(filename), output, ListInput(answers), optimize=optimize)
+    except Exception as e:
+        return output.getvalue(), None, f"{type(e).__name__}: {e}"
+    return output.getvalue(), snapshot(symbol_table), None
+
+
+def check_file(filename, answers=DEFAULT_ANSWERS):
+    #list of (engine, optimize, what differs) for every run that does not match the reference run
+    reference = run_engine(filename, *REFERENCE, answers)
+    mismatches = []
+    for engine in ENGINES:
+        for optimize in (False, True):
+            if (engine, optimize) == REFERENCE:
+                continue
+            result = run_engine(filename, engine, optimize, answers)
+            differences = [part for part, ours, theirs in zip(("output", "symbol table", "error"), reference, result)
+                           if ours != theirs]
+            if differences:
+                mismatches.append((engine, optimize, differences))
+    return mismatches
+
+
+def main(argv):
+    answers = DEFAULT_ANSWERS
+    filenames = []
+    for arg in argv:
+        if arg.startswith("--answers="):
+            answers = tuple(arg.split("=", 1)[1].split(","))
+        else:
+            filenames.append(arg)
+    if not filenames:
+        filenames = sorted(glob.glob(os.path.join(TEST_CASES_DIR, "*.lol")))
+
+    failed = 0
+    for filename in filenames:
+        name = os.path.basename(filename)
+        try:
+            parse_file(filename)
+        except LOLSyntaxError as e:
+            #every engine runs the same parsed tree, there is nothing to compare
+            print(f"{name}: skipped, does not parse ({e})")
+            continue
+        mismatches = check_file(filename, answers)
+        if not mismatches:
+            print(f"{name}: all {len(ENGINES) * 2} runs agree")
+            continue
+        failed += 1
+        for engine, optimize, differences in mismatches:
+            print(f"{name}: {engine}{' -O' if optimize else ''} differs in {', '.join(differences)}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,53 @@
+#readable listings of compiled bytecode, for debugging the compiler and the VM
+#usage: python -m semantics.disassembler <file.lol>
+from parser.ast_nodes import ASTNode
+from semantics.bytecode import *
+
+
+def describe_argument(code, opcode, argument):
+    #what an instruction's argument refers to, for the disassembly
+    if opcode in (LOAD_CONST, EVAL_NODE, EXEC_NODE):
+        value = code.constants[argument]
+        return type(value).__name__ if isinstance(value, ASTNode) else repr(value)
+    if opcode in (LOAD_NAME, LOAD_FAST, STORE_NAME, DECLARE_NAME, IS_DECLARED, CHECK_DECLARED, INCR, DECR, TOUCH):
+        return code.names[argument]
+    if opcode in JUMP_OPCODES:
+        return f"to {argument // 2}"
+    if opcode == CAST:
+        return CAST_TARGETS[argument]
+    return ""
+
+
+def disassemble_code(code, functions=()):
+    lines = [f"{code.name}" + (f" ({', '.join(code.parameters)})" if code.parameters else "") + ":"]
+    if code.delegated is not None:
+        lines.append("    (runs in the tree walker)")
+    #instructions are numbered by index, jump targets are printed the same way
+    targets = {code.code[offset + 1] for offset in range(0, len(code.code), 2) if code.code[offset] in JUMP_OPCODES}
+    for offset in range(0, len(code.code), 2):
+        opcode, argument = code.code[offset], code.code[offset + 1]
+        if opcode == CALL or opcode == TAIL_CALL:
+            detail = functions[argument].name if argument < len(functions) else ""
+        else:
+            detail = describe_argument(code, opcode, argument)
+        marker = ">>" if offset in targets else "  "
+        lines.append(f"  {marker} {offset // 2:5} {OPCODE_NAMES[opcode]:18} {argument:5}  {detail}".rstrip())
+    return "\n".join(lines)
+
+
+def disassemble(bytecode_program):
+    #a readable listing of every code object, like the dis module's
+    functions = bytecode_program.functions
+    parts = [disassemble_code(bytecode_program.main, functions)]
+    parts.extend(disassemble_code(code, functions) for code in functions)
+    return "\n\n".join(parts)
+
+
+if __name__ == "__main__":
+    import sys
+    from parser.parser import parse_file
+
+    if len(sys.argv) != 2:
+        print("Usage: python -m semantics.disassembler <file.lol>")
+        sys.exit(1)
+    print(disassemble(compile_bytecode(parse_file(sys.argv[1]))))
@@ -0,0 +1,87 @@
+#input providers for GIMMEH: every engine calls its gui_input function once per GIMMEH and stores the line it
+#returns (None when there is no more input, which GIMMEH stores as NOOB); these are ready-made gui_input functions
+#  interpret(ast, print_function, ListInput(["3", "4"]))      answers recorded in advance
+#  interpret(ast, print_function, StreamInput())              lines from stdin (FileInput for a file)
+#  interpret(ast, print_function, QueueInput())               lines another thread put(), waited for without polling
+import queue
+import sys
+
+#what QueueInput hands to a waiting GIMMEH when there will be no more input, or when the run is cancelled
+END = object()
+CANCEL = object()
+
+
+class InputProvider: #a gui_input function: returns the next line of input, None once there is none
+    def __call__(self):
+        return self.read_line()
+
+    def read_line(self):
+        raise NotImplementedError
+
+
+class ListInput(InputProvider): #answers recorded in advance, for batch and test runs
+    def __init__(self, answers):
+        self.answers = list(answers)
+        self.position = 0 #answers read so far
+
+    def read_line(self):
+        if self.position >= len(self.answers):
+            return None
+        answer = self.answers[self.position]
+        self.position += 1
+        return answer
+
+    def remaining(self):
+        return self.answers[self.position:]
+
+
+class StreamInput(InputProvider): #one line per GIMMEH from a text stream, sys.stdin unless another one is given
+    def __init__(self, stream=None):
+        self.stream = sys.stdin if stream is None else stream
+
+    def read_line(self):
+        line = self.stream.readline()
+        if not line:
+            return None
+        #the line without its newline, like input() returns it
+        return line[:-1] if line.endswith("\n") else line
+
+
+class FileInput(StreamInput): #one line per GIMMEH from a file it opens itself, close() it when done
+    def __init__(self, path, encoding="utf-8"):
+        super().__init__(open(path, "r", encoding=encoding))
+
+    def close(self):
+        self.stream.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class QueueInput(InputProvider): #lines put() by another thread, such as a GUI or a server
+    #a GIMMEH sleeps on the queue until a line arrives, it does not poll
+    def __init__(self):
+        self.lines = queue.Queue()
+
+    def put(self, line):
+        self.lines.put(line)
+
+    def close(self):
+        #every GIMMEH from now on, once the lines already put are read, gets None
+        self.lines.put(END)
+
+    def cancel(self):
+        #the waiting GIMMEH (or the next one) stops the run with KeyboardInterrupt
+        self.lines.put(CANCEL)
+
+    def read_line(self):
+        line = self.lines.get()
+        if line is END:
+            self.lines.put(END)
+            return None
+        if line is CANCEL:
+            raise KeyboardInterrupt("Execution cancelled")
+        return line
@@ -1,11 +1,69 @@
+import itertools
 import operator
 from parser.ast_nodes import *
 from lexer.lol_tokens import TokenType
 from semantics import bool_convert, lol_to_num, lol_to_str, format_result, InterpreterRuntimeError
+from semantics.symbolizer import to_str, same_str, input_value
+from semantics.counted_loops import counted_loop
+from semantics.memoize import Memo, MemoFunctionTable, MISSING
+from semantics.output import flushing_output
 from semantics import ReturnNode as ReturnException
 from semantics import BreakNode as BreakException
 
-def interpret(node, gui_print, gui_input):
+#operator lexeme -> function applied to the two operand values of a BinaryOpNode
+BINARY_OPERATIONS = {
+    "SUM OF": operator.add,
+    "DIFF OF": operator.sub,
+    "PRODUKT OF": operator.mul,
+    "QUOSHUNT OF": operator.truediv,
+    "MOD OF": operator.mod,
+    "BIGGR OF": max,
+    "SMALLR OF": min,
+    "BOTH OF": lambda first_op, second_op: bool_convert(first_op) and bool_convert(second_op),
+    "EITHER OF": lambda first_op, second_op: bool_convert(first_op) or bool_convert(second_op),
+    "WON OF": lambda first_op, second_op: bool_convert(first_op) ^ bool_convert(second_op),
+    "BOTH SAEM": operator.eq,
+    "DIFFRINT": operator.ne,
+}
+
+#operators whose operands are not converted to numbers first
+BOOLEAN_OPERATORS = ("BOTH OF", "EITHER OF", "WON OF")
+
+#execute_statement returns None when a statement completes normally, BREAK for a GTFO and a Return for a
+#FOUND YR; the loop, switch or function call that the GTFO or FOUND YR stops checks for them, so no exception
+#has to be raised and unwound through the statements in between
+BREAK = object()
+
+class Return: # FOUND YR and its value
+    __slots__ = ('value',)
+
+    def __init__(self, value):
+        self.value = value
+
+class TailCall: # FOUND YR I IZ f ...: the call a function ends with, its arguments already bound
+    #the tree walker's function call loop runs it in place of the function that returned it, so a chain of
+    #tail calls takes no Python stack; anything else that gets one asks for .value like for a Return
+    __slots__ = ('function_definition', 'local_symbtable', 'function_table', 'gui_print', 'gui_input')
+
+    def __init__(self, function_definition, local_symbtable, function_table, gui_print, gui_input):
+        self.function_definition = function_definition
+        self.local_symbtable = local_symbtable
+        self.function_table = function_table
+        self.gui_print = gui_print
+        self.gui_input = gui_input
+
+    @property
+    def value(self):
+        return run_function(self.function_definition, self.local_symbtable, self.function_table, self.gui_print, self.gui_input)
+
+# gui_print may be an output sink (see output.py), its buffered text is flushed at every GIMMEH and at the end
+@flushing_output
+def interpret(node, gui_print, gui_input, memo=None, optimize=False):
+    # optimize runs the AST optimizer (see optimizer.py) first, it rewrites the program in place
+    if optimize:
+        from semantics.optimizer import optimize as optimize_program # the optimizer imports this module
+        node = optimize_program(node)
+
     symbol_table = {'IT': 'NOOB'} # stores variables
  
     function_table = {} # all functions wil be placed here
@@ -14,11 +72,20 @@ def interpret(node, gui_print, gui_input):
     for statement in node.statements:
         if isinstance(statement, FunctionDefNode):
             function_table[statement.func_name] = statement
+
+    # calls to pure functions are memoized (see memoize.py); pass a Memo to size the cache or read its statistics
+    if memo is None:
+        memo = Memo()
+    memo.analyze(function_table)
+    function_table = MemoFunctionTable(function_table, memo)
+
     
     #execute statements
     for statement in node.statements:
         if not isinstance(statement, FunctionDefNode):
-            execute_statement(statement, symbol_table, function_table, gui_print, gui_input)
+            status = execute_statement(statement, symbol_table, function_table, gui_print, gui_input)
+            if status is not None:
+                raise_status(status)
     
     # print(symbol_table)
     return symbol_table
@@ -55,16 +122,16 @@ def execute_statement(node, symbol_table, function_table, gui_print, gui_input):
             pass # variable not declared
 
         user_input = gui_input() # FOR TESTING PURPOSES ONLY. INPUTS ARE DONE USING A DIALOGUE BOX
-        if user_input is None:
-            user_input = "NOOB" #default value
-        symbol_table[node.var_name] = user_input
+        symbol_table[node.var_name] = input_value(user_input) # NOOB if there is none
 
     elif isinstance(node, ConditionalNode):
         conditional_value = symbol_table.get("IT", "NOOB")
 
         if bool_convert(conditional_value): # YA RLY
             for statement in node.if_block:
-                execute_statement(statement, symbol_table, function_table, gui_print, gui_input)
+                status = execute_statement(statement, symbol_table, function_table, gui_print, gui_input)
+                if status is not None: # GTFO and FOUND YR stop the enclosing loop, switch or function
+                    return status
         
         else: # MEBBE
             executed_else_if = False
@@ -72,61 +139,77 @@ def execute_statement(node, symbol_table, function_table, gui_print, gui_input):
                 else_if_value = evaluate_expression(else_if_clause.condition, symbol_table, function_table, gui_print, gui_input)
                 if bool_convert(else_if_value): # MEBBE conditions
                     for statement in else_if_clause.statements: #execution
-                        execute_statement(statement, symbol_table, function_table, gui_print, gui_input)
+                        status = execute_statement(statement, symbol_table, function_table, gui_print, gui_input)
+                        if status is not None:
+                            return status
                     executed_else_if = True
                     break
             
             if not executed_else_if: # NO WAI
                 for statement in node.else_block:
-                    execute_statement(statement, symbol_table, function_table, gui_print, gui_input)
+                    status = execute_statement(statement, symbol_table, function_table, gui_print, gui_input)
+                    if status is not None:
+                        return status
     
     elif isinstance(node, SwitchNode): # WTF
         switch_value = lol_to_str(symbol_table.get("IT", "NOOB"))
         executed_case = False
         fall_through = False  
 
-        try: # check all cases
-            for case in node.cases:
-                if fall_through or lol_to_str(case.literal_value) == switch_value:
-                    fall_through = True  # Once we match, keep executing subsequent cases
-                    executed_case = True
-                    for statement in case.statements:
-                        execute_statement(statement, symbol_table, function_table, gui_print, gui_input)
-            
-            if not executed_case: # acts as the default case
-                for statement in node.default_case:
-                    execute_statement(statement, symbol_table, function_table, gui_print, gui_input)
-        except BreakException:
-            pass
+        # check all cases, a GTFO leaves the switch and a FOUND YR the function around it
+        for case in node.cases:
+            if fall_through or lol_to_str(case.literal_value) == switch_value:
+                fall_through = True  # Once we match, keep executing subsequent cases
+                executed_case = True
+                for statement in case.statements:
+                    status = execute_statement(statement, symbol_table, function_table, gui_print, gui_input)
+                    if status is not None:
+                        return None if status is BREAK else status
+        
+        if not executed_case: # acts as the default case
+            for statement in node.default_case:
+                status = execute_statement(statement, symbol_table, function_table, gui_print, gui_input)
+                if status is not None:
+                    return None if status is BREAK else status
 
     elif isinstance(node, LoopNode): # loop / IM IN YR
         if node.var_name not in symbol_table:
             pass
 
-        try: # loops until break is found (GTFO)
-            while True:
-                # loop condition
-                if node.condition:
-                    conditional_value = evaluate_expression(node.condition, symbol_table, function_table, gui_print, gui_input)
-                    if node.condition_type == "WILE":
-                        if not bool_convert(conditional_value):
-                            break
-                    elif node.condition_type == "TIL":
-                        if bool_convert(conditional_value):
-                            break
-                
-                # loop execution
-                for statement in node.statements:
-                    execute_statement(statement, symbol_table, function_table, gui_print, gui_input)
-
-                # loop variable update
-                current_value = lol_to_num(symbol_table[node.var_name])
-                if node.operation == "UPPIN":
-                    symbol_table[node.var_name] = current_value + 1
-                elif node.operation == "NERFIN":
-                    symbol_table[node.var_name] = current_value - 1
-        except BreakException:
-            pass
+        tiers = getattr(function_table, "tiers", None) # tiered execution, see tiered.py
+        if tiers is None and node.var_name in symbol_table:
+            counted = counted_loop(node, function_table) # see counted_loops.py
+            if counted is not None:
+                return run_counted_loop(node, counted, symbol_table, function_table, gui_print, gui_input)
+
+        # loops until break is found (GTFO)
+        while True:
+            if tiers is not None and tiers.loop_is_hot(node):
+                # the rest of the loop runs compiled, starting again from the condition
+                return tiers.run_loop(node, symbol_table)
+
+            # loop condition
+            if node.condition:
+                conditional_value = evaluate_expression(node.condition, symbol_table, function_table, gui_print, gui_input)
+                if node.condition_type == "WILE":
+                    if not bool_convert(conditional_value):
+                        break
+                elif node.condition_type == "TIL":
+                    if bool_convert(conditional_value):
+                        break
+            
+            # loop execution
+            for statement in node.statements:
+                status = execute_statement(statement, symbol_table, function_table, gui_print, gui_input)
+                if status is not None:
+                    return None if status is BREAK else status
+
+            # loop variable update
+            current_value = lol_to_num(symbol_table[node.var_name])
+            if node.operation == "UPPIN":
+                symbol_table[node.var_name] = current_value + 1
+            elif node.operation == "NERFIN":
+                symbol_table[node.var_name] = current_value - 1
     
     elif isinstance(node, TypecastStatementNode):
         if node.var_name not in symbol_table:
@@ -148,11 +231,17 @@ def execute_statement(node, symbol_table, function_table, gui_print, gui_input):
         symbol_table[node.var_name] = new_value
     
     elif isinstance(node, BreakNode):
-        raise BreakException()
+        return BREAK
 
     elif isinstance(node, ReturnNode):
-        return_value = evaluate_expression(node.expression, symbol_table, function_table, gui_print, gui_input)
-        raise ReturnException(return_value)
+        expression = node.expression
+        if type(expression) is FunctionCallNode: # a tail call, the function's caller runs it
+            function_definition = function_table.get(expression.func_name)
+            if function_definition and len(expression.arguments) == len(function_definition.parameters):
+                local_symbtable = bind_arguments(function_definition, expression, symbol_table, function_table, gui_print, gui_input)
+                return TailCall(function_definition, local_symbtable, function_table, gui_print, gui_input)
+        return_value = evaluate_expression(expression, symbol_table, function_table, gui_print, gui_input)
+        return Return(return_value)
 
     else:
         val = evaluate_expression(node, symbol_table, function_table, gui_print, gui_input)
@@ -181,24 +270,9 @@ def evaluate_expression(node, symbol_table, function_table, gui_print, gui_input
         left_op = evaluate_expression(node.left, symbol_table, function_table, gui_print, gui_input)
         right_op = evaluate_expression(node.right, symbol_table, function_table, gui_print, gui_input)
 
-        operations = {
-            "SUM OF": operator.add,
-            "DIFF OF": operator.sub,
-            "PRODUKT OF": operator.mul,
-            "QUOSHUNT OF": operator.truediv,
-            "MOD OF": operator.mod,
-            "BIGGR OF": max,
-            "SMALLR OF": min,
-            "BOTH OF": lambda first_op, second_op: bool_convert(first_op) and bool_convert(second_op),
-            "EITHER OF": lambda first_op, second_op: bool_convert(first_op) or bool_convert(second_op),
-            "WON OF": lambda first_op, second_op: bool_convert(first_op) ^ bool_convert(second_op),
-            "BOTH SAEM": operator.eq,
-            "DIFFRINT": operator.ne,
-        }
-
-        operator_function = operations.get(node.operator)
-
-        if node.operator not in ["BOTH OF", "EITHER OF", "WON OF"]:
+        operator_function = BINARY_OPERATIONS.get(node.operator)
+
+        if node.operator not in BOOLEAN_OPERATORS:
             # this will be a math oepration
             left_op = lol_to_num(left_op)
             right_op = lol_to_num(right_op)
@@ -207,13 +281,14 @@ def evaluate_expression(node, symbol_table, function_table, gui_print, gui_input
         return format_result(result)
     
     elif isinstance(node, ComparisonNode):
-        left_op = lol_to_str(evaluate_expression(node.left, symbol_table, function_table, gui_print, gui_input))
-        right_op = lol_to_str(evaluate_expression(node.right, symbol_table, function_table, gui_print, gui_input))
+        left_op = evaluate_expression(node.left, symbol_table, function_table, gui_print, gui_input)
+        right_op = evaluate_expression(node.right, symbol_table, function_table, gui_print, gui_input)
 
+        # compares the string forms, without converting two NUMBRs or two YARNs
         if node.operator == "BOTH SAEM":
-            result = (left_op == right_op)
+            result = same_str(left_op, right_op)
         elif node.operator == "DIFFRINT":
-            result = (left_op != right_op)
+            result = not same_str(left_op, right_op)
         return format_result(result)
     
     elif isinstance(node, UnaryOpNode): # NOT
@@ -244,23 +319,37 @@ def evaluate_expression(node, symbol_table, function_table, gui_print, gui_input
         if len(node.arguments) != len(function_definition.parameters):
             return "NOOB"
         
-        argument_values = [evaluate_expression(argument, symbol_table, function_table, gui_print, gui_input) for argument in node.arguments]
+        local_symbtable = bind_arguments(function_definition, node, symbol_table, function_table, gui_print, gui_input)
 
-        local_symbtable = {"IT": symbol_table.get("IT", "NOOB")}
-        for parameters, argument_val in zip(function_definition.parameters, argument_values):
-            local_symbtable[parameters] = argument_val
-        
-        try:
+        tiers = getattr(function_table, "tiers", None) # tiered execution, see tiered.py
+        if tiers is not None:
+            return tiers.call(function_definition, local_symbtable)
+
+        memo = getattr(function_table, "memo", None) # a pure function's value may already be known
+        key = memo.key(function_definition, local_symbtable) if memo is not None else None
+        if key is not None:
+            value = memo.get(key)
+            if value is not MISSING:
+                return value
+
+        while True:
             for statement in function_definition.statements:
-                execute_statement(statement, local_symbtable, function_table, gui_print, gui_input)
-        
-        except ReturnException as ret:
-            return ret.value
-        
-        except BreakException:
-            return "NOOB"
-    
-        return "NOOB"
+                status = execute_statement(statement, local_symbtable, function_table, gui_print, gui_input)
+                if status is not None:
+                    break
+            else:
+                value = "NOOB"
+                break
+            if type(status) is TailCall: # runs the called function in this loop instead of recursing
+                function_definition = status.function_definition
+                local_symbtable = status.local_symbtable
+                continue
+            # FOUND YR returns its value, a GTFO outside any loop or switch returns NOOB
+            value = "NOOB" if status is BREAK else status.value
+            break
+        if key is not None:
+            memo.store(key, value)
+        return value
 
     elif isinstance(node, TypecastNode): # MAEK
         value = evaluate_expression(node.expression, symbol_table, function_table, gui_print, gui_input)
@@ -282,4 +371,96 @@ def evaluate_expression(node, symbol_table, function_table, gui_print, gui_input
 
     else:
         pass
-        # print("Error")
\ No newline at end of file
+        # print("Error")
+
+# runs a loop counted_loop() recognized: the counter is kept in a local and only written back on exit
+# (or before every iteration, if the body reads it), the bound is evaluated once; returns like execute_statement
+def run_counted_loop(node, counted, symbol_table, function_table, gui_print, gui_input):
+    var_name = node.var_name
+    statements = node.statements
+    step = counted.step
+    reads_counter = counted.reads_counter
+    value = symbol_table[var_name]
+
+    try:
+        bound = to_str(evaluate_expression(counted.bound, symbol_table, function_table, gui_print, gui_input))
+
+        # the first iteration sees the counter as declared, it only becomes a number at the first update
+        if to_str(value) == bound:
+            return None
+        for statement in statements:
+            status = execute_statement(statement, symbol_table, function_table, gui_print, gui_input)
+            if status is not None:
+                return None if status is BREAK else status
+        value = lol_to_num(value) + step
+
+        if type(value) is int:
+            # a NUMBR counter reaches the bound exactly when the bound is that number written out
+            try:
+                end = int(bound)
+            except ValueError:
+                end = None
+            if end is not None and str(end) == bound and (end - value) * step >= 0:
+                counter = range(value, end, step)
+            else:
+                counter = itertools.count(value, step) # never reaches the bound, only GTFO stops it
+            for value in counter:
+                if reads_counter:
+                    symbol_table[var_name] = value
+                for statement in statements:
+                    status = execute_statement(statement, symbol_table, function_table, gui_print, gui_input)
+                    if status is not None:
+                        return None if status is BREAK else status
+            value = end
+        else:
+            # a NUMBAR counter, compared by its string form like the condition does
+            while to_str(value) != bound:
+                if reads_counter:
+                    symbol_table[var_name] = value
+                for statement in statements:
+                    status = execute_statement(statement, symbol_table, function_table, gui_print, gui_input)
+                    if status is not None:
+                        return None if status is BREAK else status
+                value += step
+    finally:
+        symbol_table[var_name] = value
+
+# the local symbol table of a call: the caller's IT, then each parameter bound to its argument
+# (evaluated straight into the table, with a repeated parameter the last argument wins)
+def bind_arguments(function_definition, node, symbol_table, function_table, gui_print, gui_input):
+    local_symbtable = {"IT": symbol_table.get("IT", "NOOB")}
+    for parameter, argument in zip(function_definition.parameters, node.arguments):
+        local_symbtable[parameter] = evaluate_expression(argument, symbol_table, function_table, gui_print, gui_input)
+    return local_symbtable
+
+# runs the body of a function in its local symbol table, returns the function's value
+# (the FunctionCallNode branch above does the same inline, saving a Python frame per call)
+def call_function(function_definition, local_symbtable, function_table, gui_print, gui_input):
+    tiers = getattr(function_table, "tiers", None)
+    while True:
+        for statement in function_definition.statements:
+            status = execute_statement(statement, local_symbtable, function_table, gui_print, gui_input)
+            if status is not None:
+                break
+        else:
+            return "NOOB"
+        if type(status) is TailCall and tiers is None:
+            function_definition = status.function_definition
+            local_symbtable = status.local_symbtable
+            continue
+        # under tiered execution the tail call goes through the tiers like any call (TailCall.value)
+        return "NOOB" if status is BREAK else status.value
+
+# runs a call that is ready to run, through the tiers if there are any
+def run_function(function_definition, local_symbtable, function_table, gui_print, gui_input):
+    tiers = getattr(function_table, "tiers", None)
+    if tiers is not None:
+        return tiers.call(function_definition, local_symbtable)
+    return call_function(function_definition, local_symbtable, function_table, gui_print, gui_input)
+
+# raises the exception for a GTFO or FOUND YR that no loop, switch or function stopped, for callers outside
+# the tree walker (the main program, and the other engines when they hand a statement to execute_statement)
+def raise_status(status):
+    if status is BREAK:
+        raise BreakException()
+    raise ReturnException(status.value)
@@ -0,0 +1,68 @@
+#what the Python modules generated by transpiler.py import: the symbolizer helpers interpret() uses,
+#plus one function per LOLCODE operation that has no single Python operator
+from semantics.symbolizer import bool_convert, lol_to_num, lol_to_str, format_result, InterpreterRuntimeError
+from semantics.symbolizer import BreakNode as BreakException
+from semantics.symbolizer import ReturnNode as ReturnException
+from semantics.symbolizer import to_str, same_str, input_value, TYPECASTS
+from semantics.interpreter import BINARY_OPERATIONS
+from semantics.resolver import UNDECLARED
+
+__all__ = ['bool_convert', 'lol_to_num', 'lol_to_str', 'format_result', 'InterpreterRuntimeError',
+           'BreakException', 'ReturnException', 'to_str', 'same_str', 'arith', 'both_of', 'either_of',
+           'won_of', 'smoosh', 'all_of', 'any_of', 'read_input', 'symbol_table', 'TailCall', 'finish', 'TYPECASTS',
+           'BINARY_OPERATIONS', 'UNDECLARED']
+
+
+def arith(operator_function, left_op, right_op):
+    #a math operation on operands that are not both NUMBRs, exactly as evaluate_expression does it
+    return format_result(operator_function(lol_to_num(left_op), lol_to_num(right_op)))
+
+
+def both_of(left_op, right_op):
+    return "WIN" if bool_convert(left_op) and bool_convert(right_op) else "FAIL"
+
+
+def either_of(left_op, right_op):
+    return "WIN" if bool_convert(left_op) or bool_convert(right_op) else "FAIL"
+
+
+def won_of(left_op, right_op):
+    return "WIN" if bool_convert(left_op) ^ bool_convert(right_op) else "FAIL"
+
+
+def smoosh(*operands):
+    return "".join([lol_to_str(operand) for operand in operands])
+
+
+def all_of(*operands):
+    return "WIN" if all(bool_convert(operand) for operand in operands) else "FAIL"
+
+
+def any_of(*operands):
+    return "WIN" if any(bool_convert(operand) for operand in operands) else "FAIL"
+
+
+def read_input(gui_input):
+    #GIMMEH: no input at all is NOOB
+    return input_value(gui_input())
+
+
+def symbol_table(names, order, values):
+    #the name -> value dict interpret() returns, from the main program's locals, in declaration order
+    return {names[slot]: values[slot] for slot in order}
+
+
+class TailCall: #FOUND YR I IZ f ... MKAY, returned by the function instead of calling f from inside it
+    __slots__ = ('function', 'arguments')
+
+    def __init__(self, function, arguments):
+        self.function = function
+        self.arguments = arguments
+
+
+def finish(value):
+    #the value of a call to a function that may return a TailCall: the chain of tail calls runs in this loop,
+    #so it takes no Python stack, like in the tree walker
+    while type(value) is TailCall:
+        value = value.function(*value.arguments)
+    return value
@@ -0,0 +1,225 @@
+#memoization of pure HOW IZ I functions in the tree walker and the tiered engine: a function that never prints,
+#never reads input and only calls functions like itself computes its value from its arguments alone (and from the
+#caller's IT, when it reads IT before setting it), so interpret() and interpret_tiered() keep the values it
+#returned in a bounded LRU cache
+#  HOW IZ I fib YR n ... FOUND YR SUM OF I IZ fib YR DIFF OF n AN 1 MKAY AN I IZ fib YR DIFF OF n AN 2 MKAY
+#runs each fib YR n once, which makes the naive recursive version linear
+from collections import OrderedDict
+
+from parser.ast_nodes import *
+
+#values kept per run unless interpret() is given a Memo of another size; a Memo(0) memoizes nothing
+DEFAULT_MEMO_SIZE = 4096
+
+#what Memo.get returns for a key it does not hold
+MISSING = object()
+
+#the expression nodes, a statement that is one of them sets IT
+EXPRESSION_NODES = (LiteralNode, VariableNode, BinaryOpNode, ComparisonNode, UnaryOpNode, InfiniteArityOpNode,
+                    FunctionCallNode, TypecastNode)
+
+
+class Memo: #the cache of one or more runs and what it did
+    def __init__(self, maxsize=DEFAULT_MEMO_SIZE):
+        self.maxsize = maxsize
+        self.values = OrderedDict() #key -> (argument values, value), least recently used first
+        self.pure = {} #FunctionDefNode of every pure function -> it reads the caller's IT
+        self.cached = {} #the part of pure still looked up
+        self.streaks = {} #FunctionDefNode -> misses since its last hit
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def analyze(self, function_table):
+        #finds the pure functions of a program, before it runs
+        self.pure = pure_functions(function_table)
+        self.cached = dict(self.pure) if self.maxsize > 0 else {}
+        self.streaks = {}
+
+    def key(self, definition, local_symbtable):
+        #the key of a call whose local symbol table is bound, None if the function is not pure
+        reads_it = self.cached.get(definition)
+        if reads_it is None:
+            return None
+        values = tuple(local_symbtable.values())
+        return definition, values if reads_it else values[1:]
+
+    def get(self, key):
+        entry = self.values.get(key)
+        #1 and 1.0 (or 0.0 and -0.0) are the same key but different arguments, VISIBLE shows them differently
+        if entry is None or not same_values(entry[0], key[1]):
+            self.misses += 1
+            definition = key[0]
+            streak = self.streaks[definition] = self.streaks.get(definition, 0) + 1
+            if streak >= self.maxsize:
+                #its calls do not repeat while their values are kept, looking them up only costs time
+                self.cached.pop(definition, None)
+            return MISSING
+        self.hits += 1
+        self.streaks[key[0]] = 0
+        self.values.move_to_end(key)
+        return entry[1]
+
+    def store(self, key, value):
+        if self.maxsize <= 0:
+            return
+        self.values[key] = (key[1], value)
+        if len(self.values) > self.maxsize:
+            self.values.popitem(last=False)
+            self.evictions += 1
+
+    def report(self):
+        names = ", ".join(sorted(definition.func_name + ("" if definition in self.cached else " (stopped caching)")
+                                 for definition in self.pure)) or "none"
+        return (f"pure functions: {names}\n"
+                f"memo: {self.hits:,} hits, {self.misses:,} misses, {self.evictions:,} evictions "
+                f"({len(self.values):,} of {self.maxsize:,} values kept)")
+
+
+def same_values(first, second):
+    #true if two equal tuples of values also have the same types and float signs
+    for first_value, second_value in zip(first, second):
+        if type(first_value) is not type(second_value):
+            return False
+        if type(first_value) is float and first_value.hex() != second_value.hex():
+            return False
+    return True
+
+
+class MemoFunctionTable(dict): #the function table interpret() passes around, with the memo attached
+    #the tree walker looks for .memo on its function table and asks it before running a call,
+    #and keeps what counted_loops.py found out about each loop in .counted_loops for the rest of the run
+    def __init__(self, function_nodes, memo):
+        super().__init__(function_nodes)
+        self.memo = memo
+        self.counted_loops = {} #LoopNode -> CountedLoop or None
+
+
+def pure_functions(function_table):
+    #FunctionDefNode -> whether it reads the caller's IT, for every function of the table that is pure
+    candidates = {}
+    for definition in function_table.values():
+        calls = set()
+        try:
+            if collect_block(definition.statements, calls):
+                candidates[definition] = calls
+        except RecursionError:
+            #too deeply nested to analyze, it is not memoized
+            pass
+
+    #calling an impure function makes a function impure, until no more are found
+    #(a call with the wrong number of arguments runs nothing, only the calls that run count)
+    changed = True
+    while changed:
+        changed = False
+        for definition, calls in list(candidates.items()):
+            for name, arity in calls:
+                callee = function_table.get(name)
+                if callee is not None and len(callee.parameters) == arity and callee not in candidates:
+                    del candidates[definition]
+                    changed = True
+                    break
+
+    #a called function gets the caller's IT, a call to one that reads it reads IT as well
+    reads_it = dict.fromkeys(candidates, False)
+    changed = True
+    while changed:
+        changed = False
+        for definition in candidates:
+            if not reads_it[definition] and reads_caller_it(definition.statements, function_table, reads_it):
+                reads_it[definition] = True
+                changed = True
+    return reads_it
+
+
+def collect_block(statements, calls):
+    #adds the (name, argument count) of every call in the statements, false if they print, read input or
+    #contain a node this pass does not know
+    return all(collect_statement(statement, calls) for statement in statements)
+
+
+def collect_statement(node, calls):
+    if isinstance(node, VariableDeclNode):
+        return node.initial_value is None or collect_expression(node.initial_value, calls)
+    if isinstance(node, AssignmentNode):
+        return collect_expression(node.expression, calls)
+    if isinstance(node, ConditionalNode):
+        return (collect_block(node.if_block, calls)
+                and all(collect_expression(clause.condition, calls) and collect_block(clause.statements, calls)
+                        for clause in node.elif_blocks)
+                and collect_block(node.else_block, calls))
+    if isinstance(node, SwitchNode):
+        return (all(collect_block(case.statements, calls) for case in node.cases)
+                and collect_block(node.default_case, calls))
+    if isinstance(node, LoopNode):
+        return ((node.condition is None or collect_expression(node.condition, calls))
+                and collect_block(node.statements, calls))
+    if isinstance(node, ReturnNode):
+        return collect_expression(node.expression, calls)
+    if isinstance(node, (TypecastStatementNode, BreakNode, FunctionDefNode)):
+        #a HOW IZ I inside a block is never called
+        return True
+    if isinstance(node, (VisibleNode, GimmehNode)):
+        return False
+    return collect_expression(node, calls)
+
+
+def collect_expression(node, calls):
+    if isinstance(node, (LiteralNode, VariableNode)):
+        return True
+    if isinstance(node, (BinaryOpNode, ComparisonNode)):
+        return collect_expression(node.left, calls) and collect_expression(node.right, calls)
+    if isinstance(node, UnaryOpNode):
+        return collect_expression(node.operand, calls)
+    if isinstance(node, InfiniteArityOpNode):
+        return all(collect_expression(operand, calls) for operand in node.operands)
+    if isinstance(node, FunctionCallNode):
+        calls.add((node.func_name, len(node.arguments)))
+        return all(collect_expression(argument, calls) for argument in node.arguments)
+    if isinstance(node, TypecastNode):
+        return collect_expression(node.expression, calls)
+    return False
+
+
+def reads_caller_it(statements, function_table, reads_it):
+    #true if the function may read IT before it sets it: the statements up to the first expression statement
+    #are checked, and anything but declarations and assignments counts as a read (O RLY? and WTF? read IT)
+    for statement in statements:
+        if isinstance(statement, VariableDeclNode):
+            if statement.initial_value is not None and mentions_it(statement.initial_value, function_table, reads_it):
+                return True
+        elif isinstance(statement, AssignmentNode):
+            if mentions_it(statement.expression, function_table, reads_it):
+                return True
+            if statement.var_name == "IT":
+                return False
+        elif isinstance(statement, FunctionDefNode):
+            pass
+        elif isinstance(statement, ReturnNode):
+            return mentions_it(statement.expression, function_table, reads_it)
+        elif isinstance(statement, BreakNode):
+            return False
+        elif isinstance(statement, EXPRESSION_NODES):
+            return mentions_it(statement, function_table, reads_it)
+        else:
+            return True
+    return False
+
+
+def mentions_it(node, function_table, reads_it):
+    if isinstance(node, VariableNode):
+        return node.var_name == "IT"
+    if isinstance(node, (BinaryOpNode, ComparisonNode)):
+        return mentions_it(node.left, function_table, reads_it) or mentions_it(node.right, function_table, reads_it)
+    if isinstance(node, UnaryOpNode):
+        return mentions_it(node.operand, function_table, reads_it)
+    if isinstance(node, InfiniteArityOpNode):
+        return any(mentions_it(operand, function_table, reads_it) for operand in node.operands)
+    if isinstance(node, FunctionCallNode):
+        callee = function_table.get(node.func_name)
+        if callee is not None and len(callee.parameters) == len(node.arguments) and reads_it.get(callee):
+            return True
+        return any(mentions_it(argument, function_table, reads_it) for argument in node.arguments)
+    if isinstance(node, TypecastNode):
+        return mentions_it(node.expression, function_table, reads_it)
+    return False
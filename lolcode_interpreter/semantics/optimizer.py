@@ -0,0 +1,202 @@
+#AST optimizer, run between Parser.parse and interpret (interpret(..., optimize=True), any engine, lolc.py -O):
+#constant subtrees are folded into literals and O RLY?/WTF? branches that can never run are dropped
+#a constant is folded by evaluating it with evaluate_expression itself, so the literal it becomes has the
+#exact value interpret() would compute; anything that fails when evaluated is left to fail at run time
+import math
+
+from parser.ast_nodes import *
+from lexer.lol_tokens import TokenType
+from semantics import bool_convert, lol_to_str
+from semantics.symbolizer import LITERAL_VALUES
+from semantics.interpreter import evaluate_expression
+
+#IT before a statement when the optimizer cannot tell what it holds
+UNKNOWN = object()
+
+
+def optimize(program):
+    #rewrites the program in place and returns it
+    #a program nested too deeply to walk keeps whatever was rewritten before that, every rewrite stands on its own
+    try:
+        program.statements = optimize_block(program.statements)
+    except RecursionError:
+        pass
+    return program
+
+
+#expressions
+
+def fold_expression(node):
+    #the node with its constant subtrees folded, a LiteralNode if the whole node is constant
+    if isinstance(node, (BinaryOpNode, ComparisonNode)):
+        node.left = fold_expression(node.left)
+        node.right = fold_expression(node.right)
+        operands = (node.left, node.right)
+    elif isinstance(node, UnaryOpNode):
+        node.operand = fold_expression(node.operand)
+        operands = (node.operand,)
+    elif isinstance(node, InfiniteArityOpNode):
+        node.operands = tuple([fold_expression(operand) for operand in node.operands])
+        operands = node.operands
+    elif isinstance(node, TypecastNode):
+        node.expression = fold_expression(node.expression)
+        operands = (node.expression,)
+    elif isinstance(node, FunctionCallNode):
+        node.arguments = tuple([fold_expression(argument) for argument in node.arguments])
+        return node
+    else:
+        return node
+
+    if not all(isinstance(operand, LiteralNode) for operand in operands):
+        return node
+    try:
+        value = evaluate_expression(node, {}, {}, None, None)
+    except Exception:
+        #division by zero and the like, the error belongs to the run
+        return node
+    literal = literal_node(value, node.span)
+    return node if literal is None else literal
+
+
+def literal_node(value, span):
+    #a LiteralNode that evaluates to exactly value, None for values no literal can hold
+    if value is True or value is False:
+        return LiteralNode("WIN" if value else "FAIL", TokenType.TROOF, span)
+    if type(value) is int:
+        try:
+            return LiteralNode(str(value), TokenType.NUMBR, span)
+        except ValueError:
+            #more digits than str() will convert
+            return None
+    if type(value) is float:
+        if not math.isfinite(value):
+            return None
+        return LiteralNode(repr(value), TokenType.NUMBAR, span)
+    if type(value) is str:
+        #also covers "NOOB", "WIN" and "FAIL" results, which are YARNs to the interpreter
+        return LiteralNode(value, TokenType.YARN, span)
+    return None
+
+
+def literal_value(node):
+    #the value of a LiteralNode, UNKNOWN for anything else
+    if not isinstance(node, LiteralNode):
+        return UNKNOWN
+    convert = LITERAL_VALUES.get(node.literal_type)
+    if convert is None:
+        return UNKNOWN
+    try:
+        return convert(node.value)
+    except (ValueError, TypeError):
+        return UNKNOWN
+
+
+#statements
+
+def optimize_block(statements):
+    optimized = []
+    for statement in statements:
+        statement = optimize_statement(statement)
+        if isinstance(statement, ConditionalNode):
+            replacement = optimize_conditional(statement, known_it(optimized))
+            if replacement is not statement:
+                optimized.extend(replacement)
+                continue
+        elif isinstance(statement, SwitchNode):
+            optimize_switch(statement, known_it(optimized))
+        optimized.append(statement)
+    return tuple(optimized)
+
+
+def known_it(previous_statements):
+    #what IT holds after previous_statements, as far as the last statement alone tells
+    if not previous_statements:
+        return UNKNOWN
+    statement = previous_statements[-1]
+    if isinstance(statement, VisibleNode):
+        #VISIBLE leaves its last value in IT
+        return literal_value(statement.expressions[-1]) if statement.expressions else "NOOB"
+    return literal_value(statement)
+
+
+def optimize_statement(node):
+    if isinstance(node, VariableDeclNode):
+        if node.initial_value:
+            node.initial_value = fold_expression(node.initial_value)
+    elif isinstance(node, AssignmentNode):
+        node.expression = fold_expression(node.expression)
+    elif isinstance(node, VisibleNode):
+        node.expressions = tuple([fold_expression(expression) for expression in node.expressions])
+    elif isinstance(node, ConditionalNode):
+        node.if_block = optimize_block(node.if_block)
+        for clause in node.elif_blocks:
+            clause.condition = fold_expression(clause.condition)
+            clause.statements = optimize_block(clause.statements)
+        node.else_block = optimize_block(node.else_block)
+    elif isinstance(node, SwitchNode):
+        for case in node.cases:
+            case.statements = optimize_block(case.statements)
+        node.default_case = optimize_block(node.default_case)
+    elif isinstance(node, LoopNode):
+        if node.condition:
+            node.condition = fold_expression(node.condition)
+        node.statements = optimize_block(node.statements)
+    elif isinstance(node, FunctionDefNode):
+        node.statements = optimize_block(node.statements)
+    elif isinstance(node, ReturnNode):
+        node.expression = fold_expression(node.expression)
+    elif isinstance(node, (GimmehNode, TypecastStatementNode, BreakNode)):
+        pass
+    else:
+        #an expression used as a statement
+        return fold_expression(node)
+    return node
+
+
+def optimize_conditional(node, it):
+    #drops the branches of an O RLY? that can never run
+    #returns the node, or the statements that replace it when only one branch is left
+    elif_blocks = []
+    for clause in node.elif_blocks:
+        condition = literal_value(clause.condition)
+        if condition is UNKNOWN:
+            elif_blocks.append(clause)
+        elif bool_convert(condition):
+            #taken whenever it is reached: it is the NO WAI now, the clauses and NO WAI after it never run
+            node.else_block = clause.statements
+            break
+        #a constant false MEBBE is never taken
+    node.elif_blocks = tuple(elif_blocks)
+
+    if it is UNKNOWN:
+        return node
+    if bool_convert(it):
+        node.elif_blocks = ()
+        node.else_block = ()
+        return inline_block(node, node.if_block)
+    node.if_block = ()
+    if not node.elif_blocks:
+        return inline_block(node, node.else_block)
+    return node
+
+
+def inline_block(node, statements):
+    #the statements of the only branch left, they run in the same symbol table either way;
+    #a HOW IZ I inside the branch would become a top-level function, so that branch stays in its node
+    if any(isinstance(statement, FunctionDefNode) for statement in statements):
+        return node
+    return statements
+
+
+def optimize_switch(node, it):
+    #with IT known, the OMG cases before the one that matches and the OMGWTF if one matches never run;
+    #the WTF? itself stays, it is what stops a GTFO in its cases
+    if it is UNKNOWN:
+        return
+    switch_value = lol_to_str(it)
+    for index, case in enumerate(node.cases):
+        if lol_to_str(case.literal_value) == switch_value:
+            node.cases = node.cases[index:]
+            node.default_case = ()
+            return
+    node.cases = ()
@@ -0,0 +1,139 @@
+#output sinks for VISIBLE: every engine takes one in place of its gui_print function and hands it the text of
+#every VISIBLE; the sink buffers the text and passes it on in one call per line, per block or per VISIBLE
+#  interpret(ast, StreamSink(sys.stdout, buffering=BLOCK), input_function)
+#whatever is buffered is flushed before every GIMMEH (so a prompt shows before the input is read) and when the
+#program ends, also when it ends with an error
+import functools
+import sys
+
+#buffering modes
+UNBUFFERED = "unbuffered" #every VISIBLE is passed on at once
+LINE = "line" #complete lines are passed on, each VISIBLE prints one
+BLOCK = "block" #text is passed on once block_size characters have collected
+BUFFERING_MODES = (UNBUFFERED, LINE, BLOCK)
+
+#characters collected before a block-buffered sink passes them on
+DEFAULT_BLOCK_SIZE = 64 * 1024
+
+
+class OutputSink: #collects VISIBLE text and hands it to emit() as its buffering says
+    def __init__(self, buffering=LINE, block_size=DEFAULT_BLOCK_SIZE):
+        if buffering not in BUFFERING_MODES:
+            raise ValueError(f"unknown buffering {buffering!r}, expected one of {', '.join(BUFFERING_MODES)}")
+        self.buffering = buffering
+        self.block_size = block_size
+        self.pending = [] #text not passed on yet
+        self.pending_size = 0
+        #write is what VISIBLE calls, bound once so it does not check the mode on every line
+        self.write = {UNBUFFERED: self.emit, LINE: self.write_line, BLOCK: self.write_block}[buffering]
+
+    def __call__(self, text):
+        #a sink can stand in for a gui_print function anywhere; code that is not an engine never flushes it,
+        #call flush() when it returns
+        self.write(text)
+
+    def write_line(self, text):
+        if not self.pending and text.endswith("\n"):
+            self.emit(text)
+            return
+        self.pending.append(text)
+        if "\n" in text:
+            pending = "".join(self.pending)
+            end = pending.rindex("\n") + 1
+            self.pending = [pending[end:]] if end < len(pending) else []
+            self.emit(pending[:end])
+
+    def write_block(self, text):
+        self.pending.append(text)
+        self.pending_size += len(text)
+        if self.pending_size >= self.block_size:
+            self.flush()
+
+    def flush(self):
+        #passes on everything buffered
+        if self.pending:
+            pending = "".join(self.pending)
+            self.pending = []
+            self.pending_size = 0
+            self.emit(pending)
+
+    def emit(self, text):
+        raise NotImplementedError
+
+
+class CallbackSink(OutputSink): #passes the text to a gui_print style function, such as the GUI console's
+    def __init__(self, callback, buffering=LINE, block_size=DEFAULT_BLOCK_SIZE):
+        self.emit = callback
+        super().__init__(buffering, block_size)
+
+
+class StreamSink(OutputSink): #writes to a text stream, sys.stdout unless another one is given
+    def __init__(self, stream=None, buffering=LINE, block_size=DEFAULT_BLOCK_SIZE):
+        self.stream = sys.stdout if stream is None else stream
+        super().__init__(buffering, block_size)
+
+    def emit(self, text):
+        self.stream.write(text)
+
+    def flush(self):
+        super().flush()
+        self.stream.flush()
+
+
+class FileSink(StreamSink): #writes to a file it opens (and truncates) itself, close() it when done
+    def __init__(self, path, buffering=BLOCK, block_size=DEFAULT_BLOCK_SIZE, encoding="utf-8"):
+        super().__init__(open(path, "w", encoding=encoding), buffering, block_size)
+
+    def close(self):
+        self.flush()
+        self.stream.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class CaptureSink(OutputSink): #keeps the output in memory, for tests and batch runs
+    def __init__(self, buffering=BLOCK, block_size=DEFAULT_BLOCK_SIZE):
+        self.chunks = []
+        super().__init__(buffering, block_size)
+
+    def emit(self, text):
+        self.chunks.append(text)
+
+    def getvalue(self):
+        #everything printed so far, buffered text included
+        self.flush()
+        return "".join(self.chunks)
+
+    def lines(self):
+        return self.getvalue().splitlines()
+
+
+def open_output(gui_print, gui_input):
+    #the print and input functions an engine runs with, and the sink it has to flush at the end (None for a
+    #plain gui_print function, which gets every VISIBLE as before)
+    if not isinstance(gui_print, OutputSink):
+        return gui_print, gui_input, None
+    sink = gui_print
+
+    def read_input():
+        sink.flush()
+        return gui_input()
+    return sink.write, read_input, sink
+
+
+def flushing_output(engine):
+    #decorator for an engine taking (node, gui_print, gui_input, ...): a sink passed as gui_print is flushed at
+    #every GIMMEH and when the engine returns or fails, like interpret() does
+    @functools.wraps(engine)
+    def run(node, gui_print, gui_input, *args, **kwargs):
+        gui_print, gui_input, sink = open_output(gui_print, gui_input)
+        try:
+            return engine(node, gui_print, gui_input, *args, **kwargs)
+        finally:
+            if sink is not None:
+                sink.flush()
+    return run
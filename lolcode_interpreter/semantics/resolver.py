@@ -0,0 +1,166 @@
+#resolution pass: gives every variable of the main program and of each HOW IZ I function a slot index in its
+#scope, so a frame can be a flat list instead of a dict keyed by name (the bytecode compiler and the VM use it)
+#a variable only exists once its I HAS A (or GIMMEH) has run, which can depend on the input; the pass also
+#works out which reads and writes can only run after the declaration, those need no check at run time
+from parser.ast_nodes import *
+
+#what an empty slot holds until its variable is declared
+UNDECLARED = object()
+
+
+class Scope: #the slots of the main program or of one function
+    def __init__(self, name, parameters=()):
+        self.name = name
+        self.names = [] #slot -> variable name
+        self.slots = {} #variable name -> slot
+        self.declared = set() #nodes that only run once their variable is declared
+        self.slot("IT") #slot 0, IT always exists
+        #parameters follow IT, a function's frame starts out as [IT, arguments..., UNDECLARED...]
+        self.parameter_slots = tuple(self.slot(parameter) for parameter in parameters)
+
+    def slot(self, var_name):
+        slot = self.slots.get(var_name)
+        if slot is None:
+            slot = self.slots[var_name] = len(self.names)
+            self.names.append(var_name)
+        return slot
+
+    def is_declared(self, node):
+        return node in self.declared
+
+    def __len__(self):
+        return len(self.names)
+
+
+class Resolution: #the scopes of a program
+    def __init__(self, main, functions):
+        self.main = main
+        self.functions = functions #function name -> Scope
+
+
+class Resolver:
+    #walks a scope in the order it runs, keeping the set of variables that are certainly declared
+    def __init__(self, scope):
+        self.scope = scope
+
+    def resolve_block(self, statements, declared):
+        for statement in statements:
+            self.resolve_statement(statement, declared)
+
+    def resolve_statement(self, node, declared):
+        if isinstance(node, VariableDeclNode):
+            if node.initial_value:
+                self.resolve_expression(node.initial_value, declared)
+            #a declaration counts as declared when it declares the variable again
+            self.use(node, node.var_name, declared)
+            declared.add(node.var_name)
+        elif isinstance(node, AssignmentNode):
+            self.resolve_expression(node.expression, declared)
+            self.use(node, node.var_name, declared)
+        elif isinstance(node, VisibleNode):
+            for expression in node.expressions:
+                self.resolve_expression(expression, declared)
+        elif isinstance(node, GimmehNode):
+            self.use(node, node.var_name, declared)
+            declared.add(node.var_name)
+        elif isinstance(node, ConditionalNode):
+            #only one branch runs, what every branch declares is declared afterwards
+            branches = [self.resolve_branch(node.if_block, declared)]
+            for clause in node.elif_blocks:
+                self.resolve_expression(clause.condition, declared)
+                branches.append(self.resolve_branch(clause.statements, declared))
+            branches.append(self.resolve_branch(node.else_block, declared))
+            declared.update(set.intersection(*branches))
+        elif isinstance(node, SwitchNode):
+            for case in node.cases:
+                self.resolve_branch(case.statements, declared)
+            self.resolve_branch(node.default_case, declared)
+        elif isinstance(node, LoopNode):
+            #the body may run no times, nothing it declares is certain after the loop
+            if node.condition:
+                self.resolve_expression(node.condition, declared)
+            body_declared = self.resolve_branch(node.statements, declared)
+            self.use(node, node.var_name, body_declared)
+        elif isinstance(node, TypecastStatementNode):
+            self.use(node, node.var_name, declared)
+        elif isinstance(node, ReturnNode):
+            self.resolve_expression(node.expression, declared)
+        elif isinstance(node, (BreakNode, FunctionDefNode)):
+            #a HOW IZ I inside a block is never called, its body belongs to no scope
+            pass
+        else:
+            self.resolve_expression(node, declared)
+
+    def resolve_branch(self, statements, declared):
+        #resolves a block that may not run, returns what is declared at its end
+        branch_declared = set(declared)
+        self.resolve_block(statements, branch_declared)
+        return branch_declared
+
+    def resolve_expression(self, node, declared):
+        if isinstance(node, VariableNode):
+            self.use(node, node.var_name, declared)
+        elif isinstance(node, (BinaryOpNode, ComparisonNode)):
+            self.resolve_expression(node.left, declared)
+            self.resolve_expression(node.right, declared)
+        elif isinstance(node, UnaryOpNode):
+            self.resolve_expression(node.operand, declared)
+        elif isinstance(node, InfiniteArityOpNode):
+            for operand in node.operands:
+                self.resolve_expression(operand, declared)
+        elif isinstance(node, FunctionCallNode):
+            for argument in node.arguments:
+                self.resolve_expression(argument, declared)
+        elif isinstance(node, TypecastNode):
+            self.resolve_expression(node.expression, declared)
+        elif isinstance(node, ASTNode) and not isinstance(node, LiteralNode):
+            self.resolve_unknown(node)
+
+    def resolve_unknown(self, node):
+        #a node the pass does not know (or one nested too deeply to walk recursively) still gets slots for
+        #the variables it names; nothing in it counts as declared
+        scope = self.scope
+        pending = [node]
+        while pending:
+            node = pending.pop()
+            var_name = getattr(node, "var_name", None)
+            if isinstance(var_name, str):
+                scope.slot(var_name)
+            for node_type in type(node).__mro__:
+                for attribute in node_type.__dict__.get("__slots__", ()):
+                    value = getattr(node, attribute, None)
+                    for child in value if isinstance(value, (list, tuple)) else (value,):
+                        if isinstance(child, ASTNode):
+                            pending.append(child)
+
+    def use(self, node, var_name, declared):
+        self.scope.slot(var_name)
+        if var_name in declared:
+            self.scope.declared.add(node)
+
+
+def resolve_scope(name, statements, parameters=()):
+    scope = Scope(name, parameters)
+    resolver = Resolver(scope)
+    declared = {"IT"} | set(parameters)
+    for statement in statements:
+        try:
+            resolver.resolve_statement(statement, declared)
+        except RecursionError:
+            #what the statement declares stays unknown, everything after it is checked at run time
+            resolver.resolve_unknown(statement)
+    return scope
+
+
+def resolve(program):
+    #the scopes of the main program and of every function interpret() would call
+    functions = {}
+    for statement in program.statements:
+        if isinstance(statement, FunctionDefNode):
+            functions[statement.func_name] = statement
+    main_statements = [statement for statement in program.statements if not isinstance(statement, FunctionDefNode)]
+    return Resolution(
+        resolve_scope("<main>", main_statements),
+        {name: resolve_scope(name, definition.statements, definition.parameters)
+         for name, definition in functions.items()},
+    )
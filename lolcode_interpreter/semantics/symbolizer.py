@@ -2,7 +2,27 @@ from lexer.lol_tokens import TokenType
 from parser.ast_nodes import *
 import operator
 
+class Yarn(str):
+    #a YARN that keeps its NUMBR/NUMBAR and TROOF forms once they are worked out, so a value read by
+    #GIMMEH and used as a loop bound is parsed once instead of on every iteration
+    #it is a str in every other respect, the symbol table shows it like any YARN
+    number = None
+    truth = None
+
+def input_value(user_input):
+    #the value GIMMEH stores: NOOB when there is no input at all, a line of input as a Yarn
+    if user_input is None:
+        return "NOOB"
+    if type(user_input) is str:
+        return Yarn(user_input)
+    return user_input
+
 def bool_convert(token):
+    if type(token) is Yarn:
+        truth = token.truth
+        if truth is None:
+            truth = token.truth = bool_convert(str(token))
+        return truth
     if token == "NOOB" or token == "" or token == 0 or token == "FAIL":
         return False
     else:
@@ -21,6 +41,11 @@ class ReturnNode(Exception):
         self.value = value
 
 def lol_to_num(value):
+    if type(value) is Yarn:
+        number = value.number
+        if number is None:
+            number = value.number = lol_to_num(str(value))
+        return number
     if value == "WIN":
         return 1
     if value == "FAIL":
@@ -53,6 +78,8 @@ def lol_to_str(value):
         return "FAIL"
     if value is None:
         return "NOOB"
+    if type(value) is Yarn:
+        return value
     if value == "NOOB":
         return "NOOB"
     return str(value)
@@ -63,4 +90,38 @@ def format_result(value):
             return "WIN"
         else:
             return "FAIL"
-    return value
\ No newline at end of file
+    return value
+
+def to_str(value):
+    #lol_to_str with the common cases first: a YARN is its own string form
+    if type(value) is str or type(value) is Yarn:
+        return value
+    if type(value) is int or type(value) is float:
+        return str(value)
+    return lol_to_str(value)
+
+def same_str(left_op, right_op):
+    #lol_to_str(left_op) == lol_to_str(right_op), which is how BOTH SAEM and DIFFRINT compare
+    #two NUMBRs (or two YARNs) have equal string forms exactly when they are equal, so they skip the conversion
+    left_type = type(left_op)
+    if left_type is type(right_op) and (left_type is int or left_type is str or left_type is Yarn):
+        return left_op == right_op
+    return to_str(left_op) == to_str(right_op)
+
+#literal type -> value of a literal of that type, worked out when the literal is compiled
+LITERAL_VALUES = {
+    TokenType.NUMBR: int,
+    TokenType.NUMBAR: float,
+    TokenType.YARN: str,
+    TokenType.TROOF: lambda value: value == "WIN",
+    TokenType.NOOB: lambda value: "NOOB",
+}
+
+#MAEK / IS NOW A target type -> conversion
+TYPECASTS = {
+    "NUMBR": lambda value: int(lol_to_num(value)),
+    "NUMBAR": lambda value: float(lol_to_num(value)),
+    "YARN": lol_to_str,
+    "TROOF": lambda value: "WIN" if bool_convert(value) else "FAIL",
+    "NOOB": lambda value: "NOOB",
+}
@@ -0,0 +1,209 @@
+#tiered execution: everything starts in the tree walker, which counts how often each HOW IZ I function is
+#called and each IM IN YR loop goes round; a function or loop that reaches the threshold is compiled to
+#closures (closure_compiler.py) and runs compiled from then on, so code that stays cold is never compiled;
+#calls to pure functions are memoized in either tier, as in interpret() (see memoize.py)
+import time
+
+from parser.ast_nodes import *
+from semantics.interpreter import execute_statement, raise_status, BREAK, TailCall
+from semantics.closure_compiler import ClosureCompiler, Runtime
+from semantics.memoize import Memo, MISSING
+from semantics.optimizer import optimize as optimize_program
+from semantics.output import flushing_output
+
+#calls or loop iterations before a function or loop is compiled
+DEFAULT_TIER_THRESHOLD = 1000
+
+
+class TierEntry: #what the tiers know about one FunctionDefNode or LoopNode
+    __slots__ = ('kind', 'name', 'line', 'count', 'promoted_at', 'compile_seconds', 'compiled', 'failed')
+
+    def __init__(self, kind, name, line):
+        self.kind = kind #"function" or "loop"
+        self.name = name
+        self.line = line
+        self.count = 0 #calls in either tier, iterations until the loop is compiled
+        self.promoted_at = None #count when it was compiled
+        self.compile_seconds = 0.0
+        self.compiled = None #list of closures (function body) or one closure (loop)
+        self.failed = False #too deeply nested to compile, it stays in the tree walker
+
+
+class TierFunctionTable(dict): #the function table interpret() passes around, with the tiers and memo attached
+    #the tree walker looks for .tiers on its function table and lets it run calls and loops,
+    #the tiers ask the memo before running a call
+    def __init__(self, function_nodes, tiers, memo):
+        super().__init__(function_nodes)
+        self.tiers = tiers
+        self.memo = memo
+
+
+class TieredCompiler(ClosureCompiler): #closures whose calls go back through the tiers
+    def __init__(self, function_table, runtime, tiers):
+        super().__init__(function_table, runtime)
+        self.tiers = tiers
+
+    def compile_function_call(self, node):
+        definition = self.function_table.get(node.func_name)
+        if definition is None or len(node.arguments) != len(definition.parameters):
+            #unknown functions and calls with the wrong number of arguments evaluate to NOOB without evaluating anything
+            def run(symbols):
+                return "NOOB"
+            return run
+
+        arguments = [self.compile_expression(argument) for argument in node.arguments]
+        parameters = definition.parameters
+        call = self.tiers.call
+
+        def run(symbols):
+            argument_values = [argument(symbols) for argument in arguments]
+            local_symbols = {"IT": symbols.get("IT", "NOOB")}
+            for parameter, argument_value in zip(parameters, argument_values):
+                local_symbols[parameter] = argument_value
+            return call(definition, local_symbols)
+        return run
+
+    def compile_tail_call(self, node):
+        #the tail call the tree walker makes, so the tiers count it like any other call
+        definition = self.function_table.get(node.func_name)
+        if definition is None or len(node.arguments) != len(definition.parameters):
+            return None
+        arguments = list(zip(definition.parameters, [self.compile_expression(argument) for argument in node.arguments]))
+        function_table = self.function_table
+        runtime = self.runtime
+
+        def run(symbols):
+            local_symbols = {"IT": symbols.get("IT", "NOOB")}
+            for parameter, argument in arguments:
+                local_symbols[parameter] = argument(symbols)
+            return TailCall(definition, local_symbols, function_table, runtime.gui_print, runtime.gui_input)
+        return run
+
+    EXPRESSION_COMPILERS = {**ClosureCompiler.EXPRESSION_COMPILERS, FunctionCallNode: compile_function_call}
+
+
+class TieredInterpreter:
+    def __init__(self, program, threshold=DEFAULT_TIER_THRESHOLD, memo=None):
+        self.program = program
+        self.threshold = threshold
+        self.runtime = Runtime()
+        self.entries = {} #FunctionDefNode/LoopNode -> TierEntry
+
+        function_nodes = {}
+        for statement in program.statements:
+            if isinstance(statement, FunctionDefNode):
+                function_nodes[statement.func_name] = statement
+        self.memo = Memo() if memo is None else memo
+        self.memo.analyze(function_nodes)
+        self.function_table = TierFunctionTable(function_nodes, self, self.memo)
+        self.compiler = TieredCompiler(self.function_table, self.runtime, self)
+
+    def run(self, gui_print, gui_input):
+        #executes the program, returns its symbol table like interpret()
+        self.runtime.gui_print = gui_print
+        self.runtime.gui_input = gui_input
+        symbol_table = {'IT': 'NOOB'}
+        for statement in self.program.statements:
+            if not isinstance(statement, FunctionDefNode):
+                status = execute_statement(statement, symbol_table, self.function_table, gui_print, gui_input)
+                if status is not None:
+                    raise_status(status)
+        return symbol_table
+
+    def entry(self, node):
+        entry = self.entries.get(node)
+        if entry is None:
+            if isinstance(node, FunctionDefNode):
+                entry = TierEntry("function", node.func_name, node.span[0] if node.span else None)
+            else:
+                entry = TierEntry("loop", node.label, node.span[0] if node.span else None)
+            self.entries[node] = entry
+        return entry
+
+    def promote(self, entry, compile_node):
+        #compiles a node that just got hot, a node nested too deep to compile stays in the tree walker
+        start = time.perf_counter()
+        try:
+            entry.compiled = compile_node()
+        except RecursionError:
+            entry.failed = True
+        entry.compile_seconds = time.perf_counter() - start
+        entry.promoted_at = entry.count
+
+    #hooks called by the tree walker (and by compiled calls)
+
+    def call(self, definition, local_symbols):
+        #runs a function whose local symbol table is ready, in whichever tier it is in;
+        #a tail call it ends with runs in this loop, in whichever tier the called function is in
+        memo = self.memo # a pure function's value may already be known
+        key = memo.key(definition, local_symbols)
+        if key is not None:
+            value = memo.get(key)
+            if value is not MISSING:
+                return value
+
+        runtime = self.runtime
+        while True:
+            entry = self.entries.get(definition) or self.entry(definition)
+            entry.count += 1
+            if entry.compiled is None and not entry.failed and entry.count >= self.threshold:
+                self.promote(entry, lambda: self.compiler.compile_block(definition.statements))
+
+            status = None
+            if entry.compiled is None:
+                for statement in definition.statements:
+                    status = execute_statement(statement, local_symbols, self.function_table, runtime.gui_print, runtime.gui_input)
+                    if status is not None:
+                        break
+            else:
+                for statement in entry.compiled:
+                    status = statement(local_symbols)
+                    if status is not None:
+                        break
+
+            if type(status) is TailCall:
+                definition = status.function_definition
+                local_symbols = status.local_symbtable
+                continue
+            value = "NOOB" if status is None or status is BREAK else status.value
+            break
+        if key is not None:
+            memo.store(key, value)
+        return value
+
+    def loop_is_hot(self, node):
+        #counts one iteration of a tree-walked loop, true once the loop should continue compiled
+        entry = self.entries.get(node) or self.entry(node)
+        entry.count += 1
+        if entry.compiled is None and not entry.failed and entry.count >= self.threshold:
+            self.promote(entry, lambda: self.compiler.compile_statement(node))
+        return entry.compiled is not None
+
+    def run_loop(self, node, symbol_table):
+        #returns like execute_statement
+        return self.entries[node].compiled(symbol_table)
+
+    def report(self):
+        #one line per function and loop that ran, hottest first
+        lines = [f"tier threshold: {self.threshold}",
+                 f"{'kind':8} {'name':20} {'line':>5} {'count':>10}  tier"]
+        entries = sorted(self.entries.values(), key=lambda entry: entry.count, reverse=True)
+        for entry in entries:
+            if entry.compiled is not None:
+                tier = (f"closures (compiled at {entry.promoted_at:,}, "
+                        f"{entry.compile_seconds * 1000:.2f} ms)")
+            elif entry.failed:
+                tier = "tree walker (too deeply nested to compile)"
+            else:
+                tier = "tree walker"
+            line = "" if entry.line is None else entry.line
+            lines.append(f"{entry.kind:8} {str(entry.name):20} {line:>5} {entry.count:>10,}  {tier}")
+        return "\n".join(lines)
+
+
+@flushing_output
+def interpret_tiered(node, gui_print, gui_input, threshold=DEFAULT_TIER_THRESHOLD, memo=None, optimize=False):
+    #drop-in replacement for interpret() with tiered execution
+    if optimize:
+        node = optimize_program(node)
+    return TieredInterpreter(node, threshold, memo).run(gui_print, gui_input)
@@ -0,0 +1,610 @@
+#ahead-of-time translation of a ProgramNode into a Python module
+#IM IN YR loops become while loops, HOW IZ I functions become def, GTFO and FOUND YR become break and
+#return, and every value goes through the same symbolizer helpers interpret() uses (see lolc_runtime.py),
+#so the program behaves exactly as it does in the tree walker; lolc.py is the command line front end
+#FOUND YR I IZ f ... MKAY is a tail call as in the tree walker: a function calling itself that way starts over in
+#a loop, any other tail call is handed back to the caller as a TailCall that finish() makes (see lolc_runtime.py)
+#variables are Python locals, one per slot the resolver (resolver.py) gives them, UNDECLARED until declared
+import builtins
+import hashlib
+import importlib.util
+import marshal
+import os
+import sys
+
+from parser.ast_nodes import *
+from parser.cache import cache_dir, entry_name, interpreter_version, parse_source_cached
+from semantics.symbolizer import lol_to_str, LITERAL_VALUES, TYPECASTS
+from semantics.interpreter import BINARY_OPERATIONS, BOOLEAN_OPERATORS
+from semantics.optimizer import optimize as optimize_program
+from semantics.resolver import resolve
+from semantics.output import flushing_output
+
+#operators with a Python operator of their own, used directly when both operands are NUMBRs
+NUMBR_OPERATORS = {
+    "SUM OF": "{0} + {1}",
+    "DIFF OF": "{0} - {1}",
+    "PRODUKT OF": "{0} * {1}",
+    "QUOSHUNT OF": "{0} / {1}",
+    "MOD OF": "{0} % {1}",
+    "BIGGR OF": "max({0}, {1})",
+    "SMALLR OF": "min({0}, {1})",
+}
+
+BOOLEAN_HELPERS = {
+    "BOTH OF": "both_of",
+    "EITHER OF": "either_of",
+    "WON OF": "won_of",
+}
+
+INFINITE_ARITY_HELPERS = {
+    "SMOOSH": "smoosh",
+    "ALL OF": "all_of",
+    "ANY OF": "any_of",
+}
+
+#what a generated module looks like around the translated code
+MODULE_HEADER = """#generated by lolc from {source}, do not edit
+from semantics.lolc_runtime import *
+
+#set by run(), VISIBLE and GIMMEH go through them
+gui_print = None
+gui_input = None
+"""
+
+#errors compile() raises for source that is too deeply nested for it
+COMPILE_ERRORS = (SyntaxError, RecursionError, MemoryError)
+
+#packages whose code decides what a compiled program does
+TRANSPILER_VERSION = interpreter_version(("lexer", "parser", "semantics"))
+PYC_FLAGS = 0b01 #hash-based .pyc (PEP 552), the hash is checked by load_pyc rather than by the import system
+
+
+class TranspileError(Exception): #the program uses something that has no exact translation
+    pass
+
+
+class Transpiler:
+    def __init__(self, program, source_name="<program>"):
+        self.program = program
+        self.source_name = source_name
+        self.lines = []
+        self.constants = [] #module-level definitions the translated code refers to
+        self.constant_names = {}
+        self.indent = 0
+        self.temp_count = 0
+        #innermost last: "loop" or "switch" where GTFO is a break, "function" where it returns NOOB
+        self.break_targets = []
+        self.resolution = resolve(program)
+        self.scope = None #resolver scope of the function being written
+
+        #same function table interpret() builds: the last definition of a name wins
+        self.function_nodes = {}
+        for statement in program.statements:
+            if isinstance(statement, FunctionDefNode):
+                self.function_nodes[statement.func_name] = statement
+        self.function_names = {}
+        for index, name in enumerate(self.function_nodes):
+            python_name = f"lol_{name}"
+            self.function_names[name] = python_name if python_name.isidentifier() else f"lol_function_{index}"
+
+        #functions that may return a TailCall, their callers pass the value through finish()
+        self.trampolined = set()
+        for name, definition in self.function_nodes.items():
+            for call, nested in tail_calls(definition.statements):
+                if self.calls_function(call) and (nested or call.func_name != name):
+                    self.trampolined.add(name)
+        self.function_name = None #the function being written
+        self.restarts = False #it calls itself in a tail call that becomes a loop
+
+    def transpile(self):
+        #returns the source of the Python module
+        for name, definition in self.function_nodes.items():
+            self.write_function(self.function_names[name], definition)
+
+        self.line("")
+        self.line("")
+        self.line("def run(print_function, input_function):")
+        self.indent += 1
+        self.line("#executes the program, returns its symbol table like interpret()")
+        self.line("global gui_print, gui_input")
+        self.line("gui_print = print_function")
+        self.line("gui_input = input_function")
+        self.line("order = [0] #slots in the order they were declared")
+        self.line(f"{self.local('IT')} = 'NOOB'")
+        self.scope = self.resolution.main
+        self.break_targets = []
+        self.temp_count = 0
+        self.declare_locals(())
+        for statement in self.program.statements:
+            if not isinstance(statement, FunctionDefNode):
+                self.statement(statement)
+        names = self.constant("NAMES", repr(tuple(self.scope.names)))
+        values = ", ".join(self.local(name) for name in self.scope.names)
+        self.line(f"return symbol_table({names}, order, ({values},))")
+        self.indent -= 1
+
+        header = MODULE_HEADER.format(source=self.source_name)
+        constants = "\n".join(self.constants)
+        return header + ("\n" + constants + "\n" if constants else "") + "\n".join(self.lines) + "\n"
+
+    #output helpers
+
+    def line(self, text):
+        self.lines.append("    " * self.indent + text if text else "")
+
+    def temp(self, prefix):
+        self.temp_count += 1
+        return f"{prefix}{self.temp_count}"
+
+    def constant(self, prefix, expression):
+        #a module-level name for expression, one per distinct expression
+        name = self.constant_names.get(expression)
+        if name is None:
+            name = self.constant_names[expression] = f"{prefix}_{len(self.constants)}"
+            self.constants.append(f"{name} = {expression}")
+        return name
+
+    def block(self, statements):
+        if not statements:
+            self.line("pass")
+        for statement in statements:
+            self.statement(statement)
+
+    def local(self, var_name):
+        #the Python local that holds a variable of the current scope
+        slot = self.scope.slot(var_name) if self.scope is not None else 0
+        local = f"v_{var_name}"
+        return local if local.isidentifier() else f"v__{slot}"
+
+    def declare_locals(self, initialized):
+        #every other variable of the scope starts out UNDECLARED
+        names = [self.local(name) for name in self.scope.names if name not in initialized and name != "IT"]
+        if names:
+            self.line(f"{' = '.join(names)} = UNDECLARED")
+
+    def store(self, node, value):
+        #I HAS A and GIMMEH; the main program records the order its variables are first declared in
+        local = self.local(node.var_name)
+        if self.scope is self.resolution.main and not self.scope.is_declared(node):
+            self.line(f"if {local} is UNDECLARED:")
+            self.line(f"    order.append({self.scope.slot(node.var_name)})")
+        self.line(f"{local} = {value}")
+
+    def check_declared(self, node, error):
+        #raises error when the resolver cannot tell that the variable is declared by then
+        if not self.scope.is_declared(node):
+            self.line(f"if {self.local(node.var_name)} is UNDECLARED:")
+            self.line(f"    raise {error}")
+
+    def write_function(self, python_name, definition):
+        self.scope = self.resolution.functions[definition.func_name]
+        parameters = [self.local(parameter) for parameter in definition.parameters] + [self.local("IT")]
+        unique = len(set(parameters)) == len(parameters)
+        if not unique:
+            #HOW IZ I f YR a AN YR a: like the dict interpret() builds, the last argument wins
+            parameters = [f"p{index}" for index in range(len(definition.parameters))] + ["IT"]
+        self.line("")
+        self.line("")
+        self.line(f"def {python_name}({', '.join(parameters)}):")
+        self.indent += 1
+        self.line(f"#HOW IZ I {definition.func_name}")
+        if not unique:
+            self.line(f"{self.local('IT')} = IT")
+            for index, parameter in enumerate(definition.parameters):
+                self.line(f"{self.local(parameter)} = p{index}")
+        self.function_name = definition.func_name
+        self.restarts = False
+        start = len(self.lines)
+        self.declare_locals(["IT"] + list(definition.parameters))
+        self.break_targets = ["function"]
+        self.temp_count = 0
+        for statement in definition.statements:
+            self.statement(statement)
+        self.line("return 'NOOB'")
+        if self.restarts:
+            #the body runs in a loop, a tail call to the function itself binds the arguments and continues it
+            self.lines[start:] = ["    " + line if line else line for line in self.lines[start:]]
+            self.lines.insert(start, "    " * self.indent + "while True:")
+        self.function_name = None
+        self.indent -= 1
+
+    #statements
+
+    def statement(self, node):
+        for node_type in type(node).__mro__:
+            write = STATEMENT_WRITERS.get(node_type)
+            if write is not None:
+                return write(self, node)
+        self.line(f"{self.local('IT')} = {self.expression(node)}")
+
+    def variable_decl(self, node):
+        value = self.expression(node.initial_value) if node.initial_value else "'NOOB'"
+        self.store(node, value)
+
+    def assignment(self, node):
+        #assignments to undeclared variables are skipped without evaluating the expression
+        local = self.local(node.var_name)
+        if self.scope.is_declared(node):
+            self.line(f"{local} = {self.expression(node.expression)}")
+            return
+        self.line(f"if {local} is not UNDECLARED:")
+        self.indent += 1
+        self.line(f"{local} = {self.expression(node.expression)}")
+        self.indent -= 1
+
+    def visible(self, node):
+        values = []
+        for expression in node.expressions:
+            value = self.temp("v")
+            self.line(f"{value} = {self.expression(expression)}")
+            values.append(value)
+        self.line(f"gui_print({''.join(f'to_str({value}) + ' for value in values)}'\\n')")
+        self.line(f"{self.local('IT')} = {values[-1] if values else repr('NOOB')}")
+
+    def gimmeh(self, node):
+        self.store(node, "read_input(gui_input)")
+
+    def conditional(self, node):
+        self.line(f"if bool_convert({self.local('IT')}):")
+        self.indent += 1
+        self.block(node.if_block)
+        self.indent -= 1
+        for clause in node.elif_blocks:
+            self.line(f"elif {self.condition(clause.condition)}:")
+            self.indent += 1
+            self.block(clause.statements)
+            self.indent -= 1
+        if node.else_block:
+            self.line("else:")
+            self.indent += 1
+            self.block(node.else_block)
+            self.indent -= 1
+
+    def switch(self, node):
+        #the matching case is looked up in a dict, then every case from it on runs (fall-through);
+        #the cases sit in a loop that runs once so GTFO can leave it with break
+        cases = {}
+        for index, case in enumerate(node.cases):
+            cases.setdefault(lol_to_str(case.literal_value), index)
+        table = self.constant("CASES", repr(cases))
+        match = self.temp("case")
+        self.line(f"{match} = {table}.get(lol_to_str({self.local('IT')}), -1)")
+        self.line("while True:")
+        self.indent += 1
+        self.break_targets.append("switch")
+        self.line(f"if {match} < 0:")
+        self.indent += 1
+        self.block(node.default_case)
+        self.line("break")
+        self.indent -= 1
+        for index, case in enumerate(node.cases):
+            self.line(f"if {match} <= {index}:")
+            self.indent += 1
+            self.block(case.statements)
+            self.indent -= 1
+        self.line("break")
+        self.break_targets.pop()
+        self.indent -= 1
+
+    def loop(self, node):
+        self.line("while True:")
+        self.indent += 1
+        if node.condition:
+            if node.condition_type == "WILE":
+                self.line(f"if not ({self.condition(node.condition)}):")
+                self.line("    break")
+            elif node.condition_type == "TIL":
+                self.line(f"if {self.condition(node.condition)}:")
+                self.line("    break")
+            else:
+                #evaluated every time round, it just never ends the loop
+                self.line(self.expression(node.condition))
+
+        self.break_targets.append("loop")
+        self.block(node.statements)
+        self.break_targets.pop()
+
+        #the loop variable is read even without UPPIN/NERFIN, so an undeclared one is a KeyError either way
+        self.check_declared(node, f"KeyError({node.var_name!r})")
+        local = self.local(node.var_name)
+        counter = self.temp("n")
+        current = f"({counter} if type({counter} := {local}) is int else lol_to_num({counter}))"
+        if node.operation == "UPPIN":
+            self.line(f"{local} = {current} + 1")
+        elif node.operation == "NERFIN":
+            self.line(f"{local} = {current} - 1")
+        else:
+            self.line(current)
+        self.indent -= 1
+
+    def typecast_statement(self, node):
+        if node.target_type not in TYPECASTS:
+            raise TranspileError(f"IS NOW A {node.target_type} has no translation")
+        self.check_declared(node, f"InterpreterRuntimeError({'Variable ' + node.var_name + ' not declared'!r})")
+        local = self.local(node.var_name)
+        cast = self.constant("CAST", f"TYPECASTS[{node.target_type!r}]")
+        self.line(f"{local} = {cast}({local})")
+
+    def break_statement(self, node):
+        if not self.break_targets:
+            self.line("raise BreakException()")
+        elif self.break_targets[-1] == "function":
+            self.line("return 'NOOB'")
+        else:
+            self.line("break")
+
+    def return_statement(self, node):
+        in_function = self.break_targets and self.break_targets[0] == "function"
+        if in_function and type(node.expression) is FunctionCallNode and self.calls_function(node.expression):
+            return self.tail_call(node.expression)
+        value = self.expression(node.expression)
+        if in_function:
+            self.line(f"return {value}")
+        else:
+            self.line(f"raise ReturnException({value})")
+
+    def tail_call(self, node):
+        arguments = [self.expression(argument) for argument in node.arguments]
+        if node.func_name != self.function_name or self.break_targets != ["function"]:
+            #the caller makes the call; the called function gets the caller's IT, as in function_call()
+            arguments.append(self.local("IT"))
+            self.line(f"return TailCall({self.function_names[node.func_name]}, ({', '.join(arguments)},))")
+            return
+        #the function calling itself outside any loop or switch: the arguments are evaluated first, as they may
+        #read the parameters, then the body starts over; the IT it gets is its own IT, which is left as it is
+        values = []
+        for argument in arguments:
+            value = self.temp("a")
+            self.line(f"{value} = {argument}")
+            values.append(value)
+        definition = self.function_nodes[node.func_name]
+        for parameter, value in zip(definition.parameters, values):
+            self.line(f"{self.local(parameter)} = {value}")
+        self.line("continue")
+        self.restarts = True
+
+    #expressions, each one is translated to a Python expression
+
+    def expression(self, node):
+        for node_type in type(node).__mro__:
+            write = EXPRESSION_WRITERS.get(node_type)
+            if write is not None:
+                return write(self, node)
+        if isinstance(node, FunctionDefNode):
+            #a HOW IZ I that is not at the top level is an expression statement with no value
+            return "None"
+        raise TranspileError(f"{type(node).__name__} has no translation")
+
+    def condition(self, node):
+        #a Python bool equal to bool_convert of the expression's value
+        if type(node) is ComparisonNode and node.operator == "BOTH SAEM":
+            return f"same_str({self.expression(node.left)}, {self.expression(node.right)})"
+        if type(node) is ComparisonNode and node.operator == "DIFFRINT":
+            return f"not same_str({self.expression(node.left)}, {self.expression(node.right)})"
+        if type(node) is UnaryOpNode:
+            return f"not ({self.condition(node.operand)})"
+        return f"bool_convert({self.expression(node)})"
+
+    def literal(self, node):
+        convert = LITERAL_VALUES.get(node.literal_type)
+        if convert is None:
+            raise TranspileError(f"literal of type {node.literal_type} has no translation")
+        try:
+            return repr(convert(node.value))
+        except (ValueError, TypeError):
+            raise TranspileError(f"literal {node.value!r} has no translation")
+
+    def variable(self, node):
+        local = self.local(node.var_name)
+        if self.scope.is_declared(node):
+            return local
+        return f"('NOOB' if {local} is UNDECLARED else {local})"
+
+    def binary_op(self, node):
+        if node.operator not in BINARY_OPERATIONS:
+            raise TranspileError(f"operator {node.operator!r} has no translation")
+        left = self.expression(node.left)
+        right = self.expression(node.right)
+        if node.operator in BOOLEAN_OPERATORS:
+            return f"{BOOLEAN_HELPERS[node.operator]}({left}, {right})"
+
+        operation = self.constant("OPERATION", f"BINARY_OPERATIONS[{node.operator!r}]")
+        python_operator = NUMBR_OPERATORS.get(node.operator)
+        if python_operator is None:
+            return f"arith({operation}, {left}, {right})"
+        #two NUMBRs go straight to the Python operator, anything else is converted by arith;
+        #& rather than and, so the right operand is always evaluated
+        left_op = self.temp("l")
+        right_op = self.temp("r")
+        return (f"({python_operator.format(left_op, right_op)} "
+                f"if (type({left_op} := {left}) is int) & (type({right_op} := {right}) is int) "
+                f"else arith({operation}, {left_op}, {right_op}))")
+
+    def comparison(self, node):
+        if node.operator not in ("BOTH SAEM", "DIFFRINT"):
+            raise TranspileError(f"operator {node.operator!r} has no translation")
+        return f"('WIN' if {self.condition(node)} else 'FAIL')"
+
+    def unary_op(self, node):
+        return f"('FAIL' if {self.condition(node.operand)} else 'WIN')"
+
+    def infinite_arity_op(self, node):
+        helper = INFINITE_ARITY_HELPERS.get(node.operator)
+        if helper is None:
+            raise TranspileError(f"operator {node.operator!r} has no translation")
+        return f"{helper}({', '.join(self.expression(operand) for operand in node.operands)})"
+
+    def calls_function(self, node):
+        #false for calls to unknown functions and calls with the wrong number of arguments
+        definition = self.function_nodes.get(node.func_name)
+        return definition is not None and len(node.arguments) == len(definition.parameters)
+
+    def function_call(self, node):
+        if not self.calls_function(node):
+            #unknown functions and calls with the wrong number of arguments are NOOB, the arguments are not evaluated
+            return "'NOOB'"
+        #the caller's IT is read after the arguments are evaluated, as in the tree walker
+        arguments = [self.expression(argument) for argument in node.arguments] + [self.local("IT")]
+        call = f"{self.function_names[node.func_name]}({', '.join(arguments)})"
+        return f"finish({call})" if node.func_name in self.trampolined else call
+
+    def typecast(self, node):
+        if node.target_type not in TYPECASTS:
+            raise TranspileError(f"MAEK ... {node.target_type} has no translation")
+        cast = self.constant("CAST", f"TYPECASTS[{node.target_type!r}]")
+        return f"{cast}({self.expression(node.expression)})"
+
+
+STATEMENT_WRITERS = {
+    VariableDeclNode: Transpiler.variable_decl,
+    AssignmentNode: Transpiler.assignment,
+    VisibleNode: Transpiler.visible,
+    GimmehNode: Transpiler.gimmeh,
+    ConditionalNode: Transpiler.conditional,
+    SwitchNode: Transpiler.switch,
+    LoopNode: Transpiler.loop,
+    TypecastStatementNode: Transpiler.typecast_statement,
+    BreakNode: Transpiler.break_statement,
+    ReturnNode: Transpiler.return_statement,
+}
+
+EXPRESSION_WRITERS = {
+    LiteralNode: Transpiler.literal,
+    VariableNode: Transpiler.variable,
+    BinaryOpNode: Transpiler.binary_op,
+    ComparisonNode: Transpiler.comparison,
+    UnaryOpNode: Transpiler.unary_op,
+    InfiniteArityOpNode: Transpiler.infinite_arity_op,
+    FunctionCallNode: Transpiler.function_call,
+    TypecastNode: Transpiler.typecast,
+}
+
+
+def tail_calls(statements, nested=False):
+    #(call, nested) for every FOUND YR I IZ ... MKAY in a function body, nested if it is inside a loop or switch
+    for statement in statements:
+        if isinstance(statement, ReturnNode):
+            if type(statement.expression) is FunctionCallNode:
+                yield statement.expression, nested
+        elif isinstance(statement, ConditionalNode):
+            yield from tail_calls(statement.if_block, nested)
+            for clause in statement.elif_blocks:
+                yield from tail_calls(clause.statements, nested)
+            yield from tail_calls(statement.else_block, nested)
+        elif isinstance(statement, SwitchNode):
+            for case in statement.cases:
+                yield from tail_calls(case.statements, True)
+            yield from tail_calls(statement.default_case, True)
+        elif isinstance(statement, LoopNode):
+            yield from tail_calls(statement.statements, True)
+
+
+def transpile(program, source_name="<program>"):
+    #the Python source of a module whose run(gui_print, gui_input) executes program
+    return Transpiler(program, source_name).transpile()
+
+
+def compile_python(program, source_name="<program>"):
+    #the compiled code object of the translated module
+    return compile(transpile(program, source_name), f"<lolc {source_name}>", "exec")
+
+
+def run_code(code, gui_print, gui_input):
+    #executes a module compiled by compile_python, returns the program's symbol table
+    namespace = {"__name__": "__lolc__", "__builtins__": builtins}
+    exec(code, namespace)
+    return namespace["run"](gui_print, gui_input)
+
+
+@flushing_output
+def interpret_transpiled(node, gui_print, gui_input, optimize=False):
+    #drop-in replacement for interpret() that runs the program as a Python module;
+    #programs with no exact translation, or nested too deeply for compile(), run on the closure engine
+    if optimize:
+        node = optimize_program(node)
+    try:
+        code = compile_python(node)
+    except (TranspileError,) + COMPILE_ERRORS:
+        from semantics.closure_compiler import interpret_compiled
+        return interpret_compiled(node, gui_print, gui_input)
+    return run_code(code, gui_print, gui_input)
+
+
+#.pyc cache, next to the parse cache in the per-user cache directory
+
+def pyc_path(filename, optimize=False):
+    #<cache dir>/<entry name>.<cache tag>.pyc, marshal data is specific to one Python version;
+    #optimized modules go to <entry name>.<cache tag>.opt-1.pyc, like python -O
+    suffix = ".opt-1" if optimize else ""
+    return os.path.join(cache_dir(), f"{entry_name(filename)}.{sys.implementation.cache_tag}{suffix}.pyc")
+
+
+def pyc_key(source_code):
+    digest = hashlib.sha256(TRANSPILER_VERSION.encode("ascii"))
+    digest.update(source_code.encode("utf-8"))
+    return digest.digest()[:8]
+
+
+def pyc_header(source_code):
+    #the 16-byte header of a hash-based .pyc: magic number, flags, source hash
+    return importlib.util.MAGIC_NUMBER + PYC_FLAGS.to_bytes(4, "little") + pyc_key(source_code)
+
+
+def load_pyc(filename, source_code, optimize=False):
+    #the cached code object for this exact source, or None if there is no usable entry
+    if sys.implementation.cache_tag is None:
+        return None
+    try:
+        with open(pyc_path(filename, optimize), "rb") as f:
+            data = f.read()
+    except OSError:
+        return None
+
+    header = pyc_header(source_code)
+    if data[:len(header)] != header:
+        return None
+    try:
+        return marshal.loads(data[len(header):])
+    except (EOFError, ValueError, TypeError):
+        return None
+
+
+def store_pyc(filename, source_code, code, optimize=False):
+    #writes the entry atomically, failing to write only means the next run compiles again
+    if sys.implementation.cache_tag is None:
+        return False
+    path = pyc_path(filename, optimize)
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        os.makedirs(os.path.dirname(path), mode=0o700, exist_ok=True)
+        with open(temp_path, "wb") as f:
+            f.write(pyc_header(source_code))
+            f.write(marshal.dumps(code))
+        os.replace(temp_path, path)
+    except (OSError, ValueError):
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+        return False
+    return True
+
+
+def compile_file(filename, backend=None, optimize=False):
+    #the compiled module of a .lol file, from the .pyc cache when the source is unchanged;
+    #optimize runs the AST optimizer (optimizer.py) before translating
+    with open(filename, "r", encoding="utf-8") as f:
+        source_code = f.read()
+    code = load_pyc(filename, source_code, optimize)
+    if code is None:
+        program = parse_source_cached(source_code, filename, backend)
+        if optimize:
+            program = optimize_program(program)
+        code = compile_python(program, os.path.basename(filename))
+        store_pyc(filename, source_code, code, optimize)
+    return code
+
+
+def run_file(filename, gui_print, gui_input, backend=None, optimize=False):
+    return run_code(compile_file(filename, backend, optimize), gui_print, gui_input)
@@ -0,0 +1,296 @@
+#stack VM for the instruction streams built by bytecode.py
+#one dispatch loop runs the whole program: HOW IZ I calls push a frame instead of recursing in Python,
+#GTFO and FOUND YR are jumps and returns, so the only exceptions left are the ones interpret() lets escape
+#a frame is a flat list with one slot per variable of its scope (see resolver.py), UNDECLARED until declared
+import sys
+
+from semantics import bool_convert, lol_to_num, lol_to_str, format_result, InterpreterRuntimeError
+from semantics import ReturnNode as ReturnException
+from semantics import BreakNode as BreakException
+from semantics.symbolizer import to_str, same_str, input_value, TYPECASTS
+from semantics.interpreter import execute_statement, evaluate_expression, call_function, raise_status, BINARY_OPERATIONS
+from semantics.bytecode import *
+from semantics.resolver import UNDECLARED
+from semantics.optimizer import optimize as optimize_program
+from semantics.output import flushing_output
+
+#CAST arguments index this tuple
+CAST_FUNCTIONS = tuple(TYPECASTS[target] for target in CAST_TARGETS)
+
+#numeric opcodes -> the function BinaryOpNode applies to the converted operands
+NUMERIC_FUNCTIONS = {
+    ADD: BINARY_OPERATIONS["SUM OF"],
+    SUB: BINARY_OPERATIONS["DIFF OF"],
+    MUL: BINARY_OPERATIONS["PRODUKT OF"],
+    DIV: BINARY_OPERATIONS["QUOSHUNT OF"],
+    MOD: BINARY_OPERATIONS["MOD OF"],
+    MAX: BINARY_OPERATIONS["BIGGR OF"],
+    MIN: BINARY_OPERATIONS["SMALLR OF"],
+}
+NUMERIC_TABLE = tuple(NUMERIC_FUNCTIONS.get(opcode) for opcode in range(max(OPCODE_NAMES) + 1))
+
+#explicit-stack mode (interpret_stack): HOW IZ I calls may nest as deep as their frames fit in this many bytes
+DEFAULT_STACK_BUDGET = 64 * 1024 * 1024
+#what one frame takes besides its slots: the slot list itself and its (code object, return offset, frame) entry
+FRAME_OVERHEAD = sys.getsizeof([]) + sys.getsizeof((None, None, None)) + 8
+SLOT_SIZE = 8
+
+
+class FrameSymbols: #a frame as the name -> value dict the tree walker expects, for the nodes handed to it
+    __slots__ = ('frame', 'slots', 'order')
+
+    def __init__(self, frame, code, order):
+        self.frame = frame
+        self.slots = code.name_index
+        self.order = order #declaration order of the main program's variables, None in a function
+
+    def __contains__(self, var_name):
+        slot = self.slots.get(var_name)
+        return slot is not None and self.frame[slot] is not UNDECLARED
+
+    def __getitem__(self, var_name):
+        if var_name not in self:
+            raise KeyError(var_name)
+        return self.frame[self.slots[var_name]]
+
+    def get(self, var_name, default=None):
+        return self[var_name] if var_name in self else default
+
+    def __setitem__(self, var_name, value):
+        slot = self.slots[var_name]
+        if self.frame[slot] is UNDECLARED and self.order is not None:
+            self.order.append(slot)
+        self.frame[slot] = value
+
+
+def run(bytecode_program, gui_print, gui_input, stack_budget=None):
+    #executes the program, returns its symbol table like interpret()
+    #without a stack_budget, calls nest as deep as Python would let a recursive interpret() go and then fail with
+    #the same error; with one, they nest until their frames take more than stack_budget bytes
+    functions = bytecode_program.functions
+    function_nodes = bytecode_program.function_nodes
+    numeric_table = NUMERIC_TABLE
+    #stack_used counts frames (each costing frame_overhead + slot_size per slot) against stack_limit
+    if stack_budget is None:
+        stack_limit = sys.getrecursionlimit()
+        frame_overhead = 1
+        slot_size = 0
+        stack_error = "maximum recursion depth exceeded"
+    else:
+        stack_limit = stack_budget
+        frame_overhead = FRAME_OVERHEAD
+        slot_size = SLOT_SIZE
+        stack_error = f"LOLCODE call stack exceeded its budget of {stack_budget:,} bytes"
+    stack_used = 0
+
+    main = current = bytecode_program.main
+    code = current.code
+    constants = current.constants
+    names = current.names
+    symbols = [UNDECLARED] * len(names)
+    symbols[0] = "NOOB" #IT
+    order = [0] #slots of the main program in the order they were declared
+    stack = []
+    push = stack.append
+    pop = stack.pop
+    frames = [] #(code object, return offset, frame) of every caller
+    pc = 0
+
+    while True:
+        opcode = code[pc]
+        argument = code[pc + 1]
+        pc += 2
+
+        if opcode == LOAD_FAST:
+            push(symbols[argument])
+        elif opcode == LOAD_CONST:
+            push(constants[argument])
+        elif opcode == STORE_NAME:
+            symbols[argument] = pop()
+        elif opcode == LOAD_NAME:
+            value = symbols[argument]
+            push("NOOB" if value is UNDECLARED else value)
+        elif opcode <= MIN and opcode >= ADD:
+            right_op = pop()
+            left_op = stack[-1]
+            #NUMBR and NUMBAR values are already numbers, lol_to_num would hand them back unchanged
+            if type(left_op) is not int and type(left_op) is not float:
+                left_op = lol_to_num(left_op)
+            if type(right_op) is not int and type(right_op) is not float:
+                right_op = lol_to_num(right_op)
+            result = numeric_table[opcode](left_op, right_op)
+            if type(result) is bool:
+                result = "WIN" if result else "FAIL"
+            stack[-1] = result
+        elif opcode == POP_JUMP_IF_FALSE:
+            if not bool_convert(pop()):
+                pc = argument
+        elif opcode == POP_JUMP_IF_TRUE:
+            if bool_convert(pop()):
+                pc = argument
+        elif opcode == JUMP:
+            pc = argument
+        elif opcode == SAME:
+            right_op = pop()
+            stack[-1] = "WIN" if same_str(stack[-1], right_op) else "FAIL"
+        elif opcode == DIFF:
+            right_op = pop()
+            stack[-1] = "FAIL" if same_str(stack[-1], right_op) else "WIN"
+        elif opcode == INCR or opcode == DECR:
+            current_value = symbols[argument]
+            if type(current_value) is not int:
+                if current_value is UNDECLARED:
+                    raise KeyError(names[argument])
+                current_value = lol_to_num(current_value)
+            symbols[argument] = current_value + 1 if opcode == INCR else current_value - 1
+        elif opcode == IS_DECLARED:
+            push(symbols[argument] is not UNDECLARED)
+        elif opcode == VISIBLE:
+            if argument == 1:
+                last_value = pop()
+                gui_print(to_str(last_value) + "\n")
+            else:
+                values = stack[len(stack) - argument:]
+                del stack[len(stack) - argument:]
+                last_value = values[-1] if values else "NOOB"
+                gui_print("".join([to_str(value) for value in values]) + "\n")
+            symbols[0] = last_value
+        elif opcode == CALL:
+            function = functions[argument]
+            count = len(function.parameters)
+            argument_values = stack[len(stack) - count:] if count else []
+            if count:
+                del stack[len(stack) - count:]
+            if function.delegated is not None:
+                local_symbols = {"IT": symbols[0]}
+                for parameter, argument_value in zip(function.parameters, argument_values):
+                    local_symbols[parameter] = argument_value
+                push(call_function(function.delegated, local_symbols, function_nodes, gui_print, gui_input))
+                continue
+            local_symbols = [UNDECLARED] * len(function.names)
+            local_symbols[0] = symbols[0]
+            for slot, argument_value in zip(function.parameter_slots, argument_values):
+                local_symbols[slot] = argument_value
+            stack_used += frame_overhead + slot_size * len(local_symbols)
+            if stack_used > stack_limit:
+                raise RecursionError(stack_error)
+            frames.append((current, pc, symbols))
+            current = function
+            code = current.code
+            constants = current.constants
+            names = current.names
+            symbols = local_symbols
+            pc = 0
+        elif opcode == RETURN:
+            stack_used -= frame_overhead + slot_size * len(symbols)
+            current, pc, symbols = frames.pop()
+            code = current.code
+            constants = current.constants
+            names = current.names
+        elif opcode == TAIL_CALL:
+            #CALL and RETURN in one, reusing the frame: the caller's frame stays where it is on frames
+            function = functions[argument]
+            count = len(function.parameters)
+            argument_values = stack[len(stack) - count:] if count else []
+            if count:
+                del stack[len(stack) - count:]
+            if function.delegated is not None:
+                local_symbols = {"IT": symbols[0]}
+                for parameter, argument_value in zip(function.parameters, argument_values):
+                    local_symbols[parameter] = argument_value
+                push(call_function(function.delegated, local_symbols, function_nodes, gui_print, gui_input))
+                stack_used -= frame_overhead + slot_size * len(symbols)
+                current, pc, symbols = frames.pop()
+            else:
+                local_symbols = [UNDECLARED] * len(function.names)
+                local_symbols[0] = symbols[0]
+                for slot, argument_value in zip(function.parameter_slots, argument_values):
+                    local_symbols[slot] = argument_value
+                stack_used += slot_size * (len(local_symbols) - len(symbols))
+                if stack_used > stack_limit:
+                    raise RecursionError(stack_error)
+                current = function
+                symbols = local_symbols
+                pc = 0
+            code = current.code
+            constants = current.constants
+            names = current.names
+        elif opcode == NOT:
+            stack[-1] = "FAIL" if bool_convert(stack[-1]) else "WIN"
+        elif opcode == BOTH:
+            right_op = pop()
+            stack[-1] = format_result(bool_convert(stack[-1]) and bool_convert(right_op))
+        elif opcode == EITHER:
+            right_op = pop()
+            stack[-1] = format_result(bool_convert(stack[-1]) or bool_convert(right_op))
+        elif opcode == WON:
+            right_op = pop()
+            stack[-1] = format_result(bool_convert(stack[-1]) ^ bool_convert(right_op))
+        elif opcode == POP_TOP:
+            pop()
+        elif opcode == DUP_TOP:
+            push(stack[-1])
+        elif opcode == TO_STR:
+            stack[-1] = lol_to_str(stack[-1])
+        elif opcode == STR_EQ:
+            right_op = pop()
+            stack[-1] = stack[-1] == right_op
+        elif opcode == SMOOSH or opcode == ALL_OF or opcode == ANY_OF:
+            values = stack[len(stack) - argument:] if argument else []
+            if argument:
+                del stack[len(stack) - argument:]
+            if opcode == SMOOSH:
+                push("".join([lol_to_str(value) for value in values]))
+            elif opcode == ALL_OF:
+                push(format_result(all(bool_convert(value) for value in values)))
+            else:
+                push(format_result(any(bool_convert(value) for value in values)))
+        elif opcode == CAST:
+            stack[-1] = CAST_FUNCTIONS[argument](stack[-1])
+        elif opcode == DECLARE_NAME:
+            if symbols[argument] is UNDECLARED:
+                order.append(argument)
+            symbols[argument] = pop()
+        elif opcode == GIMMEH:
+            push(input_value(gui_input()))
+        elif opcode == CHECK_DECLARED:
+            if symbols[argument] is UNDECLARED:
+                raise InterpreterRuntimeError(f"Variable {names[argument]} not declared")
+        elif opcode == TOUCH:
+            if symbols[argument] is UNDECLARED:
+                raise KeyError(names[argument])
+            lol_to_num(symbols[argument])
+        elif opcode == EVAL_NODE:
+            frame = FrameSymbols(symbols, current, order if current is main else None)
+            push(evaluate_expression(constants[argument], frame, function_nodes, gui_print, gui_input))
+        elif opcode == EXEC_NODE:
+            frame = FrameSymbols(symbols, current, order if current is main else None)
+            status = execute_statement(constants[argument], frame, function_nodes, gui_print, gui_input)
+            if status is not None:
+                raise_status(status)
+        elif opcode == RAISE_BREAK:
+            raise BreakException()
+        elif opcode == RAISE_RETURN:
+            raise ReturnException(pop())
+        elif opcode == HALT:
+            #the name -> value symbol table interpret() returns
+            return {names[slot]: symbols[slot] for slot in order}
+        else:
+            raise InterpreterRuntimeError(f"Unknown opcode {opcode} at {pc // 2 - 1} in {current.name}")
+
+
+@flushing_output
+def interpret_vm(node, gui_print, gui_input, optimize=False):
+    #drop-in replacement for interpret() that compiles the program to bytecode and runs it on the VM
+    if optimize:
+        node = optimize_program(node)
+    return run(compile_bytecode(node), gui_print, gui_input)
+
+
+@flushing_output
+def interpret_stack(node, gui_print, gui_input, stack_budget=DEFAULT_STACK_BUDGET, optimize=False):
+    #interpret_vm without Python's recursion limit: every LOLCODE call frame lives on the VM's own stack, so
+    #recursion is only limited by stack_budget (code the VM hands to the tree walker still recurses in Python)
+    if optimize:
+        node = optimize_program(node)
+    return run(compile_bytecode(node), gui_print, gui_input, stack_budget)